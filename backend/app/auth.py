@@ -5,34 +5,39 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from . import models, database
+from . import models, database, passwords
+from .ttl_cache import TTLCache
 
 SECRET_KEY = os.getenv("SECRET_KEY", "CHANGE_THIS_SUPER_SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# ======================================
+# Auth caches (0 disables)
+# ======================================
+# Verified token payloads, so a token's signature is checked once per TTL
+AUTH_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "300"))
+# Users by id; bounds how long another process's change to a user can go unseen
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
 
+_token_cache = TTLCache(AUTH_CACHE_MAX_ENTRIES, AUTH_TOKEN_CACHE_TTL_SECONDS)
+_user_cache = TTLCache(AUTH_CACHE_MAX_ENTRIES, AUTH_USER_CACHE_TTL_SECONDS)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-
+# For endpoints that also serve anonymous callers
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception as e:
-        print("Password verify error:", e)
-        return False
+    return passwords.verify_and_update(plain_password, hashed_password)[0]
 
 
 def get_password_hash(password: str) -> str:
-    
-    return pwd_context.hash(password[:72])
-
+    return passwords.hash_password(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -43,6 +48,54 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+# ======================================
+# Current user
+# ======================================
+def _decode_token(token: str) -> Optional[dict]:
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    exp = payload.get("exp")
+    _token_cache.set(token, payload, expires_at=float(exp) if exp is not None else None)
+    return payload
+
+
+def _user_snapshot(user: models.User) -> models.User:
+    # Detached copy of the column values; never attached to any session itself
+    snapshot = models.User(
+        id=user.id,
+        email=user.email,
+        hashed_password=user.hashed_password,
+        full_name=user.full_name,
+        created_at=user.created_at,
+    )
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def invalidate_user(user_id: int) -> None:
+    _user_cache.pop(user_id)
+
+
+def clear_auth_caches() -> None:
+    _token_cache.clear()
+    _user_cache.clear()
+
+
+def auth_cache_stats() -> dict:
+    return {"tokens": _token_cache.stats(), "users": _user_cache.stats()}
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: models.User) -> None:
+    invalidate_user(target.id)
+
+
 def get_current_user(token: str = Depends(oauth2_scheme),
                      db: Session = Depends(database.get_db)) -> models.User:
     credentials_exception = HTTPException(
@@ -51,16 +104,39 @@ def get_current_user(token: str = Depends(oauth2_scheme),
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    payload = _decode_token(token)
+    if payload is None:
+        raise credentials_exception
+    email: str = payload.get("sub")
+    user_id = payload.get("uid")
+    if email is None:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
+    snapshot = _user_cache.get(user_id) if user_id is not None else None
+    if snapshot is None:
+        # Tokens issued before the uid claim are resolved by email
+        query = db.query(models.User)
+        if user_id is not None:
+            user = query.filter(models.User.id == user_id).first()
+        else:
+            user = query.filter(models.User.email == email).first()
+        if user is None or user.email != email:
+            raise credentials_exception
+        _user_cache.set(user.id, _user_snapshot(user))
+        return user
+
+    if snapshot.email != email:
         raise credentials_exception
+    # Attach a per-request copy to this session without a query
+    return db.merge(snapshot, load=False)
+
 
-    return user
+def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme),
+                      db: Session = Depends(database.get_db)) -> Optional[models.User]:
+    """The authenticated user, or None for a request without a valid token."""
+    if not token:
+        return None
+    try:
+        return get_current_user(token, db)
+    except HTTPException:
+        return None
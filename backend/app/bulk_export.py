@@ -0,0 +1,184 @@
+# backend/app/bulk_export.py
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from collections import Counter, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import database, doc_generator, metrics, models
+from .ooxml import ChunkSink
+
+# Rendering is CPU-bound, so it runs in worker processes (one per core by default)
+EXPORT_BULK_WORKERS = int(os.getenv("EXPORT_BULK_WORKERS", str(os.cpu_count() or 1)))
+EXPORT_BULK_MAX_PROJECTS = int(os.getenv("EXPORT_BULK_MAX_PROJECTS", "200"))
+
+# Plain, picklable section record sent to the workers
+SectionRecord = namedtuple("SectionRecord", "id order_index title content")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned, not forked: the server process runs threads (request
+                # pool, generation jobs) whose held locks a fork would copy.
+                _pool = ProcessPoolExecutor(
+                    max_workers=max(1, EXPORT_BULK_WORKERS),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    # A worker died (e.g. OOM-killed); the next export starts a fresh pool
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# ======================================
+# Worker
+# ======================================
+def render_project(title: str, project_type: str, sections: List[SectionRecord]) -> Tuple[str, bytes, float]:
+    """
+    Runs in a worker process: returns (filename, file bytes, render
+    seconds). Metrics recorded here would stay in the worker, so the
+    parent records the timing.
+    """
+    started = time.perf_counter()
+    data, _, filename = doc_generator.render_document(title, project_type, sections)
+    return filename, data, time.perf_counter() - started
+
+
+# ======================================
+# Archive writer
+# ======================================
+def _load_project(db: Session, project_id: int, owner_id: int):
+    project = (
+        db.query(models.Project.id, models.Project.title, models.Project.project_type)
+        .filter(models.Project.id == project_id, models.Project.owner_id == owner_id)
+        .first()
+    )
+    if project is None:
+        return None, []
+    rows = (
+        db.query(
+            models.DocumentSection.id,
+            models.DocumentSection.order_index,
+            models.DocumentSection.title,
+            models.DocumentSection.content,
+        )
+        .filter(models.DocumentSection.project_id == project_id)
+        .order_by(models.DocumentSection.order_index, models.DocumentSection.id)
+        .all()
+    )
+    return project, [SectionRecord(*row) for row in rows]
+
+
+def iter_bulk_export(project_ids: List[int], owner_id: int, missing_ids: Optional[List[int]] = None,
+                     filtered_ids: Optional[List[int]] = None) -> Iterator[bytes]:
+    """
+    Streams a ZIP with one exported file per project, written in the order
+    rendering finishes, plus a manifest.json listing every project and any
+    per-project failure. Requested projects the selection's filters
+    excluded are listed as skipped. At most two projects per worker are
+    loaded at once.
+    """
+    pool = _get_pool()
+    window = max(1, EXPORT_BULK_WORKERS) * 2
+    manifest = [
+        {"project_id": pid, "status": "failed", "error": "Project not found"}
+        for pid in missing_ids or []
+    ] + [
+        {"project_id": pid, "status": "skipped", "reason": "Filtered out by project_type / title_contains"}
+        for pid in filtered_ids or []
+    ]
+    pending: Dict[Future, dict] = {}
+    queue = iter(project_ids)
+    db = database.SessionLocal()
+    sink = ChunkSink()
+
+    def submit_next() -> bool:
+        for project_id in queue:
+            project, sections = _load_project(db, project_id, owner_id)
+            if project is None:
+                manifest.append({"project_id": project_id, "status": "failed", "error": "Project not found"})
+                continue
+            entry = {"project_id": project.id, "title": project.title}
+            try:
+                future = pool.submit(render_project, project.title, project.project_type, sections)
+            except BrokenProcessPool as e:
+                _discard_pool(pool)
+                manifest.append(dict(entry, status="failed", error=str(e)))
+                continue
+            pending[future] = entry
+            return True
+        return False
+
+    try:
+        # Exported files are already deflated; store them as-is
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+            while len(pending) < window and submit_next():
+                pass
+            db.commit()  # end the read transaction while workers render
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = pending.pop(future)
+                    try:
+                        filename, data, seconds = future.result()
+                    except Exception as e:
+                        if isinstance(e, BrokenProcessPool):
+                            _discard_pool(pool)
+                        print(f"❌ Bulk export of project {entry['project_id']} failed: {e}")
+                        entry.update(status="failed", error=str(e) or type(e).__name__)
+                    else:
+                        fmt = os.path.splitext(filename)[1].lstrip(".")
+                        metrics.EXPORT_RENDER_DURATION.observe(seconds, fmt, "bulk")
+                        metrics.EXPORT_OUTPUT_BYTES.observe(len(data), fmt, "bulk")
+                        arcname = f"{entry['project_id']}_{filename}"
+                        zf.writestr(arcname, data)
+                        entry.update(status="ok", file=arcname, bytes=len(data))
+                    manifest.append(entry)
+                    yield sink.drain()
+                    submit_next()
+                db.commit()
+
+            counts = Counter(entry["status"] for entry in manifest)
+            zf.writestr("manifest.json", json.dumps({
+                "generated_at": datetime.utcnow().isoformat() + "Z",
+                "total": len(manifest),
+                "succeeded": counts["ok"],
+                "failed": counts["failed"],
+                "skipped": counts["skipped"],
+                "projects": manifest,
+            }, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+        yield sink.drain()
+    finally:
+        # Client went away or the archive failed: drop work not yet started
+        for future in pending:
+            future.cancel()
+        db.close()
@@ -1,12 +1,30 @@
+import hashlib
+import os
+import time
 from io import BytesIO
-from typing import Tuple
-from docx import Document
-from pptx import Presentation
+from typing import Iterable, Iterator, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 
-from . import models
+from . import database, metrics, models, ooxml
+from .export_cache import export_cache
+
+# Bump when the fragment renderers change so cached output is not reused
+RENDERER_VERSION = "1"
+
+# Projects with at least this many sections are streamed instead of being
+# built (and cached) in memory; 0 streams every export
+EXPORT_STREAM_MIN_SECTIONS = int(os.getenv("EXPORT_STREAM_MIN_SECTIONS", "100"))
+EXPORT_STREAM_BATCH_SIZE = int(os.getenv("EXPORT_STREAM_BATCH_SIZE", "50"))
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
 
 
 def _build_docx(project: models.Project) -> BytesIO:
+    # python-docx and python-pptx take ~0.1 s to import; only exports need them
+    from docx import Document
+
     doc = Document()
     doc.add_heading(project.title, level=1)
     sections = sorted(project.sections, key=lambda s: s.order_index)
@@ -24,6 +42,8 @@ def _build_docx(project: models.Project) -> BytesIO:
 
 
 def _build_pptx(project: models.Project) -> BytesIO:
+    from pptx import Presentation
+
     prs = Presentation()
     title_slide_layout = prs.slide_layouts[0]
     slide = prs.slides.add_slide(title_slide_layout)
@@ -56,17 +76,153 @@ def _build_pptx(project: models.Project) -> BytesIO:
     return buf
 
 
-def generate_document_file(project: models.Project) -> Tuple[BytesIO, str, str]:
-    ptype = (project.project_type or "").lower()
-    safe_title = project.title.replace(" ", "_")
+# ======================================
+# Incremental export
+# ======================================
+# Sections are anything with id / order_index / title / content: ORM rows
+# for in-memory exports, plain result tuples for streamed ones.
+_RENDERERS = {
+    "docx": (ooxml.render_docx_title, ooxml.render_docx_section, ooxml.iter_docx),
+    "pptx": (ooxml.render_pptx_title_slide, ooxml.render_pptx_section_slide, ooxml.iter_pptx),
+}
+
+
+def _export_format(project_type: str, title: str) -> Tuple[str, str, str]:
+    ptype = (project_type or "").lower()
+    safe_title = title.replace(" ", "_")
     if ptype == "docx":
-        buf = _build_docx(project)
-        mime = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        filename = f"{safe_title}.docx"
-        return buf, mime, filename
+        return ptype, DOCX_MIME, f"{safe_title}.docx"
     if ptype == "pptx":
-        buf = _build_pptx(project)
-        mime = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
-        filename = f"{safe_title}.pptx"
-        return buf, mime, filename
-    raise ValueError(f"Unsupported project_type: {project.project_type}")
+        return ptype, PPTX_MIME, f"{safe_title}.pptx"
+    raise ValueError(f"Unsupported project_type: {project_type}")
+
+
+def _section_hash(sec) -> str:
+    raw = f"{sec.title}\x00{sec.content or ''}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _etag(project_type: str, title: str, sections: Iterable) -> str:
+    h = hashlib.sha256()
+    h.update(f"{RENDERER_VERSION}\x00{(project_type or '').lower()}\x00{title}".encode("utf-8"))
+    for sec in sections:
+        h.update(f"\x00{sec.id}:{sec.order_index}:{_section_hash(sec)}".encode("utf-8"))
+    return f'"{h.hexdigest()}"'
+
+
+def project_etag(project: models.Project) -> str:
+    """Strong ETag over everything that affects the rendered file."""
+    sections = sorted(project.sections, key=lambda s: s.order_index)
+    return _etag(project.project_type, project.title, sections)
+
+
+def _section_fragments(sections: Iterable, fmt: str, render) -> Iterator[str]:
+    """Yields one rendered fragment per section, re-rendering only dirty ones."""
+    for sec in sections:
+        key = f"{RENDERER_VERSION}:{fmt}:{sec.id}:{_section_hash(sec)}"
+        fragment = export_cache.get_fragment(key)
+        if fragment is None:
+            fragment = render(sec.title, sec.content)
+            export_cache.set_fragment(key, fragment)
+            export_cache.count("fragments_rendered")
+        else:
+            export_cache.count("fragments_reused")
+        yield fragment
+
+
+def _iter_package(fmt: str, title: str, sections: Iterable) -> Iterator[bytes]:
+    render_title, render_section, iter_package = _RENDERERS[fmt]
+    return iter_package(render_title(title), _section_fragments(sections, fmt, render_section))
+
+
+def generate_document_file(project: models.Project, etag: str = None) -> Tuple[BytesIO, str, str]:
+    """
+    Renders the project to DOCX / PPTX. Unchanged sections are assembled
+    from cached fragments, and an unchanged project is served from the
+    whole-file cache keyed by its ETag.
+    """
+    fmt, mime, filename = _export_format(project.project_type, project.title)
+    etag = etag or project_etag(project)
+    data = export_cache.get_file(etag)
+    if data is None:
+        started = time.perf_counter()
+        sections = sorted(project.sections, key=lambda s: s.order_index)
+        data = b"".join(_iter_package(fmt, project.title, sections))
+        metrics.EXPORT_RENDER_DURATION.observe(time.perf_counter() - started, fmt, "memory")
+        metrics.EXPORT_OUTPUT_BYTES.observe(len(data), fmt, "memory")
+        export_cache.set_file(etag, data)
+    else:
+        export_cache.count("files_reused")
+    return BytesIO(data), mime, filename
+
+
+def render_document(title: str, project_type: str, sections: Iterable) -> Tuple[bytes, str, str]:
+    """
+    Renders plain section records (already in order) without touching the
+    database or the whole-file cache; safe to call from worker processes.
+    """
+    fmt, mime, filename = _export_format(project_type, title)
+    return b"".join(_iter_package(fmt, title, sections)), mime, filename
+
+
+# ======================================
+# Streaming export (large projects)
+# ======================================
+def _iter_section_rows(db: Session, project_id: int):
+    # Plain column tuples fetched in batches: nothing is added to the
+    # session's identity map, so memory does not grow with the project.
+    return (
+        db.query(
+            models.DocumentSection.id,
+            models.DocumentSection.order_index,
+            models.DocumentSection.title,
+            models.DocumentSection.content,
+        )
+        .filter(models.DocumentSection.project_id == project_id)
+        .order_by(models.DocumentSection.order_index, models.DocumentSection.id)
+        .yield_per(EXPORT_STREAM_BATCH_SIZE)
+    )
+
+
+def count_sections(db: Session, project_id: int) -> int:
+    return (
+        db.query(func.count(models.DocumentSection.id))
+        .filter(models.DocumentSection.project_id == project_id)
+        .scalar()
+    )
+
+
+def should_stream(db: Session, project: models.Project) -> bool:
+    return count_sections(db, project.id) >= EXPORT_STREAM_MIN_SECTIONS
+
+
+def stream_etag(db: Session, project: models.Project) -> str:
+    """Same ETag as `project_etag`, computed from batched rows."""
+    return _etag(project.project_type, project.title, _iter_section_rows(db, project.id))
+
+
+def stream_document_file(project: models.Project) -> Tuple[Iterator[bytes], str, str]:
+    """
+    Streams the project as DOCX / PPTX while reading its sections from the
+    database in batches. The iterator opens its own session because it
+    runs after the request's session has been closed.
+    """
+    fmt, mime, filename = _export_format(project.project_type, project.title)
+    project_id, title = project.id, project.title
+
+    def chunks() -> Iterator[bytes]:
+        started = time.perf_counter()
+        size = 0
+        db = database.SessionLocal()
+        try:
+            for chunk in _iter_package(fmt, title, _iter_section_rows(db, project_id)):
+                if chunk:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            db.close()
+        # Only completed downloads; includes the batched section reads
+        metrics.EXPORT_RENDER_DURATION.observe(time.perf_counter() - started, fmt, "stream")
+        metrics.EXPORT_OUTPUT_BYTES.observe(size, fmt, "stream")
+
+    return chunks(), mime, filename
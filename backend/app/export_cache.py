@@ -0,0 +1,57 @@
+# backend/app/export_cache.py
+
+import math
+import os
+import threading
+
+from .llm_cache import MemoryLRU
+
+EXPORT_FRAGMENT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_FRAGMENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+EXPORT_FILE_CACHE_MAX_BYTES = int(os.getenv("EXPORT_FILE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_NO_EXPIRY = math.inf
+
+
+class ExportCache:
+    """
+    Rendered per-section fragments (keyed by format, section id and content
+    hash) and whole export files (keyed by ETag), each under a byte budget.
+    """
+
+    def __init__(self,
+                 fragment_max_bytes: int = EXPORT_FRAGMENT_CACHE_MAX_BYTES,
+                 file_max_bytes: int = EXPORT_FILE_CACHE_MAX_BYTES):
+        self.fragments = MemoryLRU(fragment_max_bytes)
+        self.files = MemoryLRU(file_max_bytes)
+        self._lock = threading.Lock()
+        self._counters = {"fragments_rendered": 0, "fragments_reused": 0, "files_reused": 0}
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def get_fragment(self, key: str):
+        return self.fragments.get(key)
+
+    def set_fragment(self, key: str, fragment: str) -> None:
+        self.fragments.set(key, fragment, _NO_EXPIRY)
+
+    def get_file(self, etag: str):
+        return self.files.get(etag)
+
+    def set_file(self, etag: str, data: bytes) -> None:
+        self.files.set(etag, data, _NO_EXPIRY)
+
+    def clear(self) -> None:
+        self.fragments.clear()
+        self.files.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["fragment_bytes"] = self.fragments.current_bytes
+        stats["file_bytes"] = self.files.current_bytes
+        return stats
+
+
+export_cache = ExportCache()
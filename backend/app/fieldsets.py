@@ -0,0 +1,93 @@
+# backend/app/fieldsets.py
+
+"""
+Sparse fieldsets and direct JSON serialization for API responses.
+
+`?fields=` keeps only the listed fields and `?exclude=` drops them. Names
+are comma-separated; fields of nested models (or of each item of a nested
+list) are reached with a dot:
+
+    ?fields=id,title,sections.id,sections.title
+    ?exclude=sections.content,sections.comment
+
+json_response() validates the endpoint's result into its response model
+and has pydantic write the JSON bytes directly (model_dump_json), applying
+the selection as it goes, so skipped fields are never serialized. This
+skips FastAPI's python-dict → json.dumps round trip on versions that still
+do it.
+"""
+
+import typing
+from typing import List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _nested_model(annotation) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """The model inside `annotation` (unwrapping Optional and List), and whether it is a list."""
+    is_list = False
+    while True:
+        origin = typing.get_origin(annotation)
+        if origin is typing.Union:
+            args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+            if len(args) != 1:
+                return None, is_list
+            annotation = args[0]
+        elif origin in (list, List):
+            is_list = True
+            annotation = typing.get_args(annotation)[0]
+        else:
+            break
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+    return None, is_list
+
+
+def _add(selection: dict, model: Type[BaseModel], parts: List[str], name: str, param: str) -> None:
+    head = parts[0]
+    field = model.model_fields.get(head)
+    if field is None:
+        raise HTTPException(status_code=400, detail=f"Unknown field {name!r} in {param}")
+    if len(parts) == 1:
+        selection[head] = True
+        return
+    if selection.get(head) is True:
+        return  # the whole field is already selected
+    nested, is_list = _nested_model(field.annotation)
+    if nested is None:
+        raise HTTPException(status_code=400, detail=f"Field {head!r} has no nested fields (in {param})")
+    child = selection.setdefault(head, {"__all__": {}} if is_list else {})
+    _add(child["__all__"] if is_list else child, nested, parts[1:], name, param)
+
+
+def parse_fields(model: Type[BaseModel], spec: Optional[str], param: str) -> Optional[dict]:
+    """Pydantic include / exclude mapping for a comma-separated field list, or None if empty."""
+    if not spec:
+        return None
+    selection = {}
+    for name in spec.split(","):
+        name = name.strip()
+        if name:
+            _add(selection, model, name.split("."), name, param)
+    return selection or None
+
+
+def fieldset(model: Type[BaseModel], fields: Optional[str], exclude: Optional[str]) -> Tuple[Optional[dict], Optional[dict]]:
+    return parse_fields(model, fields, "fields"), parse_fields(model, exclude, "exclude")
+
+
+def for_items(selection: Optional[dict], keep: Tuple[str, ...] = ()) -> Optional[dict]:
+    """Applies a per-item selection to the `items` of a page, keeping the page's `keep` fields."""
+    if selection is None:
+        return None
+    return {"items": {"__all__": selection}, **{name: True for name in keep}}
+
+
+def json_response(model: Type[BaseModel], content, include: Optional[dict] = None,
+                  exclude: Optional[dict] = None, **kwargs) -> Response:
+    instance = content if isinstance(content, model) else model.model_validate(content)
+    body = instance.model_dump_json(include=include, exclude=exclude)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, **kwargs)
@@ -0,0 +1,296 @@
+# backend/app/jobs.py
+
+"""
+Background project generation.
+
+Jobs and their per-section items live in the database. Any worker process
+may run a job, but only after claiming it: an atomic UPDATE that takes a
+lease (lease_owner, lease_expires_at) on a queued job, or on a running job
+whose lease has expired because its worker died. The lease is renewed
+while the job runs, so with several server workers each job still runs
+exactly once.
+"""
+
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from . import database, models
+from .llm_service import LLMOverloadedError
+from .routers import generate as gen_router
+
+# Number of projects generated concurrently in the background
+GENERATION_JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "2"))
+# How long a claimed job stays reserved for its worker without a renewal;
+# a job whose worker died is picked up again once this has passed
+GENERATION_JOB_LEASE_SECONDS = float(os.getenv("GENERATION_JOB_LEASE_SECONDS", "120"))
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+# Identifies this process in lease_owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_stopping = threading.Event()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _stopping.clear()
+                _executor = ThreadPoolExecutor(
+                    max_workers=GENERATION_JOB_WORKERS, thread_name_prefix="generation-job"
+                )
+    return _executor
+
+
+# ======================================
+# Job creation / submission
+# ======================================
+def create_job(db: Session, project: models.Project, bypass_cache: bool = False) -> models.GenerationJob:
+    """Records a job with one pending item per section of `project` (not committed)."""
+    job = models.GenerationJob(
+        project=project,
+        owner_id=project.owner_id,
+        status="queued",
+        bypass_cache=bypass_cache,
+        total=len(project.sections),
+    )
+    for section in project.sections:
+        job.items.append(models.GenerationJobItem(section=section, status="pending"))
+    db.add(job)
+    return job
+
+
+def submit_job(job_id: int) -> None:
+    _get_executor().submit(run_job, job_id)
+
+
+def _generate_section(topic: str, section_title: str, project_type: str, bypass_cache: bool,
+                      owner_id: int) -> str:
+    # Background jobs have no client waiting on a 429: when the scheduler
+    # sheds a call, back off for the suggested time and try again.
+    while True:
+        try:
+            return gen_router.generate_section_text(topic, section_title, project_type, bypass_cache, owner_id)
+        except LLMOverloadedError as e:
+            if _stopping.wait(e.retry_after):
+                raise
+
+
+# ======================================
+# Leases
+# ======================================
+def _claimable(now: datetime):
+    job = models.GenerationJob
+    return or_(
+        job.status == "queued",
+        and_(job.status == "running", or_(job.lease_expires_at.is_(None), job.lease_expires_at < now)),
+    )
+
+
+def claim_job(db: Session, job_id: int) -> bool:
+    """Atomically takes the lease on a job; False if it is finished or another worker holds it."""
+    now = datetime.utcnow()
+    claimed = (
+        db.query(models.GenerationJob)
+        .filter(models.GenerationJob.id == job_id, _claimable(now))
+        .update(
+            {
+                models.GenerationJob.status: "running",
+                models.GenerationJob.lease_owner: WORKER_ID,
+                models.GenerationJob.lease_expires_at: now + timedelta(seconds=GENERATION_JOB_LEASE_SECONDS),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def _renew_lease(db: Session, job_id: int) -> bool:
+    """Extends this worker's lease; False if it was lost (expired and claimed by another worker)."""
+    renewed = (
+        db.query(models.GenerationJob)
+        .filter(models.GenerationJob.id == job_id, models.GenerationJob.lease_owner == WORKER_ID)
+        .update(
+            {models.GenerationJob.lease_expires_at:
+                datetime.utcnow() + timedelta(seconds=GENERATION_JOB_LEASE_SECONDS)},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return renewed == 1
+
+
+def _release(job: models.GenerationJob) -> None:
+    job.lease_owner = None
+    job.lease_expires_at = None
+
+
+# ======================================
+# Worker
+# ======================================
+def _skip_edited(job: models.GenerationJob, item: models.GenerationJobItem) -> None:
+    item.status = "skipped"
+    item.error = "Section was edited while generating; the edit was kept"
+    job.completed += 1
+
+
+def _record_result(db: Session, job: models.GenerationJob, item: models.GenerationJobItem,
+                   started_version: int, future) -> None:
+    section = item.section
+    # Every commit expires the session, so `section` is freshly loaded here:
+    # compare with the version generation started from
+    if section.content_version != started_version:
+        _skip_edited(job, item)
+        db.commit()
+        return
+    try:
+        section.content = future.result()
+        item.status = "done"
+        job.completed += 1
+    except LLMOverloadedError:
+        # Only raised while shutting down: leave it for resume
+        item.status = "pending"
+    except Exception as e:
+        print(f"Error generating content for '{section.title}': {e}")
+        section.content = gen_router.section_placeholder(section.title, e)
+        item.status = "failed"
+        item.error = str(e)
+        job.failed += 1
+    if item.status != "pending":
+        section.content_version += 1
+    try:
+        db.commit()
+    except StaleDataError:
+        # Edited between the check above and this commit
+        db.rollback()
+        _skip_edited(job, item)
+        db.commit()
+
+
+def run_job(job_id: int) -> None:
+    """
+    Claims a job and fills in every pending section. Sections are generated
+    with the same bounded fan-out as synchronous project creation; each
+    result is committed as soon as it arrives so progress is visible while
+    the job runs and survives a restart. A job that crashes is marked
+    failed rather than left running.
+    """
+    db = database.SessionLocal()
+    try:
+        if not claim_job(db, job_id):
+            return
+        job = db.get(models.GenerationJob, job_id)
+        project = job.project
+        # "running" items were interrupted with a previous worker
+        items: List[models.GenerationJobItem] = [i for i in job.items if i.status in ("pending", "running")]
+        for item in items:
+            item.status = "running"
+        db.commit()
+
+        # The user may edit a section while it generates; their edit wins
+        started_versions = {item.id: item.section.content_version for item in items}
+
+        width = max(1, min(gen_router.SECTION_GENERATION_CONCURRENCY, len(items) or 1))
+        with ThreadPoolExecutor(max_workers=width, thread_name_prefix=f"job-{job_id}") as pool:
+            futures = {
+                pool.submit(
+                    _generate_section,
+                    project.title,
+                    item.section.title,
+                    project.project_type,
+                    job.bypass_cache,
+                    project.owner_id,
+                ): item
+                for item in items
+            }
+            # Only this thread touches the session; generation runs in the
+            # pool. The lease is renewed at least every third of its length.
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=GENERATION_JOB_LEASE_SECONDS / 3,
+                                         return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = futures[future]
+                    _record_result(db, job, item, started_versions[item.id], future)
+                if not _renew_lease(db, job_id):
+                    print(f"⚠️ Generation job {job_id} lost its lease; leaving it to the new owner")
+                    for future in pending:
+                        future.cancel()
+                    return
+
+        if any(item.status == "pending" for item in job.items):
+            job.status = "queued"
+        else:
+            job.status = "failed" if job.total and job.failed == job.total else "completed"
+        _release(job)
+        db.commit()
+    except Exception as e:
+        print(f"❌ Generation job {job_id} crashed: {e}")
+        db.rollback()
+        _fail_job(db, job_id, e)
+    finally:
+        db.close()
+
+
+def _fail_job(db: Session, job_id: int, error: Exception) -> None:
+    """Marks a crashed job and its unfinished sections failed, so it is not left running."""
+    try:
+        job = db.get(models.GenerationJob, job_id)
+        if job is None or job.lease_owner != WORKER_ID:
+            return
+        for item in job.items:
+            if item.status in ("pending", "running"):
+                item.status = "failed"
+                item.error = f"Generation job crashed: {error}"
+                job.failed += 1
+        job.status = "failed"
+        _release(job)
+        db.commit()
+    except Exception as e:
+        print(f"❌ Could not mark generation job {job_id} failed: {e}")
+        db.rollback()
+
+
+def resume_pending_jobs() -> int:
+    """
+    Submits jobs that are queued, or running under an expired lease (their
+    worker died). Each worker process calls this on startup; run_job's
+    claim makes sure only one of them runs a given job.
+    """
+    db = database.SessionLocal()
+    try:
+        job_ids = [
+            job_id for (job_id,) in
+            db.query(models.GenerationJob.id).filter(_claimable(datetime.utcnow())).all()
+        ]
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        submit_job(job_id)
+    if job_ids:
+        print(f"🔁 Resuming {len(job_ids)} generation job(s)")
+    return len(job_ids)
+
+
+def shutdown(wait: bool = False) -> None:
+    global _executor
+    _stopping.set()
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,215 @@
+# backend/app/llm_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# ======================================
+# Cache configuration
+# ======================================
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Empty string disables the persistent tier
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+
+
+def make_key(model_name: str, prompt: str, params: Optional[dict] = None) -> str:
+    """Content address of a completion: model + prompt hash + generation params."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    params_blob = json.dumps(params or {}, sort_keys=True, default=str)
+    raw = f"{model_name}\x00{prompt_hash}\x00{params_blob}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ======================================
+# Tier 1: in-process LRU with a byte budget
+# ======================================
+class MemoryLRU:
+    """LRU of str or bytes values bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(key: str, value) -> int:
+        return len(key) + (len(value) if isinstance(value, bytes) else len(value.encode("utf-8")))
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.time():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, expires_at: float) -> None:
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, expires_at)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key: str) -> None:
+        value, _ = self._data.pop(key)
+        self.current_bytes -= self._size(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# ======================================
+# Tier 2: persistent SQLite store
+# ======================================
+class SQLiteStore:
+    def __init__(self, path: str = LLM_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, value, time.time(), expires_at),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+# ======================================
+# Two-tier cache facade
+# ======================================
+class CompletionCache:
+    """
+    Prompt→completion cache: memory LRU in front of an optional SQLite store.
+    Disk hits are promoted into memory. Counters are exposed via `stats()`.
+    """
+
+    def __init__(self,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES,
+                 ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+                 path: Optional[str] = LLM_CACHE_PATH):
+        self.ttl_seconds = ttl_seconds
+        self.memory = MemoryLRU(max_bytes)
+        self.disk = SQLiteStore(path) if path else None
+        self._counter_lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "bypasses": 0}
+
+    def _count(self, name: str) -> None:
+        with self._counter_lock:
+            self._counters[name] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+        if self.disk is not None:
+            row = self.disk.get(key)
+            if row is not None:
+                self._count("disk_hits")
+                self.memory.set(key, row[0], row[1])
+                return row[0]
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self.memory.set(key, value, expires_at)
+        if self.disk is not None:
+            self.disk.set(key, value, expires_at)
+        self._count("stores")
+
+    def record_bypass(self) -> None:
+        self._count("bypasses")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            stats = dict(self._counters)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_bytes"] = self.memory.current_bytes
+        return stats
+
+
+_cache: Optional[CompletionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[CompletionCache]:
+    """Returns the process-wide cache, or None when caching is disabled."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CompletionCache()
+    return _cache
+
+
+def set_cache(cache: Optional[CompletionCache]) -> None:
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,270 @@
+# backend/app/llm_scheduler.py
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Dict, Optional
+
+# ======================================
+# Scheduler configuration (0 = unlimited)
+# ======================================
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "1") == "1"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MAX_QUEUE_DEPTH = int(os.getenv("LLM_MAX_QUEUE_DEPTH", "100"))
+# Rough completion size charged up front; corrected once the call finishes
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "600"))
+
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+    INTERACTIVE = 0  # refine
+    OUTLINE = 1      # outline generation
+    BULK = 2         # section fill for new projects / background jobs
+
+
+DEFAULT_MAX_WAIT_SECONDS = {
+    Priority.INTERACTIVE: float(os.getenv("LLM_MAX_WAIT_INTERACTIVE_SECONDS", "15")),
+    Priority.OUTLINE: float(os.getenv("LLM_MAX_WAIT_OUTLINE_SECONDS", "30")),
+    Priority.BULK: float(os.getenv("LLM_MAX_WAIT_BULK_SECONDS", "120")),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for quota accounting
+    return max(1, len(text) // 4)
+
+
+class SchedulerOverloaded(Exception):
+    """The request could not be started in time; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+# ======================================
+# Token bucket
+# ======================================
+class TokenBucket:
+    """Refills `rate_per_minute` units per minute, bursting up to one minute's worth."""
+
+    def __init__(self, rate_per_minute: float):
+        self.unlimited = rate_per_minute <= 0
+        self.rate = rate_per_minute / 60.0
+        self.capacity = rate_per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float, now: float) -> None:
+        if self.unlimited:
+            return
+        self._refill(now)
+        # May go negative when correcting an underestimate; that is repaid by refill
+        self.level -= amount
+
+
+# ======================================
+# Scheduler
+# ======================================
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens")
+
+    def __init__(self, priority: Priority, seq: int, tokens: int):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class Slot:
+    """A granted permission to call the LLM; release it exactly once."""
+
+    def __init__(self, scheduler: "LLMScheduler", tokens: int):
+        self._scheduler = scheduler
+        self.tokens = tokens
+        self.started = time.monotonic()
+        self._released = False
+
+    def release(self, completion_text: Optional[str] = None) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._scheduler._release(self, completion_text)
+
+    def __enter__(self) -> "Slot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class LLMScheduler:
+    """
+    Gate in front of the LLM backend: a global concurrency cap plus
+    request and token rate limits, served in priority order. A request
+    that would wait longer than its budget, or arrives when the queue is
+    full, is rejected immediately with SchedulerOverloaded.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+                 max_queue_depth: int = LLM_MAX_QUEUE_DEPTH,
+                 max_wait: Optional[Dict[Priority, float]] = None):
+        self.max_concurrency = max_concurrency if max_concurrency > 0 else math.inf
+        self.max_queue_depth = max_queue_depth
+        self.max_wait = {**DEFAULT_MAX_WAIT_SECONDS, **(max_wait or {})}
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._active = 0
+        # EWMA of call duration, used to predict queueing delay
+        self._avg_service_seconds = 5.0
+        self._waits = {p: deque(maxlen=1000) for p in Priority}
+        self._granted = {p: 0 for p in Priority}
+        self._rejected = {p: 0 for p in Priority}
+
+    # ---------- estimation ----------
+    def _estimate_wait(self, priority: Priority, tokens: int, now: float) -> float:
+        ahead = [w for w in self._queue if w.priority <= priority]
+        slots_needed = len(ahead) + self._active + 1 - self.max_concurrency
+        concurrency_wait = 0.0
+        if slots_needed > 0:
+            concurrency_wait = math.ceil(slots_needed / self.max_concurrency) * self._avg_service_seconds
+        bucket_wait = max(
+            self._requests.time_until(len(ahead) + 1, now),
+            self._tokens.time_until(sum(w.tokens for w in ahead) + tokens, now),
+        )
+        return max(concurrency_wait, bucket_wait)
+
+    def _reject(self, priority: Priority, message: str, retry_after: float):
+        self._rejected[priority] += 1
+        return SchedulerOverloaded(message, retry_after)
+
+    # ---------- acquire / release ----------
+    def acquire(self, priority: Priority, prompt: str, max_wait: Optional[float] = None) -> Slot:
+        tokens = estimate_tokens(prompt) + LLM_EXPECTED_COMPLETION_TOKENS
+        max_wait = self.max_wait[priority] if max_wait is None else max_wait
+        with self._cond:
+            now = time.monotonic()
+            if len(self._queue) >= self.max_queue_depth:
+                raise self._reject(priority, "LLM queue is full",
+                                   self._estimate_wait(priority, tokens, now))
+            estimate = self._estimate_wait(priority, tokens, now)
+            if estimate > max_wait:
+                raise self._reject(priority, f"LLM request cannot start within {max_wait:.0f}s", estimate)
+
+            waiter = _Waiter(priority, next(self._seq), tokens)
+            heapq.heappush(self._queue, waiter)
+            enqueued = now
+            deadline = now + max_wait
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = None
+                    if self._queue[0] is waiter and self._active < self.max_concurrency:
+                        timeout = max(self._requests.time_until(1, now),
+                                      self._tokens.time_until(tokens, now))
+                        if timeout == 0:
+                            heapq.heappop(self._queue)
+                            self._requests.consume(1, now)
+                            self._tokens.consume(tokens, now)
+                            self._active += 1
+                            self._granted[priority] += 1
+                            self._waits[priority].append(now - enqueued)
+                            self._cond.notify_all()
+                            return Slot(self, tokens)
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise self._reject(priority, "LLM request timed out waiting in queue",
+                                           self._estimate_wait(priority, tokens, now))
+                    self._cond.wait(remaining if timeout is None else min(timeout, remaining))
+            except BaseException:
+                if waiter in self._queue:
+                    self._queue.remove(waiter)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def _release(self, slot: Slot, completion_text: Optional[str]) -> None:
+        with self._cond:
+            now = time.monotonic()
+            self._active -= 1
+            self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * (now - slot.started)
+            if completion_text is not None:
+                actual = slot.tokens - LLM_EXPECTED_COMPLETION_TOKENS + estimate_tokens(completion_text)
+                self._tokens.consume(actual - slot.tokens, now)
+            self._cond.notify_all()
+
+    # ---------- metrics ----------
+    @staticmethod
+    def _percentiles(samples) -> dict:
+        if not samples:
+            return {"p50": 0.0, "p90": 0.0, "p99": 0.0}
+        ordered = sorted(samples)
+
+        def pick(q):
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+        return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99)}
+
+    def stats(self) -> dict:
+        with self._cond:
+            depth = {p.name.lower(): 0 for p in Priority}
+            for w in self._queue:
+                depth[w.priority.name.lower()] += 1
+            return {
+                "active": self._active,
+                "max_concurrency": None if self.max_concurrency == math.inf else self.max_concurrency,
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": depth,
+                "avg_service_seconds": round(self._avg_service_seconds, 3),
+                "wait_seconds": {p.name.lower(): self._percentiles(self._waits[p]) for p in Priority},
+                "granted": {p.name.lower(): self._granted[p] for p in Priority},
+                "rejected": {p.name.lower(): self._rejected[p] for p in Priority},
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Optional[LLMScheduler]:
+    """Returns the process-wide scheduler, or None when scheduling is disabled."""
+    global _scheduler
+    if not LLM_SCHEDULER_ENABLED:
+        return None
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: Optional[LLMScheduler]) -> None:
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
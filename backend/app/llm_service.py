@@ -1,8 +1,19 @@
 # backend/app/llm_service.py
 
+import hashlib
+import json
 import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from . import llm_cache, llm_scheduler, metrics
+from .llm_scheduler import Priority
+from .singleflight import SingleFlight
 
 # ======================================
 # Load .env safely at import time
@@ -11,37 +22,547 @@ env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 load_dotenv(env_path)
 
 GENAI_API_KEY = os.getenv("GENAI_API_KEY")
+MODEL_NAME = os.getenv("GENAI_MODEL_NAME", "models/gemini-2.5-pro")
+
+# "gemini" talks to the real API, "stub" is a deterministic offline backend
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+
+LLM_STUB_LATENCY_SECONDS = float(os.getenv("LLM_STUB_LATENCY_SECONDS", "0"))
+LLM_STUB_LATENCY_JITTER_SECONDS = float(os.getenv("LLM_STUB_LATENCY_JITTER_SECONDS", "0"))
+LLM_STUB_FAILURE_RATE = float(os.getenv("LLM_STUB_FAILURE_RATE", "0"))
+# Extra stub latency per 1000 characters of output, like a model's decode time
+LLM_STUB_SECONDS_PER_1K_CHARS = float(os.getenv("LLM_STUB_SECONDS_PER_1K_CHARS", "0"))
+LLM_STUB_SEED = os.getenv("LLM_STUB_SEED")
 
-if not GENAI_API_KEY:
-    raise ValueError("GENAI_API_KEY not found. Please set it in your environment variables or .env file.")
+# Coalesce identical concurrent requests into one upstream call
+LLM_SINGLEFLIGHT_ENABLED = os.getenv("LLM_SINGLEFLIGHT_ENABLED", "1") == "1"
 
 # ======================================
-# Configure Gemini
+# Errors
 # ======================================
-genai.configure(api_key=GENAI_API_KEY)
-MODEL_NAME = "models/gemini-2.5-pro"
+class LLMError(Exception):
+    """Base class for all LLM backend failures."""
+    retryable = False
+
+
+class LLMConfigurationError(LLMError):
+    """The backend is missing configuration (API key, SDK, ...)."""
+
+
+class LLMTimeoutError(LLMError):
+    """The upstream call did not finish within the per-call timeout."""
+    retryable = True
+
+
+class LLMUnavailableError(LLMError):
+    """Transient upstream failure: rate limited, overloaded or 5xx."""
+    retryable = True
+
+
+class LLMEmptyResponseError(LLMError):
+    """The model answered but returned no usable text."""
+
+
+class LLMOverloadedError(LLMError):
+    """The scheduler shed the request; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 # ======================================
-# Gemini wrapper function
+# Backends
 # ======================================
-def generate_with_gemini(prompt: str) -> str:
+class LLMBackend:
     """
-    Generates text from Gemini API using the configured model.
-    Returns the text output or an error string.
+    Interface every LLM backend implements.
+    Subclasses provide `_generate_once`; retries with jittered exponential
+    backoff on retryable errors are handled here.
     """
+    name = "base"
+
+    def __init__(self,
+                 model_name: str = MODEL_NAME,
+                 timeout: float = LLM_TIMEOUT_SECONDS,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = LLM_BACKOFF_MAX_SECONDS,
+                 generation_config: Optional[dict] = None):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _generate_once(self, prompt: str, timeout: float) -> str:
+        raise NotImplementedError
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # "Full jitter": uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _stream_once(self, prompt: str, timeout: float) -> Iterator[str]:
+        # Backends without native streaming deliver the completion as one chunk
+        yield self._generate_once(prompt, timeout)
+
+    def _should_retry(self, e: LLMError, attempt: int) -> bool:
+        if not e.retryable or attempt >= self.max_retries:
+            return False
+        delay = self._backoff_delay(attempt)
+        print(f"⚠️ {self.name} call failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        time.sleep(delay)
+        return True
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Returns the stripped completion text for `prompt`.
+        Raises an LLMError subclass once retries are exhausted.
+        """
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            try:
+                text = self._generate_once(prompt, timeout)
+            except LLMError as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                continue
+
+            if not text or not text.strip():
+                raise LLMEmptyResponseError("No meaningful response from the model.")
+            return text.strip()
+
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Yields completion chunks for `prompt` as they arrive.
+        Retries only happen before the first chunk; once text has been
+        yielded, a failure is raised to the consumer as-is.
+        """
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            chunks = self._stream_once(prompt, timeout)
+            try:
+                first = next(chunk for chunk in chunks if chunk and chunk.strip())
+            except StopIteration:
+                raise LLMEmptyResponseError("No meaningful response from the model.")
+            except LLMError as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                continue
+            break
+
+        yield first.lstrip()
+        for chunk in chunks:
+            if chunk:
+                yield chunk
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini backend; the SDK is configured and the model built once."""
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = GENAI_API_KEY, **kwargs):
+        super().__init__(**kwargs)
+        if not api_key:
+            raise LLMConfigurationError(
+                "GENAI_API_KEY not found. Please set it in your environment variables or .env file."
+            )
+        try:
+            import google.generativeai as genai
+            from google.api_core import exceptions as google_exceptions
+        except ImportError as e:
+            raise LLMConfigurationError(f"google-generativeai is not installed: {e}")
+
+        genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(
+            self.model_name, generation_config=self.generation_config or None
+        )
+        self._google_exceptions = google_exceptions
+
+    def _translate_error(self, e: Exception) -> LLMError:
+        gexc = self._google_exceptions
+        if isinstance(e, (gexc.DeadlineExceeded, TimeoutError)):
+            return LLMTimeoutError(str(e))
+        if isinstance(e, (gexc.ResourceExhausted, gexc.TooManyRequests,
+                          gexc.ServiceUnavailable, gexc.InternalServerError)):
+            return LLMUnavailableError(str(e))
+        return LLMError(str(e))
+
+    @staticmethod
+    def _extract_text(response) -> str:
+        try:
+            if getattr(response, "text", None):
+                return response.text
+        except ValueError:
+            # .text raises when the candidate has no parts (e.g. safety block)
+            pass
+        candidates = getattr(response, "candidates", None)
+        if candidates and candidates[0].content.parts:
+            return candidates[0].content.parts[0].text
+        return ""
+
+    def _generate_once(self, prompt: str, timeout: float) -> str:
+        try:
+            response = self._model.generate_content(prompt, request_options={"timeout": timeout})
+        except Exception as e:
+            raise self._translate_error(e) from e
+        return self._extract_text(response)
+
+    def _stream_once(self, prompt: str, timeout: float) -> Iterator[str]:
+        try:
+            response = self._model.generate_content(
+                prompt, stream=True, request_options={"timeout": timeout}
+            )
+            for chunk in response:
+                yield self._extract_text(chunk)
+        except Exception as e:
+            raise self._translate_error(e) from e
+
+
+# How the stub recognises a batched section prompt (the JSON shape it asks
+# for) and reads the numbered section titles it lists
+_BATCH_SHAPE = '{"sections": ['
+_NUMBERED_LINE_RE = re.compile(r"^\s*(\d+)\.\s+(.+?)\s*$", re.MULTILINE)
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline backend for tests and load testing.
+    The same prompt always yields the same text; latency and failure rate
+    are configurable so retry and concurrency behaviour can be exercised.
+    """
+    name = "stub"
+
+    def __init__(self,
+                 latency: float = LLM_STUB_LATENCY_SECONDS,
+                 latency_jitter: float = LLM_STUB_LATENCY_JITTER_SECONDS,
+                 failure_rate: float = LLM_STUB_FAILURE_RATE,
+                 seed: Optional[int] = int(LLM_STUB_SEED) if LLM_STUB_SEED else None,
+                 stream_chunk_words: int = 4,
+                 seconds_per_1k_chars: float = LLM_STUB_SECONDS_PER_1K_CHARS,
+                 **kwargs):
+        kwargs.setdefault("model_name", "stub")
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.seconds_per_1k_chars = seconds_per_1k_chars
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.stream_chunk_words = max(1, stream_chunk_words)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            jitter = self._rng.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0
+            fail = self._rng.random() < self.failure_rate
+        return self.latency + jitter, fail
+
+    @staticmethod
+    def _render_text(seed: str) -> str:
+        digest = hashlib.sha256(seed.encode("utf-8")).hexdigest()
+        lines = [
+            f"{i + 1}. Stub point {digest[i * 6:(i + 1) * 6]} covering the requested material in detail"
+            for i in range(8)
+        ]
+        return "\n".join(lines)
+
+    @staticmethod
+    def batch_titles(prompt: str) -> Optional[List[str]]:
+        """
+        The numbered items of a prompt asking for a {"sections": [...]}
+        JSON document (a batched section prompt), else None.
+        """
+        if _BATCH_SHAPE not in prompt:
+            return None
+        titles = []
+        for number, title in _NUMBERED_LINE_RE.findall(prompt):
+            if int(number) != len(titles) + 1:
+                break
+            titles.append(title)
+        return titles or None
+
+    @staticmethod
+    def render(prompt: str) -> str:
+        # Batched section prompts get the JSON document they ask for
+        titles = StubBackend.batch_titles(prompt)
+        if titles:
+            sections = [
+                {"index": i, "title": title, "content": StubBackend._render_text(f"{prompt}\n{i}. {title}")}
+                for i, title in enumerate(titles, start=1)
+            ]
+            return json.dumps({"sections": sections})
+        return StubBackend._render_text(prompt)
+
+    def _generate_once(self, prompt: str, timeout: float) -> str:
+        delay, fail = self._draw()
+        text = self.render(prompt)
+        delay += self.seconds_per_1k_chars * len(text) / 1000
+        if delay > timeout:
+            time.sleep(timeout)
+            raise LLMTimeoutError(f"stub call exceeded {timeout}s")
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise LLMUnavailableError("stub backend injected failure")
+        return text
+
+    def _stream_once(self, prompt: str, timeout: float) -> Iterator[str]:
+        # The simulated latency is spread evenly over the chunks, so the
+        # first chunk arrives after latency / n_chunks.
+        delay, fail = self._draw()
+        if fail:
+            raise LLMUnavailableError("stub backend injected failure")
+        text = self.render(prompt)
+        delay += self.seconds_per_1k_chars * len(text) / 1000
+        words = text.split(" ")
+        n = self.stream_chunk_words
+        chunks = [" ".join(words[i:i + n]) + (" " if i + n < len(words) else "")
+                  for i in range(0, len(words), n)]
+        per_chunk = delay / len(chunks)
+        elapsed = 0.0
+        for chunk in chunks:
+            elapsed += per_chunk
+            if elapsed > timeout:
+                raise LLMTimeoutError(f"stub stream exceeded {timeout}s")
+            if per_chunk:
+                time.sleep(per_chunk)
+            yield chunk
+
+
+# ======================================
+# Backend registry
+# ======================================
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _create_backend(kind: str) -> LLMBackend:
+    if kind == "gemini":
+        return GeminiBackend()
+    if kind == "stub":
+        return StubBackend()
+    raise LLMConfigurationError(f"Unknown LLM_BACKEND: {kind!r}")
+
+
+def get_backend() -> LLMBackend:
+    """Returns the process-wide backend, building it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend(LLM_BACKEND)
+    return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """Replaces the process-wide backend (None rebuilds it from env on next use)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# ======================================
+# Gemini wrapper function
+# ======================================
+_in_flight = SingleFlight()
+
+
+def _acquire_slot(priority: Priority, prompt: str, call_site: str) -> Optional[llm_scheduler.Slot]:
+    scheduler = llm_scheduler.get_scheduler()
+    if scheduler is None:
+        return None
+    started = time.perf_counter()
     try:
-        model = genai.GenerativeModel(MODEL_NAME)
-        response = model.generate_content(prompt)
-
-        # extract clean text
-        if hasattr(response, "text") and response.text:
-            return response.text.strip()
-        elif hasattr(response, "candidates") and response.candidates:
-            return response.candidates[0].content.parts[0].text.strip()
+        slot = scheduler.acquire(priority, prompt)
+    except llm_scheduler.SchedulerOverloaded as e:
+        metrics.LLM_ERRORS.inc(call_site, LLMOverloadedError.__name__)
+        raise LLMOverloadedError(str(e), e.retry_after) from e
+    metrics.LLM_QUEUE_WAIT.observe(time.perf_counter() - started, call_site)
+    return slot
+
+
+def _observe_call(call_site: str, started: float, prompt: str, text: Optional[str],
+                  outcome: Optional[str] = None) -> None:
+    outcome = outcome or ("ok" if text is not None else "error")
+    metrics.LLM_CALL_DURATION.observe(time.perf_counter() - started, call_site, outcome)
+    metrics.LLM_PROMPT_CHARS.observe(len(prompt), call_site)
+    if text is not None:
+        metrics.LLM_COMPLETION_CHARS.observe(len(text), call_site)
+
+
+def _prepare_call(prompt: str, use_cache: bool, bypass_cache: bool,
+                  cache_if: Optional[Callable[[str], bool]], priority: Priority, call_site: str):
+    """
+    Resolves a request against the cache. Returns (cached_text, flight_key,
+    call); `call` waits for a scheduler slot, performs the upstream request
+    and stores its result.
+    """
+    backend = get_backend()
+    cache = llm_cache.get_cache() if use_cache else None
+    key = _cache_key(backend, prompt)
+
+    if cache is not None:
+        if bypass_cache:
+            cache.record_bypass()
+        else:
+            cached = cache.get(key)
+            if cached is not None:
+                metrics.LLM_CACHE_HITS.inc(call_site)
+                return cached, None, None
+
+    def call() -> str:
+        slot = _acquire_slot(priority, prompt, call_site)
+        text = None
+        started = time.perf_counter()
+        try:
+            text = backend.generate(prompt)
+        except LLMError as e:
+            metrics.LLM_ERRORS.inc(call_site, type(e).__name__)
+            raise
+        finally:
+            if slot is not None:
+                slot.release(text)
+            _observe_call(call_site, started, prompt, text)
+        if cache is not None and (cache_if is None or cache_if(text)):
+            cache.set(key, text)
+        return text
+
+    # The flight key carries the cache mode so a non-caching leader never
+    # skips the store a caching caller expects.
+    return None, f"{key}:{cache is not None}", call
+
+
+def generate_with_gemini(prompt: str,
+                         use_cache: bool = False,
+                         bypass_cache: bool = False,
+                         cache_if: Optional[Callable[[str], bool]] = None,
+                         priority: Priority = Priority.OUTLINE,
+                         call_site: str = "other") -> str:
+    """
+    Generates text from the configured LLM backend.
+    Returns the stripped text output; raises LLMError on failure.
+
+    With `use_cache`, completions are served from / stored in the
+    prompt→completion cache. `bypass_cache` skips the lookup but still
+    stores the fresh result; `cache_if` can veto storing a result.
+    Identical requests already in flight share a single upstream call.
+    Upstream calls are admitted by the scheduler according to `priority`
+    and raise LLMOverloadedError when shed. `call_site` labels the call's
+    metrics (outline, section, refine, ...).
+    """
+    cached, flight_key, call = _prepare_call(prompt, use_cache, bypass_cache, cache_if, priority, call_site)
+    if cached is not None:
+        return cached
+    if not LLM_SINGLEFLIGHT_ENABLED:
+        return call()
+    return _in_flight.do(flight_key, call)
+
+
+def singleflight_stats() -> dict:
+    return _in_flight.stats()
+
+
+class _ScheduledStream:
+    """
+    Iterator over a backend stream that holds a scheduler slot until the
+    stream is exhausted, fails or is closed, and caches the full text.
+    """
+
+    def __init__(self, chunks: Iterator[str], slot, on_text: Optional[Callable[[str], None]],
+                 prompt: str = "", call_site: str = "other"):
+        self._chunks = chunks
+        self._slot = slot
+        self._on_text = on_text
+        self._parts = []
+        self._closed = False
+        self._prompt = prompt
+        self._call_site = call_site
+        self._started = time.perf_counter()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self._closed:
+            raise StopIteration
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            text = "".join(self._parts).strip()
+            self._finish(text)
+            if self._on_text is not None:
+                self._on_text(text)
+            raise
+        except BaseException as e:
+            if isinstance(e, LLMError):
+                metrics.LLM_ERRORS.inc(self._call_site, type(e).__name__)
+            self._finish(None)
+            raise
+        self._parts.append(chunk)
+        return chunk
+
+    def _finish(self, text: Optional[str], outcome: Optional[str] = None) -> None:
+        self._closed = True
+        if self._slot is not None:
+            self._slot.release(text)
+        _observe_call(self._call_site, self._started, self._prompt, text, outcome)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._finish(None, "cancelled")
+            close = getattr(self._chunks, "close", None)
+            if close is not None:
+                close()
+
+    def __del__(self):
+        # A client that disconnects before the first chunk never drives the
+        # iterator to completion; make sure the slot is not leaked.
+        self.close()
+
+
+def stream_with_gemini(prompt: str,
+                       use_cache: bool = False,
+                       bypass_cache: bool = False,
+                       cache_if: Optional[Callable[[str], bool]] = None,
+                       priority: Priority = Priority.INTERACTIVE,
+                       call_site: str = "other") -> Iterator[str]:
+    """
+    Streaming counterpart of `generate_with_gemini`: returns an iterator of
+    text chunks. A cache hit is returned as a single chunk; a fully streamed
+    completion is stored in the cache under the same rules as the blocking
+    call. The scheduler slot is acquired before returning, so an overloaded
+    request raises LLMOverloadedError here rather than mid-stream.
+    """
+    backend = get_backend()
+    cache = llm_cache.get_cache() if use_cache else None
+    key = _cache_key(backend, prompt) if cache is not None else None
+    if cache is not None:
+        if bypass_cache:
+            cache.record_bypass()
         else:
-            return "(⚠️ No meaningful response from Gemini.)"
+            cached = cache.get(key)
+            if cached is not None:
+                metrics.LLM_CACHE_HITS.inc(call_site)
+                return iter([cached])
+
+    def store(text: str) -> None:
+        if cache is not None and (cache_if is None or cache_if(text)):
+            cache.set(key, text)
+
+    slot = _acquire_slot(priority, prompt, call_site)
+    return _ScheduledStream(backend.stream(prompt), slot, store, prompt, call_site)
+
 
-    except Exception as e:
-        print(f"❌ Gemini generation error: {e}")
-        return f"(Error generating response: {e})"
+def _cache_key(backend: LLMBackend, prompt: str) -> str:
+    return llm_cache.make_key(f"{backend.name}:{backend.model_name}", prompt, backend.generation_config)
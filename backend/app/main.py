@@ -1,12 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from . import models, database
-from .routers import auth, projects, generate, comments, export,  refine_feedback
+from . import llm_service, jobs, bulk_export, migrations, passwords, metrics, profiling, compression, database
+from .routers import auth, projects, generate, comments, export,  refine_feedback, search, jobs as jobs_router
+from .routers import metrics as metrics_router, profiling as profiling_router
 import os
-# Create DB tables
-models.Base.metadata.create_all(bind=database.engine)
 
-app = FastAPI(title="AI Document Platform Backend")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing the app only builds it; everything that touches the
+    # environment (database, threads, logging) starts here
+    print(f"✅ LLM backend: {llm_service.LLM_BACKEND} "
+          f"(GENAI_API_KEY {'loaded' if llm_service.GENAI_API_KEY else 'not set'})")
+    metrics.instrument_engine(database.engine)
+    # Bring the schema up to date before anything touches the database
+    migrations.migrate()
+    # Pick up generation jobs interrupted by a previous shutdown
+    jobs.resume_pending_jobs()
+    yield
+    jobs.shutdown()
+    bulk_export.shutdown()
+    passwords.shutdown()
+    profiling.shutdown()
+
+
+app = FastAPI(title="AI Document Platform Backend", lifespan=lifespan)
 
 # CORS for frontend
 origins = [
@@ -21,6 +41,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Innermost of ours, so metrics and profiles include compression time
+app.add_middleware(compression.CompressionMiddleware)
+# Inside metrics, so request latency includes any profiling cost
+app.add_middleware(profiling.ProfilingMiddleware)
+# Outermost, so latency includes the other middleware
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Routers
 app.include_router(auth.router)
@@ -29,7 +55,10 @@ app.include_router(generate.router)
 app.include_router(comments.router)
 app.include_router(export.router)
 app.include_router(refine_feedback.router)
-print(f"✅ GENAI_API_KEY loaded: {os.getenv('GENAI_API_KEY')[:10]}********")
+app.include_router(jobs_router.router)
+app.include_router(search.router)
+app.include_router(metrics_router.router)
+app.include_router(profiling_router.router)
 
 
 @app.get("/")
@@ -0,0 +1,315 @@
+# backend/app/metrics.py
+
+"""
+In-process metrics in the Prometheus text exposition format, served by
+GET /metrics.
+
+Histograms and counters are plain dicts of label values → numbers behind
+one lock per metric, so recording an observation costs about a
+microsecond. Series are per process: with several server workers each one
+reports its own, and bulk-export worker processes report back through the
+parent.
+
+Instrumented here:
+  * HTTP request latency per route template (MetricsMiddleware)
+  * DB queries and query time per request, and per query
+    (instrument_engine)
+Instrumented by their modules:
+  * LLM calls per call site: queue wait, latency, prompt / completion
+    size, errors and cache hits (llm_service)
+  * Export render time and output size (doc_generator, bulk_export)
+"""
+
+import contextvars
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# Cursor-level hooks: SQLAlchemy's event dispatch adds ~15 µs per query
+METRICS_DB_ENABLED = os.getenv("METRICS_DB_ENABLED", "1") == "1"
+
+# Seconds; spans a cached API response through a long LLM call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DB_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+CHARS_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+BYTES_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6)
+
+
+# ======================================
+# Metric types
+# ======================================
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic total per label combination: `inc(*labelvalues, amount=1)`."""
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0]
+            series[0] += amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, series[0]) for labels, series in self._series.items()]
+        lines = self._header()
+        for labels, value in sorted(items):
+            lines.append(f"{self.name}_total{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Bucketed distribution per label combination: `observe(value, *labelvalues)`.
+    Buckets are stored non-cumulative and summed when rendered.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # One count per bucket, one for +Inf, then the sum
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        lines = self._header()
+        names = self.labelnames + ("le",)
+        for labels, series in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+# ======================================
+# Registry
+# ======================================
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is fully sent",
+    ("method", "route", "status"),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Database queries executed while serving one request",
+    ("route",), COUNT_BUCKETS,
+)
+DB_QUERY_SECONDS_PER_REQUEST = Histogram(
+    "db_query_seconds_per_request", "Time spent in database queries while serving one request",
+    ("route",), DB_QUERY_BUCKETS + (2.5, 5.0),
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Latency of single database queries, in and outside requests",
+    (), DB_QUERY_BUCKETS,
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds", "Time an LLM call waited for a scheduler slot", ("call_site",),
+)
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds", "Upstream LLM call latency including retries (whole stream for streams)",
+    ("call_site", "outcome"),
+)
+LLM_PROMPT_CHARS = Histogram(
+    "llm_prompt_chars", "Prompt size of upstream LLM calls in characters", ("call_site",), CHARS_BUCKETS,
+)
+LLM_COMPLETION_CHARS = Histogram(
+    "llm_completion_chars", "Completion size of successful upstream LLM calls in characters",
+    ("call_site",), CHARS_BUCKETS,
+)
+LLM_ERRORS = Counter("llm_errors", "Failed LLM calls by error type", ("call_site", "error"))
+LLM_CACHE_HITS = Counter("llm_cache_hits", "LLM requests answered from the completion cache", ("call_site",))
+EXPORT_RENDER_DURATION = Histogram(
+    "export_render_duration_seconds", "Time to render an exported file (streamed: until the last chunk)",
+    ("format", "mode"),
+)
+EXPORT_OUTPUT_BYTES = Histogram(
+    "export_output_bytes", "Size of rendered export files", ("format", "mode"), BYTES_BUCKETS,
+)
+
+REGISTRY: List[_Metric] = [
+    HTTP_REQUEST_DURATION, DB_QUERIES_PER_REQUEST, DB_QUERY_SECONDS_PER_REQUEST, DB_QUERY_DURATION,
+    LLM_QUEUE_WAIT, LLM_CALL_DURATION, LLM_PROMPT_CHARS, LLM_COMPLETION_CHARS, LLM_ERRORS, LLM_CACHE_HITS,
+    EXPORT_RENDER_DURATION, EXPORT_OUTPUT_BYTES,
+]
+
+_stats_sources: List[Tuple[str, Callable[[], Optional[dict]]]] = []
+
+
+def register_stats(prefix: str, source: Callable[[], Optional[dict]]) -> None:
+    """
+    Exposes an existing `stats()` dict as gauges named `<prefix>_<key>`,
+    read at scrape time. Dicts of numbers become one gauge with a `key`
+    label; other values are skipped. `source` may return None.
+    """
+    _stats_sources.append((prefix, source))
+
+
+def _render_stats(prefix: str, stats: dict) -> List[str]:
+    lines = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, bool) or value is None:
+            continue
+        if isinstance(value, (int, float)):
+            lines += [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        elif isinstance(value, dict):
+            numbers = [(k, v) for k, v in value.items() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            if numbers:
+                lines.append(f"# TYPE {name} gauge")
+                lines += [f"{name}{_format_labels(('key',), (k,))} {_format_value(v)}" for k, v in numbers]
+    return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    for prefix, source in _stats_sources:
+        stats = source()
+        if stats:
+            lines += _render_stats(prefix, stats)
+    return "\n".join(lines) + "\n"
+
+
+# ======================================
+# Database instrumentation
+# ======================================
+class _QueryUsage:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set per request by MetricsMiddleware; threadpool endpoints and
+# dependencies run in a copy of the request's context, so they add to the
+# same object
+_request_usage: contextvars.ContextVar[Optional[_QueryUsage]] = contextvars.ContextVar(
+    "request_query_usage", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    DB_QUERY_DURATION.observe(elapsed)
+    usage = _request_usage.get()
+    if usage is not None:
+        usage.queries += 1
+        usage.seconds += elapsed
+
+
+def instrument_engine(engine: Engine) -> None:
+    if not (METRICS_ENABLED and METRICS_DB_ENABLED):
+        return
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ======================================
+# HTTP middleware
+# ======================================
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency and DB usage per route. The
+    route label is the matched path template ("/projects/{project_id}"),
+    so the number of series does not grow with ids in URLs.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        usage = _QueryUsage()
+        token = _request_usage.set(usage)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_usage.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(elapsed, scope["method"], route, str(status))
+            DB_QUERIES_PER_REQUEST.observe(usage.queries, route)
+            DB_QUERY_SECONDS_PER_REQUEST.observe(usage.seconds, route)
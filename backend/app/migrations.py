@@ -0,0 +1,267 @@
+# backend/app/migrations.py
+
+"""
+Versioned schema migrations.
+
+Each migration runs once, in order, and is recorded in the
+`schema_migrations` table. Migrations are written to be idempotent
+(CREATE ... IF NOT EXISTS, frozen table definitions created with
+checkfirst) so a database created by the old import-time `create_all`,
+or two processes starting at the same time, end up in the same state.
+
+Run from backend/ with `python -m app.migrations` (also runs on startup).
+"""
+
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Index, Integer, LargeBinary, MetaData, String, Table, Text, inspect, text,
+)
+from sqlalchemy.engine import Connection, Engine
+
+from . import database
+
+
+# ======================================
+# Frozen schemas
+# ======================================
+# The tables as each migration created them. Migrations must not use the
+# live models' metadata: a fresh database would get today's columns and
+# indexes at version 1, and later migrations adding them would collide.
+_baseline = MetaData()
+
+Table(
+    "users", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("full_name", String, nullable=True),
+    Column("created_at", DateTime),
+)
+Table(
+    "projects", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False),
+    Column("project_type", String, nullable=False),
+    Column("description", Text, nullable=True),
+    Column("created_at", DateTime),
+    Column("owner_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+)
+Table(
+    "document_sections", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE")),
+    Column("order_index", Integer),
+    Column("title", String, nullable=False),
+    Column("content", Text, nullable=True),
+    Column("is_liked", Boolean, nullable=True),
+    Column("comment", String, nullable=True),
+    Column("last_refined_at", DateTime),
+)
+Table(
+    "feedback", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("section_id", Integer, ForeignKey("document_sections.id", ondelete="CASCADE")),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("is_liked", Boolean),
+    Column("comment", Text, nullable=True),
+)
+Table(
+    "generation_jobs", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), index=True),
+    Column("owner_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("status", String, nullable=False),
+    Column("bypass_cache", Boolean),
+    Column("total", Integer),
+    Column("completed", Integer),
+    Column("failed", Integer),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+Table(
+    "generation_job_items", _baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("job_id", Integer, ForeignKey("generation_jobs.id", ondelete="CASCADE"), index=True),
+    Column("section_id", Integer, ForeignKey("document_sections.id", ondelete="CASCADE")),
+    Column("status", String, nullable=False),
+    Column("error", Text, nullable=True),
+)
+
+_section_revisions = MetaData()
+# Stand-ins so the foreign keys resolve; only section_revisions is created
+Table("users", _section_revisions, Column("id", Integer, primary_key=True))
+Table("document_sections", _section_revisions, Column("id", Integer, primary_key=True))
+Table(
+    "section_revisions", _section_revisions,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("section_id", Integer, ForeignKey("document_sections.id", ondelete="CASCADE"), nullable=False),
+    Column("revision", Integer, nullable=False),
+    Column("is_snapshot", Boolean, nullable=False),
+    Column("data", LargeBinary, nullable=False),
+    Column("content_length", Integer, nullable=False),
+    Column("source", String, nullable=False),
+    Column("author_id", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+    Column("created_at", DateTime),
+    Index("uq_section_revisions_section_revision", "section_id", "revision", unique=True),
+)
+
+
+# ======================================
+# Migrations
+# ======================================
+def _0001_baseline(conn: Connection) -> None:
+    # The tables the application created with create_all before migrations
+    _baseline.create_all(conn, checkfirst=True)
+
+
+def _0002_hot_path_indexes(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_document_sections_project_order "
+        "ON document_sections (project_id, order_index)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_projects_owner_created "
+        "ON projects (owner_id, created_at)"
+    ))
+    # Keep the most recent entry where a user has several for one section
+    conn.execute(text(
+        "DELETE FROM feedback WHERE id NOT IN "
+        "(SELECT max_id FROM (SELECT MAX(id) AS max_id FROM feedback GROUP BY section_id, user_id) AS latest)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_feedback_section_user "
+        "ON feedback (section_id, user_id)"
+    ))
+
+
+def _0003_section_revisions(conn: Connection) -> None:
+    _section_revisions.tables["section_revisions"].create(conn, checkfirst=True)
+
+
+# Full-text search. On SQLite an FTS5 table mirrors each section with its
+# project's title and owner, kept in sync by triggers so every write path
+# (creation, refine, restore, background jobs, deletes) updates it
+# incrementally. `owner` holds a "u<id>" token so a user's query is an
+# index intersection rather than a post-filter.
+_SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    " owner, project_title, section_title, content, project_id UNINDEXED,"
+    " tokenize = 'porter unicode61 remove_diacritics 2')",
+    # ORDER BY rank: BM25 with title matches weighted above body matches
+    "INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(0.0, 5.0, 2.0, 1.0)')",
+    "CREATE TRIGGER IF NOT EXISTS search_section_insert AFTER INSERT ON document_sections BEGIN"
+    " INSERT INTO search_index (rowid, owner, project_title, section_title, content, project_id)"
+    " SELECT new.id, 'u' || p.owner_id, p.title, new.title, coalesce(new.content, ''), p.id"
+    " FROM projects p WHERE p.id = new.project_id;"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS search_section_update"
+    " AFTER UPDATE OF title, content, project_id ON document_sections BEGIN"
+    " DELETE FROM search_index WHERE rowid = old.id;"
+    " INSERT INTO search_index (rowid, owner, project_title, section_title, content, project_id)"
+    " SELECT new.id, 'u' || p.owner_id, p.title, new.title, coalesce(new.content, ''), p.id"
+    " FROM projects p WHERE p.id = new.project_id;"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS search_section_delete AFTER DELETE ON document_sections BEGIN"
+    " DELETE FROM search_index WHERE rowid = old.id;"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS search_project_update AFTER UPDATE OF title, owner_id ON projects BEGIN"
+    " UPDATE search_index SET project_title = new.title, owner = 'u' || new.owner_id"
+    " WHERE rowid IN (SELECT id FROM document_sections WHERE project_id = new.id);"
+    " END",
+    # Backfill existing sections
+    "DELETE FROM search_index",
+    "INSERT INTO search_index (rowid, owner, project_title, section_title, content, project_id)"
+    " SELECT s.id, 'u' || p.owner_id, p.title, s.title, coalesce(s.content, ''), p.id"
+    " FROM document_sections s JOIN projects p ON p.id = s.project_id",
+]
+
+# On Postgres, expression GIN indexes over the same tsvectors the search
+# queries use; Postgres maintains them on every write.
+_POSTGRES_SEARCH_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_document_sections_search ON document_sections USING GIN ("
+    "(setweight(to_tsvector('english', coalesce(title, '')), 'B')"
+    " || setweight(to_tsvector('english', coalesce(content, '')), 'C')))",
+    "CREATE INDEX IF NOT EXISTS ix_projects_search ON projects USING GIN ("
+    "(setweight(to_tsvector('english', coalesce(title, '')), 'A')))",
+]
+
+
+def _0004_search_index(conn: Connection) -> None:
+    ddl = _SQLITE_SEARCH_DDL if conn.dialect.name == "sqlite" else _POSTGRES_SEARCH_DDL
+    for statement in ddl:
+        conn.execute(text(statement))
+
+
+def _0005_section_content_version(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("document_sections")}
+    if "content_version" not in columns:
+        conn.execute(text(
+            "ALTER TABLE document_sections ADD COLUMN content_version INTEGER NOT NULL DEFAULT 1"
+        ))
+
+
+def _0006_generation_job_lease(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("generation_jobs")}
+    if "lease_owner" not in columns:
+        conn.execute(text("ALTER TABLE generation_jobs ADD COLUMN lease_owner VARCHAR"))
+    if "lease_expires_at" not in columns:
+        conn.execute(text("ALTER TABLE generation_jobs ADD COLUMN lease_expires_at TIMESTAMP"))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline schema", _0001_baseline),
+    (2, "hot-path indexes and unique feedback per user/section", _0002_hot_path_indexes),
+    (3, "section revision history", _0003_section_revisions),
+    (4, "full-text search index", _0004_search_index),
+    (5, "section content version for optimistic concurrency", _0005_section_content_version),
+    (6, "generation job lease", _0006_generation_job_lease),
+]
+
+
+# ======================================
+# Runner
+# ======================================
+def _applied_versions(conn: Connection) -> set:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " description VARCHAR NOT NULL,"
+        " applied_at TIMESTAMP NOT NULL)"
+    ))
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def current_version(engine: Engine = None) -> int:
+    with (engine or database.engine).begin() as conn:
+        return max(_applied_versions(conn), default=0)
+
+
+def migrate(engine: Engine = None) -> int:
+    """Applies pending migrations; returns how many were applied."""
+    engine = engine or database.engine
+    with engine.begin() as conn:
+        applied = _applied_versions(conn)
+
+    count = 0
+    for version, description, upgrade in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            upgrade(conn)
+            # Another process may have applied it concurrently
+            if conn.execute(text("SELECT 1 FROM schema_migrations WHERE version = :v"), {"v": version}).first():
+                continue
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()},
+            )
+        count += 1
+        print(f"🗄️ Applied migration {version:04d}: {description}")
+    return count
+
+
+if __name__ == "__main__":
+    applied = migrate()
+    print(f"✅ Schema at version {current_version()} ({applied} migration(s) applied)")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -24,6 +24,10 @@ class User(Base):
 # =======================
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Dashboard listing: owner's projects, newest first
+        Index("ix_projects_owner_created", "owner_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -41,6 +45,10 @@ class Project(Base):
 # =======================
 class DocumentSection(Base):
     __tablename__ = "document_sections"
+    __table_args__ = (
+        # A project's sections in document order
+        Index("ix_document_sections_project_order", "project_id", "order_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"))
@@ -53,10 +61,17 @@ class DocumentSection(Base):
     comment = Column(String, nullable=True)          # user comment
     last_refined_at = Column(DateTime, default=datetime.utcnow)
 
+    # Bumped on every content change. Updates only apply while the row
+    # still has the version they were loaded with (optimistic concurrency);
+    # otherwise the flush raises StaleDataError.
+    content_version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": content_version, "version_id_generator": False}
+
     project = relationship("Project", back_populates="sections")
 
     # ✅ Link feedback entries (new)
     feedback_entries = relationship("Feedback", back_populates="section", cascade="all, delete-orphan")
+    revisions = relationship("SectionRevision", back_populates="section", cascade="all, delete-orphan")
 
 
 # =======================
@@ -64,6 +79,10 @@ class DocumentSection(Base):
 # =======================
 class Feedback(Base):
     __tablename__ = "feedback"
+    __table_args__ = (
+        # One feedback entry per user and section
+        Index("uq_feedback_section_user", "section_id", "user_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     section_id = Column(Integer, ForeignKey("document_sections.id", ondelete="CASCADE"))
@@ -74,3 +93,62 @@ class Feedback(Base):
     # Relationships
     section = relationship("DocumentSection", back_populates="feedback_entries")
     user = relationship("User")
+
+
+# =======================
+# 🕘 Section Revision History
+# =======================
+class SectionRevision(Base):
+    __tablename__ = "section_revisions"
+    __table_args__ = (
+        Index("uq_section_revisions_section_revision", "section_id", "revision", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    section_id = Column(Integer, ForeignKey("document_sections.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(Integer, nullable=False)           # 1, 2, 3 ... per section
+    is_snapshot = Column(Boolean, nullable=False)        # full text, or a delta against revision - 1
+    data = Column(LargeBinary, nullable=False)           # zlib-compressed text or delta
+    content_length = Column(Integer, nullable=False)
+    source = Column(String, nullable=False)              # initial | refine | restore | external
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    section = relationship("DocumentSection", back_populates="revisions")
+
+
+# =======================
+# ⏳ Background Generation Jobs
+# =======================
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), index=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    status = Column(String, nullable=False, default="queued")  # queued | running | completed | failed
+    bypass_cache = Column(Boolean, default=False)
+    total = Column(Integer, default=0)
+    completed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # The worker process running the job, until when (renewed while it runs)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    project = relationship("Project")
+    items = relationship("GenerationJobItem", back_populates="job", cascade="all, delete-orphan")
+
+
+class GenerationJobItem(Base):
+    __tablename__ = "generation_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("generation_jobs.id", ondelete="CASCADE"), index=True)
+    section_id = Column(Integer, ForeignKey("document_sections.id", ondelete="CASCADE"))
+    status = Column(String, nullable=False, default="pending")  # pending | running | done | skipped | failed
+    error = Column(Text, nullable=True)
+
+    job = relationship("GenerationJob", back_populates="items")
+    section = relationship("DocumentSection")
@@ -0,0 +1,267 @@
+# backend/app/near_duplicates.py
+
+"""
+Near-duplicate reuse of generated outlines and sections.
+
+The exact prompt→completion cache misses topics that differ only in
+wording ("AI in Healthcare", "Healthcare AI", "AI in healthcare industry").
+This index keeps a MinHash signature of each generated topic's shingles
+(words and their character trigrams, stop words dropped, so word order and
+case do not matter). Signatures are split into LSH bands; a lookup only
+compares against entries sharing at least one band bucket, so it is
+sub-linear in the number of stored entries.
+
+Candidates are confirmed with the exact Jaccard similarity of their
+shingle sets, plus two token rules that Jaccard alone gets wrong:
+
+  * tokens with a digit (years, quarters, versions) are kept whole and
+    must match exactly: "Q3 sales report" is never a near-duplicate of
+    "Q4 sales report"
+  * every word of one topic must appear in the other, exactly or as a
+    close variant sharing most of its trigrams ("regulation" in
+    "regulations"). A topic extended by a word still matches ("AI in
+    healthcare industry"), so the Jaccard threshold can be low, while a
+    substituted word never does ("India" / "Indonesia", "small" /
+    "large").
+
+Entries live in process memory, bounded by NEAR_DUPLICATE_MAX_ENTRIES with
+the oldest evicted first. Lookups only see entries added under the same
+scope string; callers put the owning user in it, so a match (and its
+matched topic) is always the caller's own.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, FrozenSet, List, NamedTuple, Optional
+
+# ======================================
+# Configuration
+# ======================================
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "1") == "1"
+# Minimum Jaccard similarity of the topics' shingle sets for reuse; one
+# added word to a two-word topic scores about 0.59
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.55"))
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "50000"))
+
+# 32 bands of 4 rows: pairs at similarity 0.7 share a bucket 99.98% of
+# the time, at 0.55 95%, at 0.2 only 5%
+NUM_PERMUTATIONS = 128
+BANDS = 32
+ROWS = NUM_PERMUTATIONS // BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_STOP_WORDS = frozenset(
+    "a an and are as at by for from in into is of on or the to with about".split()
+)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_DIGIT_RE = re.compile(r"\d")
+# Share of a word's trigrams the other topic must contain for a variant
+_VARIANT_TRIGRAMS = 2 / 3
+
+
+def _permutations():
+    # Fixed seeds: signatures must be comparable across processes and restarts
+    params = []
+    for i in range(NUM_PERMUTATIONS):
+        digest = hashlib.sha256(f"minhash-{i}".encode()).digest()
+        a = int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:16], "big") % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMUTATIONS = _permutations()
+
+
+# ======================================
+# Shingling and signatures
+# ======================================
+def words(text: str) -> FrozenSet[str]:
+    return frozenset(w for w in _WORD_RE.findall(text.lower()) if w not in _STOP_WORDS)
+
+
+def _trigrams(word: str) -> List[str]:
+    # Trigrams of "2023" or "q3" would make other years and quarters similar
+    if len(word) > 3 and not _DIGIT_RE.search(word):
+        return [word[i:i + 3] for i in range(len(word) - 2)]
+    return []
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    result = set(words(text))
+    for word in list(result):
+        result.update(_trigrams(word))
+    return frozenset(result)
+
+
+def covers(items: FrozenSet[str], topic_words: FrozenSet[str]) -> bool:
+    """Whether every one of `topic_words` is in the shingles `items`, exactly or as a close variant."""
+    for word in topic_words:
+        if word in items:
+            continue
+        trigrams = _trigrams(word)
+        if not trigrams or sum(t in items for t in trigrams) < _VARIANT_TRIGRAMS * len(trigrams):
+            return False
+    return True
+
+
+def numbers(items: FrozenSet[str]) -> FrozenSet[str]:
+    """The shingles with a digit; two topics only match when these are equal."""
+    return frozenset(item for item in items if _DIGIT_RE.search(item))
+
+
+def normalize(text: str) -> str:
+    """Lowercased words, for exact parts of a scope such as a section title."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(items: FrozenSet[str]) -> List[int]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=4).digest(), "big")
+        for item in items
+    ]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERMUTATIONS
+    # One row of permuted values per shingle, then the minimum of each column
+    rows = [[((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for a, b in _PERMUTATIONS] for h in hashes]
+    return list(map(min, zip(*rows)))
+
+
+def _band_keys(scope: str, signature: List[int]) -> List[tuple]:
+    return [
+        (scope, band, tuple(signature[band * ROWS:(band + 1) * ROWS]))
+        for band in range(BANDS)
+    ]
+
+
+# ======================================
+# Index
+# ======================================
+class Match(NamedTuple):
+    value: Any
+    similarity: float
+    matched_text: str
+
+    def describe(self) -> dict:
+        """What the client sees: regenerate with bypass_cache to get a fresh result."""
+        return {"similarity": round(self.similarity, 3), "matched_topic": self.matched_text}
+
+
+class _Entry(NamedTuple):
+    scope: str
+    text: str
+    words: FrozenSet[str]
+    shingles: FrozenSet[str]
+    numbers: FrozenSet[str]
+    bands: List[tuple]
+    value: Any
+
+
+class NearDuplicateIndex:
+    """Thread-safe LSH index of (scope, text) → value, bounded by entry count."""
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 max_entries: int = NEAR_DUPLICATE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._buckets = defaultdict(set)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "candidates": 0}
+
+    def add(self, scope: str, text: str, value: Any) -> None:
+        items = shingles(text)
+        if not items or self.max_entries <= 0:
+            return
+        key = (scope, " ".join(sorted(items)))
+        entry = _Entry(scope, text, words(text), items, numbers(items), _band_keys(scope, minhash(items)), value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for band_key in entry.bands:
+                self._buckets[band_key].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._counters["stores"] += 1
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        for band_key in entry.bands:
+            bucket = self._buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band_key]
+
+    def query(self, scope: str, text: str, threshold: Optional[float] = None) -> Optional[Match]:
+        """Most similar stored entry at or above the threshold, if any."""
+        items = shingles(text)
+        threshold = self.threshold if threshold is None else threshold
+        best = None
+        if items:
+            required = numbers(items)
+            query_words = words(text)
+            band_keys = _band_keys(scope, minhash(items))
+            with self._lock:
+                candidates = set()
+                for band_key in band_keys:
+                    candidates.update(self._buckets.get(band_key, ()))
+                self._counters["candidates"] += len(candidates)
+                for key in candidates:
+                    entry = self._entries[key]
+                    if entry.numbers != required:
+                        continue
+                    # The shorter topic's words must all be in the longer one
+                    if not (covers(entry.shingles, query_words) or covers(items, entry.words)):
+                        continue
+                    similarity = jaccard(items, entry.shingles)
+                    if similarity >= threshold and (best is None or similarity > best.similarity):
+                        best = Match(entry.value, similarity, entry.text)
+        with self._lock:
+            self._counters["hits" if best else "misses"] += 1
+        return best
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["candidates_per_lookup"] = stats.pop("candidates") / lookups if lookups else 0.0
+        stats["threshold"] = self.threshold
+        return stats
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[NearDuplicateIndex]:
+    """Returns the process-wide index, or None when near-duplicate reuse is disabled."""
+    global _index
+    if not NEAR_DUPLICATE_ENABLED:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDuplicateIndex()
+    return _index
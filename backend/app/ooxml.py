@@ -0,0 +1,280 @@
+# backend/app/ooxml.py
+
+"""
+Fragment-level OOXML rendering for DOCX / PPTX export.
+
+Each section renders to a self-contained XML fragment (the body paragraphs
+of a DOCX, or one slide of a PPTX) that matches what python-docx /
+python-pptx would produce for the same content. Packages are assembled
+from these fragments plus the static parts of the libraries' default
+templates, so unchanged sections can be reused without re-rendering, and
+are written to a non-seekable sink so they can be streamed as produced.
+"""
+
+import re
+import zipfile
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Characters that are not allowed in XML 1.0 documents
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _escape(text: str) -> str:
+    text = _INVALID_XML_CHARS.sub("", text)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+# ======================================
+# DOCX fragments
+# ======================================
+def _docx_text(text: str) -> str:
+    # Same run content python-docx emits: tabs and line breaks become
+    # <w:tab/> / <w:br/>, everything else goes into <w:t> elements.
+    out = []
+    for piece in re.split(r"(\t|\r\n|\n|\r)", text):
+        if piece == "\t":
+            out.append("<w:tab/>")
+        elif piece in ("\n", "\r", "\r\n"):
+            out.append("<w:br/>")
+        elif piece:
+            space = ' xml:space="preserve"' if piece != piece.strip() else ""
+            out.append(f"<w:t{space}>{_escape(piece)}</w:t>")
+    return "".join(out)
+
+
+def docx_paragraph(text: str, style_id: str = None) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ""
+    run = f"<w:r>{_docx_text(text)}</w:r>" if text else ""
+    return f"<w:p>{ppr}{run}</w:p>"
+
+
+def render_docx_title(title: str) -> str:
+    return docx_paragraph(title, "Heading1")
+
+
+def render_docx_section(title: str, content: str) -> str:
+    parts = [docx_paragraph(title, "Heading2")]
+    for block in (content or "").split("\n\n"):
+        block = block.strip()
+        if block:
+            parts.append(docx_paragraph(block))
+    return "".join(parts)
+
+
+# ======================================
+# PPTX fragments
+# ======================================
+_SLIDE_HEAD = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    "<p:grpSpPr/>"
+)
+_SLIDE_TAIL = "</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>"
+
+
+def _pptx_paragraph(text: str) -> str:
+    if not text:
+        return "<a:p/>"
+    runs = "<a:br/>".join(
+        f"<a:r><a:t>{_escape(line)}</a:t></a:r>" for line in re.split(r"\r\n|\n|\r|\v", text)
+    )
+    return f"<a:p>{runs}</a:p>"
+
+
+def _pptx_shape(shape_id: int, name: str, ph: str, paragraphs: List[str]) -> str:
+    body = "".join(_pptx_paragraph(p) for p in paragraphs) or "<a:p/>"
+    return (
+        f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+        '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+        f"<p:nvPr>{ph}</p:nvPr></p:nvSpPr><p:spPr/>"
+        f"<p:txBody><a:bodyPr/><a:lstStyle/>{body}</p:txBody></p:sp>"
+    )
+
+
+def render_pptx_title_slide(title: str) -> str:
+    return (
+        _SLIDE_HEAD
+        + _pptx_shape(2, "Title 1", '<p:ph type="ctrTitle"/>', [title])
+        + _pptx_shape(3, "Subtitle 2", '<p:ph type="subTitle" idx="1"/>', [])
+        + _SLIDE_TAIL
+    )
+
+
+def render_pptx_section_slide(title: str, content: str) -> str:
+    lines = [l.strip() for l in (content or "").strip().splitlines() if l.strip()]
+    return (
+        _SLIDE_HEAD
+        + _pptx_shape(2, "Title 1", '<p:ph type="title"/>', [title])
+        + _pptx_shape(3, "Content Placeholder 2", '<p:ph idx="1"/>', lines)
+        + _SLIDE_TAIL
+    )
+
+
+# ======================================
+# Package templates
+# ======================================
+def _package_parts(buf: BytesIO) -> Dict[str, bytes]:
+    with zipfile.ZipFile(buf) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+@lru_cache(maxsize=1)
+def _docx_template() -> Tuple[Dict[str, bytes], str, str]:
+    """Static parts of python-docx's default template, plus document.xml split around the body."""
+    from docx import Document
+
+    buf = BytesIO()
+    Document().save(buf)
+    parts = _package_parts(buf)
+    document_xml = parts.pop("word/document.xml").decode("utf-8")
+    split = document_xml.index("<w:body>") + len("<w:body>")
+    return parts, document_xml[:split], document_xml[split:]
+
+
+@lru_cache(maxsize=1)
+def _pptx_template() -> Dict[str, bytes]:
+    """Parts of python-pptx's default template (a presentation with no slides)."""
+    from pptx import Presentation
+
+    buf = BytesIO()
+    Presentation().save(buf)
+    return _package_parts(buf)
+
+
+# ======================================
+# Package writers
+# ======================================
+_DEFLATE = zipfile.ZIP_DEFLATED
+_SLIDE_CT = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+_SLIDE_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+_LAYOUT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout"
+
+
+class ChunkSink:
+    """Write-only file object that holds zip output until it is drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_docx(title_fragment: str, section_fragments: Iterable[str]) -> Iterator[bytes]:
+    """
+    Yields a DOCX package as it is written. document.xml is compressed one
+    fragment at a time, so only the fragment in hand is held in memory.
+    """
+    parts, head, tail = _docx_template()
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, "w", _DEFLATE) as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+        yield sink.drain()
+        with zf.open("word/document.xml", "w") as doc:
+            doc.write(head.encode("utf-8"))
+            doc.write(title_fragment.encode("utf-8"))
+            for fragment in section_fragments:
+                doc.write(fragment.encode("utf-8"))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+            doc.write(tail.encode("utf-8"))
+    yield sink.drain()
+
+
+def write_docx(out, title_fragment: str, section_fragments: Iterable[str]) -> None:
+    """Writes a DOCX package to the binary file object `out`."""
+    for chunk in iter_docx(title_fragment, section_fragments):
+        out.write(chunk)
+
+
+def _slide_rels(layout: int) -> str:
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{_LAYOUT_REL}" Target="../slideLayouts/slideLayout{layout}.xml"/>'
+        "</Relationships>"
+    )
+
+
+def iter_pptx(title_slide: str, section_slides: Iterable[str]) -> Iterator[bytes]:
+    """
+    Yields a PPTX package as it is written. Slides are emitted as they are
+    produced; the parts that list them (presentation, relationships,
+    content types) are written last.
+    """
+    parts = _pptx_template()
+    manifest = ("[Content_Types].xml", "ppt/presentation.xml",
+                "ppt/_rels/presentation.xml.rels", "docProps/app.xml")
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, "w", _DEFLATE) as zf:
+        for name, data in parts.items():
+            if name not in manifest:
+                zf.writestr(name, data)
+        yield sink.drain()
+
+        count = 0
+        for layout, slide in _numbered_slides(title_slide, section_slides):
+            count += 1
+            zf.writestr(f"ppt/slides/slide{count}.xml", slide)
+            zf.writestr(f"ppt/slides/_rels/slide{count}.xml.rels", _slide_rels(layout))
+            yield sink.drain()
+
+        # Relationship ids continue after the template's own (rId1..rIdN)
+        rels = parts["ppt/_rels/presentation.xml.rels"].decode("utf-8")
+        first_rid = len(re.findall(r"<Relationship ", rels)) + 1
+        rids = [f"rId{first_rid + i}" for i in range(count)]
+
+        slide_rels = "".join(
+            f'<Relationship Id="{rid}" Type="{_SLIDE_REL}" Target="slides/slide{i + 1}.xml"/>'
+            for i, rid in enumerate(rids)
+        )
+        zf.writestr("ppt/_rels/presentation.xml.rels",
+                    rels.replace("</Relationships>", slide_rels + "</Relationships>"))
+
+        sld_ids = "".join(f'<p:sldId id="{256 + i}" r:id="{rid}"/>' for i, rid in enumerate(rids))
+        presentation = parts["ppt/presentation.xml"].decode("utf-8")
+        if count:
+            presentation = presentation.replace(
+                "</p:sldMasterIdLst>", f"</p:sldMasterIdLst><p:sldIdLst>{sld_ids}</p:sldIdLst>", 1
+            )
+        zf.writestr("ppt/presentation.xml", presentation)
+
+        overrides = "".join(
+            f'<Override PartName="/ppt/slides/slide{i + 1}.xml" ContentType="{_SLIDE_CT}"/>'
+            for i in range(count)
+        )
+        content_types = parts["[Content_Types].xml"].decode("utf-8")
+        zf.writestr("[Content_Types].xml", content_types.replace("</Types>", overrides + "</Types>"))
+
+        app = parts["docProps/app.xml"].decode("utf-8")
+        zf.writestr("docProps/app.xml", app.replace("<Slides>0</Slides>", f"<Slides>{count}</Slides>"))
+    yield sink.drain()
+
+
+def write_pptx(out, title_slide: str, section_slides: Iterable[str]) -> None:
+    """Writes a PPTX package to the binary file object `out`."""
+    for chunk in iter_pptx(title_slide, section_slides):
+        out.write(chunk)
+
+
+def _numbered_slides(title_slide: str, section_slides: Iterable[str]):
+    # Title slide uses layout 1 ("Title Slide"), sections layout 2 ("Title and Content")
+    yield 1, title_slide
+    for slide in section_slides:
+        yield 2, slide
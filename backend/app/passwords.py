@@ -0,0 +1,112 @@
+# backend/app/passwords.py
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+# ======================================
+# Password hashing configuration
+# ======================================
+# Changing BCRYPT_ROUNDS rehashes each user's password at their next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hashes waiting for a worker before new ones are refused with 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
+
+
+def get_pwd_context():
+    # passlib (and its bcrypt backend) load on the first hash or verify,
+    # not at import
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                from passlib.context import CryptContext
+
+                _pwd_context = CryptContext(
+                    schemes=["bcrypt"],
+                    deprecated="auto",
+                    bcrypt__default_rounds=BCRYPT_ROUNDS,
+                    bcrypt__min_desired_rounds=BCRYPT_ROUNDS,
+                    bcrypt__max_desired_rounds=BCRYPT_ROUNDS,
+                )
+    return _pwd_context
+
+
+class PasswordHasherBusy(Exception):
+    """More hashes are pending than the executor accepts; retry shortly."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Too many sign-in requests in progress")
+        self.retry_after = retry_after
+
+
+# ======================================
+# Dedicated executor
+# ======================================
+# bcrypt releases the GIL while hashing, so threads run hashes in parallel;
+# keeping them off the request threadpool means a login burst queues here
+# instead of behind (or in front of) ordinary API requests.
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+                )
+    return _executor
+
+
+async def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        future = _get_executor().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return await asyncio.wrap_future(future)
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# ======================================
+# Hash / verify
+# ======================================
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password[:72])
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new_hash); new_hash is set when the stored hash uses other rounds."""
+    try:
+        return get_pwd_context().verify_and_update(password, hashed_password)
+    except Exception as e:
+        print("Password verify error:", e)
+        return False, None
+
+
+async def ahash_password(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def averify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run(verify_and_update, password, hashed_password)
@@ -0,0 +1,473 @@
+# backend/app/profiling.py
+
+"""
+Per-request profiling, on demand and for slow requests.
+
+A request is profiled
+  * from its start, when it carries PROFILING_TOKEN in an `X-Profile`
+    header or a `_profile` query parameter; the response then has an
+    `X-Profile-Id` header naming the stored profile;
+  * from PROFILING_SLOW_REQUEST_SECONDS on, when it is still running by
+    then.
+
+Other requests run no profiler at all: they are only added to an
+in-flight set, which one watchdog timer on the event loop checks every
+tenth of the slow-request threshold (at most every second) while requests
+are in flight.
+
+Profiles are wall-clock stack samples. While a profiled request runs, a
+background thread reads every thread's stack (sys._current_frames()) each
+PROFILING_INTERVAL_MS and keeps the stacks that are inside the request's
+endpoint function (or functions defined in it, such as a streaming body
+generator). Sync endpoints run on the threadpool, out of sight of an
+in-thread profiler like cProfile started by middleware, and sampling by
+stack also shows time blocked on the database or an LLM call. Samples that
+find no thread in the endpoint (dependencies, waiting for a threadpool
+worker, sending the response) are counted under OUTSIDE_ENDPOINT.
+Concurrent requests to the same endpoint cannot be told apart: every
+matching thread is sampled, and max_threads_in_endpoint records when that
+happened.
+
+Profiles are written to PROFILING_DIR as JSON with folded stacks (the
+"a;b;c 42" format read by flamegraph.pl and speedscope); the directory is a
+ring buffer of the newest PROFILING_MAX_PROFILES files. GET /profiling/
+lists them and serves each as a call tree, folded stacks or JSON.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs
+
+# Shared secret enabling on-demand profiling and the /profiling endpoints;
+# empty disables both
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+# Requests still running after this many seconds are profiled; 0 disables
+PROFILING_SLOW_REQUEST_SECONDS = float(os.getenv("PROFILING_SLOW_REQUEST_SECONDS", "10"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "./profiles")
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "100"))
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+_PROFILE_QUERY_BYTES = PROFILE_QUERY_PARAM.encode() + b"="
+OUTSIDE_ENDPOINT = "(outside endpoint: dependencies, threadpool queue, response)"
+
+_PROFILE_ID_RE = re.compile(r"\d{8}T\d{12}-[0-9a-f]{6}")
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_SITE_PACKAGES = "site-packages" + os.sep
+
+
+# ======================================
+# Stack labels
+# ======================================
+_labels: Dict[types.CodeType, str] = {}
+
+
+def _label(code: types.CodeType) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        marker = path.rfind(_SITE_PACKAGES)
+        if marker >= 0:
+            path = path[marker + len(_SITE_PACKAGES):]
+        elif path.startswith(_BACKEND_DIR):
+            path = path[len(_BACKEND_DIR):]
+        else:
+            path = os.path.basename(path)
+        label = _labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})"
+    return label
+
+
+def _code_family(code: types.CodeType) -> Set[types.CodeType]:
+    """`code` and the code of every function, generator and lambda defined in it."""
+    family = {code}
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            family |= _code_family(const)
+    return family
+
+
+# ======================================
+# Profile sessions and the sampler
+# ======================================
+class ProfileSession:
+    def __init__(self, scope: dict, trigger: str, request_started: float):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{secrets.token_hex(3)}"
+        self.scope = scope
+        self.trigger = trigger  # "on_demand" or "slow"
+        self.request_started = request_started
+        self.started = time.perf_counter()
+        self.samples = 0
+        self.max_threads_in_endpoint = 0
+        self._stacks = Counter()  # tuple of code objects, endpoint first -> samples
+        self._codes = None
+        self._lock = threading.Lock()
+
+    def codes(self) -> Optional[Set[types.CodeType]]:
+        # The router fills in scope["endpoint"] once the request is matched
+        if self._codes is None:
+            code = getattr(self.scope.get("endpoint"), "__code__", None)
+            if code is not None:
+                self._codes = _code_family(code)
+        return self._codes
+
+    def record(self, stacks: List[tuple]) -> None:
+        with self._lock:
+            self.samples += 1
+            self.max_threads_in_endpoint = max(self.max_threads_in_endpoint, len(stacks))
+            if not stacks:
+                self._stacks[()] += 1
+            for stack in stacks:
+                self._stacks[stack] += 1
+
+    def to_dict(self, status: int) -> dict:
+        finished = time.perf_counter()
+        with self._lock:
+            stacks = {
+                ";".join(_label(code) for code in stack) if stack else OUTSIDE_ENDPOINT: count
+                for stack, count in self._stacks.most_common()
+            }
+            samples, max_threads = self.samples, self.max_threads_in_endpoint
+        duration = finished - self.request_started
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "method": self.scope.get("method"),
+            "path": self.scope.get("path"),
+            "route": getattr(self.scope.get("route"), "path", None),
+            "status": status,
+            "started_at": (datetime.now(timezone.utc) - timedelta(seconds=duration)).isoformat(timespec="milliseconds"),
+            "duration_seconds": round(duration, 4),
+            "profiled_seconds": round(finished - self.started, 4),
+            "interval_ms": PROFILING_INTERVAL_MS,
+            "samples": samples,
+            "max_threads_in_endpoint": max_threads,
+            "stacks": stacks,
+        }
+
+
+class Sampler:
+    """
+    One daemon thread sampling every thread's stack for the active
+    sessions. It exits when the last session is removed and is restarted
+    by the next add(), so nothing runs while no request is profiled.
+    """
+
+    def __init__(self, interval: float = PROFILING_INTERVAL_MS / 1000):
+        self.interval = interval
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None and not self._stopping.is_set():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, session: ProfileSession) -> None:
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._sessions or self._stopping.is_set():
+                    self._thread = None
+                    return
+                sessions = list(self._sessions)
+            self.sample(sessions)
+            self._stopping.wait(self.interval)
+
+    def sample(self, sessions: List[ProfileSession]) -> None:
+        by_code: Dict[types.CodeType, List[ProfileSession]] = {}
+        for session in sessions:
+            for code in session.codes() or ():
+                by_code.setdefault(code, []).append(session)
+        matches: Dict[ProfileSession, List[tuple]] = {session: [] for session in sessions}
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack, outermost = [], -1
+            while frame is not None:
+                stack.append(frame.f_code)
+                if frame.f_code in by_code:
+                    outermost = len(stack) - 1
+                frame = frame.f_back
+            if outermost < 0:
+                continue
+            # Root at the endpoint: the threadpool and event loop frames
+            # below it are the same for every request
+            rooted = tuple(reversed(stack[:outermost + 1]))
+            for session in by_code[stack[outermost]]:
+                matches[session].append(rooted)
+        for session, stacks in matches.items():
+            session.record(stacks)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+
+_sampler: Optional[Sampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> Sampler:
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = Sampler()
+    return _sampler
+
+
+def shutdown() -> None:
+    global _sampler
+    with _sampler_lock:
+        sampler, _sampler = _sampler, None
+    if sampler is not None:
+        sampler.stop()
+
+
+# ======================================
+# On-disk ring buffer
+# ======================================
+_store_lock = threading.Lock()
+
+
+def is_profile_id(profile_id: str) -> bool:
+    return bool(_PROFILE_ID_RE.fullmatch(profile_id))
+
+
+def _profile_ids() -> List[str]:
+    try:
+        names = os.listdir(PROFILING_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-5] for name in names if name.endswith(".json") and is_profile_id(name[:-5]))
+
+
+def save_profile(profile: dict) -> None:
+    with _store_lock:
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        path = os.path.join(PROFILING_DIR, f"{profile['id']}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        os.replace(path + ".tmp", path)
+        # Ids start with a UTC timestamp, so sorted order is oldest first
+        for stale in _profile_ids()[:-PROFILING_MAX_PROFILES]:
+            try:
+                os.remove(os.path.join(PROFILING_DIR, f"{stale}.json"))
+            except FileNotFoundError:
+                pass
+
+
+def load_profile(profile_id: str) -> Optional[dict]:
+    if not is_profile_id(profile_id):
+        return None
+    try:
+        with open(os.path.join(PROFILING_DIR, f"{profile_id}.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def list_profiles() -> List[dict]:
+    """Stored profiles without their stacks, newest first."""
+    listed = []
+    for profile_id in reversed(_profile_ids()):
+        profile = load_profile(profile_id)
+        if profile is not None:
+            profile.pop("stacks", None)
+            listed.append(profile)
+    return listed
+
+
+def folded(profile: dict) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+
+
+def call_tree(profile: dict, min_percent: float = 0.5) -> str:
+    """Indented call tree with the share of samples under each frame."""
+    root: dict = {}
+    total = 0
+    for stack, count in profile["stacks"].items():
+        total += count
+        level = root
+        for label in stack.split(";"):
+            node = level.setdefault(label, [0, {}])
+            node[0] += count
+            level = node[1]
+
+    lines = [
+        f"{profile['method']} {profile['path']} -> {profile['status']} in {profile['duration_seconds']:.3f} s "
+        f"({profile['trigger']}, {profile['samples']} samples every {profile['interval_ms']:g} ms "
+        f"over the last {profile['profiled_seconds']:.3f} s)",
+    ]
+    if profile["max_threads_in_endpoint"] > 1:
+        lines.append(f"note: up to {profile['max_threads_in_endpoint']} threads were in this endpoint at once; "
+                     "samples of concurrent requests to it are included")
+    lines.append("")
+
+    def walk(level: dict, depth: int) -> None:
+        for label, (count, children) in sorted(level.items(), key=lambda item: -item[1][0]):
+            percent = count / total * 100
+            if percent < min_percent:
+                continue
+            lines.append(f"{percent:6.1f}% {count:7d}  {'  ' * depth}{label}")
+            walk(children, depth + 1)
+
+    walk(root, 0)
+    return "\n".join(lines) + "\n"
+
+
+# ======================================
+# Slow-request watchdog
+# ======================================
+class _InFlightRequest:
+    __slots__ = ("scope", "started", "session")
+
+    def __init__(self, scope: dict, started: float):
+        self.scope = scope
+        self.started = started
+        self.session: Optional[ProfileSession] = None
+
+
+# Only touched from the event loop thread
+_in_flight: Set[_InFlightRequest] = set()
+_watchdog_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _watchdog_period() -> float:
+    return min(1.0, PROFILING_SLOW_REQUEST_SECONDS / 10)
+
+
+def _check_slow_requests(loop: asyncio.AbstractEventLoop) -> None:
+    global _watchdog_loop
+    if not _in_flight:
+        _watchdog_loop = None
+        return
+    now = time.perf_counter()
+    for request in _in_flight:
+        if request.session is None and now - request.started >= PROFILING_SLOW_REQUEST_SECONDS:
+            request.session = ProfileSession(request.scope, "slow", request.started)
+            get_sampler().add(request.session)
+    loop.call_later(_watchdog_period(), _check_slow_requests, loop)
+
+
+def _watch(request: _InFlightRequest) -> None:
+    global _watchdog_loop
+    _in_flight.add(request)
+    loop = asyncio.get_running_loop()
+    if _watchdog_loop is not loop:
+        _watchdog_loop = loop
+        loop.call_later(_watchdog_period(), _check_slow_requests, loop)
+
+
+# ======================================
+# HTTP middleware
+# ======================================
+def is_authorized(value: Optional[bytes]) -> bool:
+    return bool(PROFILING_TOKEN) and value is not None and hmac.compare_digest(value, PROFILING_TOKEN.encode())
+
+
+def _profiling_requested(scope: dict) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return is_authorized(value)
+    query = scope.get("query_string", b"")
+    if _PROFILE_QUERY_BYTES in query:
+        values = parse_qs(query.decode("latin-1")).get(PROFILE_QUERY_PARAM, ())
+        return any(is_authorized(value.encode("latin-1")) for value in values)
+    return False
+
+
+def _finish(session: ProfileSession, status: int) -> dict:
+    get_sampler().remove(session)
+    profile = session.to_dict(status)
+    try:
+        save_profile(profile)
+    except OSError as e:
+        print(f"⚠️ Could not store profile {profile['id']}: {e}")
+        return profile
+    icon = "🐢 Slow request" if session.trigger == "slow" else "🔬 Profiled"
+    print(f"{icon} {profile['method']} {profile['path']} ({profile['duration_seconds']:.2f} s, "
+          f"{profile['samples']} samples): profile {profile['id']}")
+    return profile
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["path"].startswith("/profiling")
+                or not (PROFILING_TOKEN or PROFILING_SLOW_REQUEST_SECONDS > 0)):
+            await self.app(scope, receive, send)
+            return
+        if PROFILING_TOKEN and _profiling_requested(scope):
+            await self._profile(scope, receive, send)
+        elif PROFILING_SLOW_REQUEST_SECONDS > 0:
+            await self._watch(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _profile(self, scope, receive, send):
+        session = ProfileSession(scope, "on_demand", time.perf_counter())
+        get_sampler().add(session)
+        status, finished = 500, False
+
+        async def send_with_profile(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", [])) + [(b"x-profile-id", session.id.encode())]
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and not message.get("more_body") and not finished:
+                # Stored before the response completes, so the client can
+                # fetch it as soon as it has the body
+                finished = True
+                await asyncio.to_thread(_finish, session, status)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if not finished:
+                await asyncio.to_thread(_finish, session, status)
+
+    async def _watch(self, scope, receive, send):
+        request = _InFlightRequest(scope, time.perf_counter())
+        _watch(request)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _in_flight.discard(request)
+            if request.session is not None:
+                await asyncio.to_thread(_finish, request.session, status)
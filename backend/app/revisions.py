@@ -0,0 +1,179 @@
+# backend/app/revisions.py
+
+"""
+Section revision history.
+
+Every change to a section's content is appended as a numbered revision.
+Most revisions are stored as a zlib-compressed delta against the revision
+before them; every REVISION_SNAPSHOT_INTERVAL-th revision (and any revision
+whose delta would not be smaller) is stored as a compressed full snapshot.
+Reconstructing a revision therefore reads at most REVISION_SNAPSHOT_INTERVAL
+rows: the nearest snapshot at or before it plus the deltas after that.
+
+A delta is a JSON list of operations applied to the previous text:
+`[start, end]` copies base[start:end], a string inserts that text.
+"""
+
+import json
+import os
+import re
+import zlib
+from difflib import SequenceMatcher
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import models
+
+# ======================================
+# Configuration
+# ======================================
+REVISION_SNAPSHOT_INTERVAL = max(1, int(os.getenv("REVISION_SNAPSHOT_INTERVAL", "10")))
+
+# Words with their trailing whitespace (diffing words rather than characters
+# keeps SequenceMatcher fast on long sections; separate whitespace tokens
+# would be so common that matching slows down twentyfold)
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+# ======================================
+# Delta encoding
+# ======================================
+def _compress(payload: str) -> bytes:
+    return zlib.compress(payload.encode("utf-8"))
+
+
+def _decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def make_delta(base: str, target: str) -> List:
+    a = _TOKEN_RE.findall(base)
+    b = _TOKEN_RE.findall(target)
+    offsets = [0]
+    for token in a:
+        offsets.append(offsets[-1] + len(token))
+
+    ops: List = []
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([offsets[i1], offsets[i2]])
+        elif j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: List) -> str:
+    return "".join(base[op[0]:op[1]] if isinstance(op, list) else op for op in ops)
+
+
+def _encode(base: Optional[str], content: str, revision: int):
+    """Returns (is_snapshot, data) for storing `content` as `revision`."""
+    snapshot = _compress(content)
+    if base is None or (revision - 1) % REVISION_SNAPSHOT_INTERVAL == 0:
+        return True, snapshot
+    delta = _compress(json.dumps(make_delta(base, content), separators=(",", ":")))
+    # A rewrite of most of the text costs more as a delta than as a snapshot;
+    # an early snapshot only shortens the chain for later revisions
+    if len(delta) >= len(snapshot):
+        return True, snapshot
+    return False, delta
+
+
+# ======================================
+# Reading
+# ======================================
+def _latest(db: Session, section_id: int) -> Optional[models.SectionRevision]:
+    return (
+        db.query(models.SectionRevision)
+        .filter(models.SectionRevision.section_id == section_id)
+        .order_by(models.SectionRevision.revision.desc())
+        .first()
+    )
+
+
+def list_revisions(db: Session, section_id: int) -> List:
+    """Revision metadata, newest first, without loading the stored blobs."""
+    Rev = models.SectionRevision
+    return (
+        db.query(
+            Rev.revision, Rev.source, Rev.is_snapshot, Rev.content_length,
+            func.length(Rev.data).label("stored_bytes"), Rev.author_id, Rev.created_at,
+        )
+        .filter(Rev.section_id == section_id)
+        .order_by(Rev.revision.desc())
+        .all()
+    )
+
+
+def get_revision_content(db: Session, section_id: int, revision: int) -> Optional[str]:
+    """Rebuilds a revision from the nearest snapshot; None if it does not exist."""
+    Rev = models.SectionRevision
+    snapshot_rev = (
+        db.query(Rev.revision)
+        .filter(Rev.section_id == section_id, Rev.revision <= revision, Rev.is_snapshot.is_(True))
+        .order_by(Rev.revision.desc())
+        .limit(1)
+        .scalar()
+    )
+    if snapshot_rev is None:
+        return None
+    rows = (
+        db.query(Rev.revision, Rev.is_snapshot, Rev.data)
+        .filter(Rev.section_id == section_id, Rev.revision.between(snapshot_rev, revision))
+        .order_by(Rev.revision)
+        .all()
+    )
+    if not rows or rows[-1].revision != revision:
+        return None
+
+    content = _decompress(rows[0].data)
+    for row in rows[1:]:
+        content = _decompress(row.data) if row.is_snapshot else apply_delta(content, json.loads(_decompress(row.data)))
+    return content
+
+
+# ======================================
+# Writing
+# ======================================
+def _append(db: Session, section: models.DocumentSection, content: str, source: str,
+            author_id: Optional[int], previous: Optional[models.SectionRevision],
+            previous_content: Optional[str]) -> models.SectionRevision:
+    revision = previous.revision + 1 if previous else 1
+    is_snapshot, data = _encode(previous_content, content, revision)
+    row = models.SectionRevision(
+        section_id=section.id,
+        revision=revision,
+        is_snapshot=is_snapshot,
+        data=data,
+        content_length=len(content),
+        source=source,
+        author_id=author_id,
+    )
+    db.add(row)
+    return row
+
+
+def update_content(db: Session, section: models.DocumentSection, new_content: str,
+                   source: str, author_id: Optional[int] = None) -> models.SectionRevision:
+    """
+    Sets section.content, bumps its content_version and appends it as a new
+    revision; the caller commits.
+
+    The section's current content is recorded first when the history does not
+    end with it yet: the first change of a section, or a change made outside
+    this module (e.g. regeneration by a background job).
+    """
+    previous = _latest(db, section.id)
+    previous_content = get_revision_content(db, section.id, previous.revision) if previous else None
+    current = section.content or ""
+    if previous_content != current:
+        previous = _append(db, section, current, "initial" if previous is None else "external",
+                           None, previous, previous_content)
+        previous_content = current
+
+    section.content = new_content
+    section.content_version = (section.content_version or 1) + 1
+    return _append(db, section, new_content, source, author_id, previous, previous_content)
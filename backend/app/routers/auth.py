@@ -1,45 +1,88 @@
 from datetime import timedelta, datetime
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from .. import models, schemas, database, auth
+from .. import models, schemas, database, auth, passwords
 
 router = APIRouter(tags=["Authentication"])
 
 
+def _busy_error(e: passwords.PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+# These routes are async so that waiting for bcrypt (on its own executor)
+# does not hold a request thread; database calls go to the threadpool.
 @router.post("/register", response_model=schemas.UserResponse)
-def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    existing = db.query(models.User).filter(models.User.email == user.email).first()
-    if existing:
+async def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+    def email_taken() -> bool:
+        taken = db.query(models.User.id).filter(models.User.email == user.email).first() is not None
+        db.rollback()  # hand the connection back to the pool while bcrypt runs
+        return taken
+
+    if await run_in_threadpool(email_taken):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = auth.get_password_hash(user.password)
-    db_user = models.User(email=user.email, hashed_password=hashed_pw, full_name=user.full_name)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    try:
+        hashed_pw = await passwords.ahash_password(user.password)
+    except passwords.PasswordHasherBusy as e:
+        raise _busy_error(e)
+
+    def save() -> models.User:
+        db_user = models.User(email=user.email, hashed_password=hashed_pw, full_name=user.full_name)
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+        return db_user
+
+    return await run_in_threadpool(save)
 
 
 @router.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(),
-          db: Session = Depends(database.get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(),
+                db: Session = Depends(database.get_db)):
     """
     OAuth2 password flow login.
     Frontend calls POST /token with form fields: username, password.
     """
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    def lookup():
+        user = db.query(models.User).filter(models.User.email == form_data.username).first()
+        found = (user.id, user.email, user.hashed_password) if user else None
+        db.rollback()  # hand the connection back to the pool while bcrypt runs
+        return found
+
+    found = await run_in_threadpool(lookup)
+    valid = False
+    if found:
+        try:
+            valid, new_hash = await passwords.averify_and_update(form_data.password, found[2])
+        except passwords.PasswordHasherBusy as e:
+            raise _busy_error(e)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    user_id, email, _ = found
+    if new_hash:
+        # Stored hash was made with a different BCRYPT_ROUNDS
+        def rehash() -> None:
+            db.get(models.User, user_id).hashed_password = new_hash
+            db.commit()
+
+        await run_in_threadpool(rehash)
+
     expires_delta = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(data={"sub": user.email}, expires_delta=expires_delta)
+    access_token = auth.create_access_token(data={"sub": email, "uid": user_id}, expires_delta=expires_delta)
     expires_at = datetime.utcnow() + expires_delta
 
     return {
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
 from .. import database, models, schemas, auth
@@ -24,17 +25,10 @@ def post_feedback(
         raise HTTPException(status_code=404, detail="Section not found")
 
     # Check for existing feedback
-    existing_feedback = db.query(models.Feedback).filter(
-        models.Feedback.section_id == section_id,
-        models.Feedback.user_id == current_user.id
-    ).first()
+    existing_feedback = _get_user_feedback(db, section_id, current_user.id)
 
     if existing_feedback:
-        existing_feedback.is_liked = is_liked
-        existing_feedback.comment = comment
-        db.commit()
-        db.refresh(existing_feedback)
-        return {"message": "Feedback updated successfully"}
+        return _update_feedback(db, existing_feedback, is_liked, comment)
 
     new_feedback = models.Feedback(
         section_id=section_id,
@@ -43,10 +37,33 @@ def post_feedback(
         comment=comment
     )
     db.add(new_feedback)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request created it first (unique per user/section)
+        db.rollback()
+        existing_feedback = _get_user_feedback(db, section_id, current_user.id)
+        if not existing_feedback:
+            raise
+        return _update_feedback(db, existing_feedback, is_liked, comment)
     db.refresh(new_feedback)
     return {"message": "Feedback submitted successfully"}
 
+
+def _get_user_feedback(db: Session, section_id: int, user_id: int):
+    return db.query(models.Feedback).filter(
+        models.Feedback.section_id == section_id,
+        models.Feedback.user_id == user_id
+    ).first()
+
+
+def _update_feedback(db: Session, feedback: models.Feedback, is_liked, comment):
+    feedback.is_liked = is_liked
+    feedback.comment = comment
+    db.commit()
+    db.refresh(feedback)
+    return {"message": "Feedback updated successfully"}
+
 # ✅ Get all feedback for a section
 @router.get("/{section_id}", response_model=List[schemas.FeedbackResponse])
 def get_feedback_for_section(
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from docx import Document
+from datetime import datetime
 import os
-from .. import database, models, auth
+from .. import database, models, schemas, auth, bulk_export
 
 router = APIRouter(prefix="/export", tags=["Export"])
 
 EXPORT_DIR = "exports"
-os.makedirs(EXPORT_DIR, exist_ok=True)
 
 @router.get("/{project_id}")
 def export_project(project_id: int, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
@@ -16,6 +15,8 @@ def export_project(project_id: int, db: Session = Depends(database.get_db), curr
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    from docx import Document
+
     doc = Document()
     doc.add_heading(project.title, 0)
     doc.add_paragraph(f"Type: {project.project_type}\n")
@@ -25,6 +26,58 @@ def export_project(project_id: int, db: Session = Depends(database.get_db), curr
         doc.add_heading(section.title, level=1)
         doc.add_paragraph(section.content or "")
 
+    os.makedirs(EXPORT_DIR, exist_ok=True)
     filepath = os.path.join(EXPORT_DIR, f"{project.title.replace(' ', '_')}.docx")
     doc.save(filepath)
     return FileResponse(filepath, media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document", filename=f"{project.title}.docx")
+
+
+@router.post("/bulk")
+def export_projects_bulk(
+    request: schemas.BulkExportRequest,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """
+    Streams a ZIP of the selected projects rendered in a process pool.
+    Failures (including unknown ids) and requested ids excluded by the
+    filters are listed in manifest.json.
+    """
+    query = db.query(models.Project.id).filter(models.Project.owner_id == current_user.id)
+    if request.project_ids is not None:
+        query = query.filter(models.Project.id.in_(request.project_ids))
+    if request.project_type:
+        query = query.filter(models.Project.project_type == request.project_type.lower())
+    if request.title_contains:
+        query = query.filter(models.Project.title.ilike(f"%{request.title_contains}%"))
+    project_ids = [row.id for row in query.order_by(models.Project.id).limit(bulk_export.EXPORT_BULK_MAX_PROJECTS + 1)]
+
+    missing_ids, filtered_ids = [], []
+    if request.project_ids is not None:
+        found = set(project_ids)
+        unmatched = [pid for pid in dict.fromkeys(request.project_ids) if pid not in found]
+        owned = set()
+        if unmatched and (request.project_type or request.title_contains):
+            # The user's own projects that the filters excluded, as opposed
+            # to unknown ids or other users' projects
+            owned = {
+                row.id for row in db.query(models.Project.id).filter(
+                    models.Project.owner_id == current_user.id, models.Project.id.in_(unmatched)
+                )
+            }
+        filtered_ids = [pid for pid in unmatched if pid in owned]
+        missing_ids = [pid for pid in unmatched if pid not in owned]
+    if len(project_ids) + len(missing_ids) + len(filtered_ids) > bulk_export.EXPORT_BULK_MAX_PROJECTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {bulk_export.EXPORT_BULK_MAX_PROJECTS} projects can be exported at once",
+        )
+    if not project_ids:
+        raise HTTPException(status_code=404, detail="No projects match the selection")
+
+    filename = f"projects_{datetime.utcnow():%Y%m%d_%H%M%S}.zip"
+    return StreamingResponse(
+        bulk_export.iter_bulk_export(project_ids, current_user.id, missing_ids, filtered_ids),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
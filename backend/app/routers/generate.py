@@ -1,21 +1,100 @@
-from fastapi import APIRouter, HTTPException
-from ..llm_service import generate_with_gemini
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from .. import auth, llm_cache, llm_scheduler, models, near_duplicates
+from ..llm_scheduler import Priority
+from ..llm_service import (
+    LLMEmptyResponseError,
+    LLMError,
+    LLMOverloadedError,
+    LLMTimeoutError,
+    generate_with_gemini,
+    get_backend,
+    singleflight_stats,
+    stream_with_gemini,
+)
+from ..streaming import sse_response
 
 router = APIRouter(prefix="/generate", tags=["AI Generation"])
 
+# Max number of sections generated in parallel for a single project
+SECTION_GENERATION_CONCURRENCY = int(os.getenv("SECTION_GENERATION_CONCURRENCY", "4"))
+# Sections requested per batched (single JSON response) call when a
+# project is created; 0 or 1 generates every section with its own call
+SECTION_BATCH_SIZE = int(os.getenv("SECTION_BATCH_SIZE", "6"))
+
+
+def llm_http_error(e: LLMError, action: str = "Generation") -> HTTPException:
+    """Maps a backend failure to the HTTP error returned to the client."""
+    if isinstance(e, LLMOverloadedError):
+        return HTTPException(
+            status_code=429,
+            detail=f"{action} rejected, server busy: {e}",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    if isinstance(e, LLMTimeoutError):
+        return HTTPException(status_code=504, detail=f"{action} timed out: {e}")
+    return HTTPException(status_code=502, detail=f"{action} failed: {e}")
+
+
+# Minimum length for section content to be accepted (and cached)
+MIN_SECTION_CONTENT_LENGTH = 50
+
+
+def _is_usable_section(text: str) -> bool:
+    return bool(text) and len(text.strip()) >= MIN_SECTION_CONTENT_LENGTH
+
+
+def _reuse_scope(kind: str, owner_id: int, project_type: str, section_title: str = "") -> str:
+    """
+    Near-duplicate topics are only matched within the same user, kind,
+    format, model and section title: one user's outlines and sections are
+    never served to another.
+    """
+    backend = get_backend()
+    scope = f"{kind}:{owner_id}:{project_type}:{backend.name}:{backend.model_name}"
+    if section_title:
+        scope += ":" + near_duplicates.normalize(section_title)
+    return scope
+
 
 # ==========================
 # 🧩 OUTLINE GENERATION
 # ==========================
+def parse_outline(outline_text: str) -> List[str]:
+    """Section titles from a numbered / bulleted outline, one per non-blank line."""
+    return [
+        line.strip("•-1234567890. ").strip()
+        for line in outline_text.split("\n")
+        if line.strip()
+    ]
+
+
 @router.post("/outline")
-def generate_outline(data: dict):
+def generate_outline(data: dict, current_user: Optional[models.User] = Depends(auth.get_optional_user)):
     topic = data.get("topic")
     project_type = data.get("project_type", "docx")  # <- expect "project_type"
+    bypass_cache = bool(data.get("bypass_cache", False))
 
     if not topic:
         raise HTTPException(status_code=400, detail="Missing topic")
 
     try:
+        # A previous outline of this user's for a near-identical topic is
+        # returned as is; the client sees `reuse` and can ask again with
+        # bypass_cache for a fresh one. Anonymous requests are never reused.
+        # (The scope names the backend, so building it can already fail.)
+        index = near_duplicates.get_index() if current_user is not None else None
+        scope = _reuse_scope("outline", current_user.id, project_type) if index is not None else None
+        if index is not None and not bypass_cache:
+            match = index.query(scope, topic)
+            if match is not None:
+                return {"outline": match.value, "reuse": match.describe()}
+
         if project_type == "pptx":
             prompt = f"""
             You are an expert presentation content designer.
@@ -41,13 +120,16 @@ def generate_outline(data: dict):
             • Return a simple numbered list.
             """
 
-        outline_text = generate_with_gemini(prompt)
-        sections = [
-            line.strip("•-1234567890. ").strip()
-            for line in outline_text.split("\n")
-            if line.strip()
-        ]
-        return {"outline": sections}      # <- always wrap in {outline: [...]}
+        outline_text = generate_with_gemini(
+            prompt, use_cache=True, bypass_cache=bypass_cache, priority=Priority.OUTLINE,
+            call_site="outline",
+        )
+        sections = parse_outline(outline_text)
+        if index is not None and sections:
+            index.add(scope, topic, sections)
+        return {"outline": sections, "reuse": None}      # <- always wrap in {outline: [...]}
+    except LLMError as e:
+        raise llm_http_error(e, "Outline generation")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -55,10 +137,9 @@ def generate_outline(data: dict):
 # ==========================
 # 🧠 DOCUMENT/SLIDE CONTENT
 # ==========================
-def generate_document_content(topic: str, section_title: str, project_type: str):
-    try:
-        if project_type == "pptx":
-            prompt = f"""
+def build_section_prompt(topic: str, section_title: str, project_type: str) -> str:
+    if project_type == "pptx":
+        return f"""
             You are an expert corporate storyteller.
             Create content for one PowerPoint slide.
 
@@ -74,8 +155,7 @@ def generate_document_content(topic: str, section_title: str, project_type: str)
             • Keep tone professional and engaging.
             • Return only bullet points (no slide numbers or headers).
             """
-        else:
-            prompt = f"""
+    return f"""
             You are a professional research writer.
             Write a comprehensive section for a report.
 
@@ -90,32 +170,282 @@ def generate_document_content(topic: str, section_title: str, project_type: str)
             • Return clean paragraph text, ready to include in a report.
             """
 
-        result = generate_with_gemini(prompt)
-        if not result or len(result.strip()) < 50:
-            return f"(⚠️ Insufficient content generated for '{section_title}')"
-        return result.strip()
+
+def generate_section_text(topic: str, section_title: str, project_type: str,
+                          bypass_cache: bool = False, owner_id: Optional[int] = None) -> str:
+    """
+    Generates one section body, offered for near-duplicate reuse to
+    `owner_id`'s later projects when given.
+    Raises LLMEmptyResponseError when the answer is too short to use and
+    other LLMError subclasses when the backend fails.
+    """
+    prompt = build_section_prompt(topic, section_title, project_type)
+    result = generate_with_gemini(
+        prompt,
+        use_cache=True,
+        bypass_cache=bypass_cache,
+        cache_if=_is_usable_section,
+        priority=Priority.BULK,
+        call_site="section",
+    )
+    if not _is_usable_section(result):
+        raise LLMEmptyResponseError(f"Insufficient content generated for '{section_title}'")
+    index = near_duplicates.get_index()
+    if index is not None and owner_id is not None:
+        index.add(_reuse_scope("section", owner_id, project_type, section_title), topic, result.strip())
+    return result.strip()
+
+
+def section_placeholder(section_title: str, error: Exception) -> str:
+    """Text stored in place of a section whose generation failed."""
+    if isinstance(error, LLMEmptyResponseError):
+        return f"(⚠️ Insufficient content generated for '{section_title}')"
+    return f"(Error generating content for '{section_title}')"
+
+
+class SectionContent(NamedTuple):
+    text: str
+    reuse: Optional[dict] = None  # set when taken from a near-duplicate topic
+
+
+def _reused_section(topic: str, section_title: str, project_type: str,
+                    owner_id: Optional[int]) -> Optional[SectionContent]:
+    index = near_duplicates.get_index()
+    if index is None or owner_id is None:
+        return None
+    try:
+        scope = _reuse_scope("section", owner_id, project_type, section_title)
+    except LLMError:
+        return None  # backend misconfigured; generation reports it per section
+    match = index.query(scope, topic)
+    return SectionContent(match.value, match.describe()) if match is not None else None
+
+
+def _fresh_section(topic: str, section_title: str, project_type: str,
+                   bypass_cache: bool = False, owner_id: Optional[int] = None) -> SectionContent:
+    try:
+        return SectionContent(generate_section_text(topic, section_title, project_type, bypass_cache, owner_id))
+    except LLMOverloadedError:
+        # Shedding must reach the client as a 429, not a placeholder
+        raise
     except Exception as e:
         print(f"Error generating content for '{section_title}': {e}")
-        return f"(Error generating content for '{section_title}')"
+        return SectionContent(section_placeholder(section_title, e))
+
+
+def generate_document_content(topic: str, section_title: str, project_type: str,
+                              bypass_cache: bool = False, owner_id: Optional[int] = None) -> str:
+    return generate_document_content_with_reuse(topic, section_title, project_type, bypass_cache, owner_id).text
+
+
+def generate_document_content_with_reuse(topic: str, section_title: str, project_type: str,
+                                         bypass_cache: bool = False,
+                                         owner_id: Optional[int] = None) -> SectionContent:
+    """Like generate_document_content, with the near-duplicate match the text was reused from, if any."""
+    reused = None if bypass_cache else _reused_section(topic, section_title, project_type, owner_id)
+    return reused or _fresh_section(topic, section_title, project_type, bypass_cache, owner_id)
 
 
 # ==========================
-# 🔄 REFINEMENT ENDPOINT
+# 📦 BATCHED SECTION CONTENT
 # ==========================
-@router.post("/refine")
-def refine_section(data: dict):
-    section_id = data.get("section_id")
-    prompt = data.get("prompt")
-    content = data.get("content", "")
+def build_batch_section_prompt(topic: str, section_titles: List[str], project_type: str) -> str:
+    numbered = "\n".join(f"{i}. {title}" for i, title in enumerate(section_titles, start=1))
+    if project_type == "pptx":
+        intro = f"""
+            You are an expert corporate storyteller.
+            Create the content of every slide listed below for a presentation on:
+            "{topic}".
 
-    if section_id is None or not prompt:
-        raise HTTPException(status_code=400, detail="Missing section_id or prompt")
+            Slides:
+            {numbered}
+
+            Requirements for each slide:
+            • 6–8 impactful, concise but insightful bullet points, one per line.
+            • Logical flow specific to that slide; do not repeat other slides.
+            • Professional and engaging tone, no slide numbers or headers.
+            """
+    else:
+        intro = f"""
+            You are a professional research writer.
+            Write every section listed below for a report on:
+            "{topic}".
+
+            Sections:
+            {numbered}
+
+            Requirements for each section:
+            • Length: around 350–400 words of clean paragraph text.
+            • Tone: formal, coherent, informative, with relevant insights and reasoning.
+            • No repetition across sections and no filler.
+            """
+    return intro + """
+            Respond with JSON only (no markdown fences), exactly in this shape:
+            {"sections": [{"index": 1, "title": "...", "content": "..."}]}
+            One entry per item above, in the same order, where "index" is its number.
+            """
+
+
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
 
-    if not content:
-        content = "(No existing content – generate fresh content based on the prompt.)"
 
+def parse_batch_sections(text: str, count: int) -> List[Optional[str]]:
+    """
+    Splits a batched response into `count` section bodies by position;
+    an entry that is missing, malformed or too short to use is None.
+    """
+    bodies: List[Optional[str]] = [None] * count
     try:
-        refine_prompt = f"""
+        data = json.loads(_CODE_FENCE_RE.sub("", text.strip()))
+    except ValueError:
+        return bodies
+    entries = data.get("sections") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return bodies
+
+    for position, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("index", position)
+        content = entry.get("content")
+        if (isinstance(index, int) and not isinstance(index, bool) and 1 <= index <= count
+                and bodies[index - 1] is None
+                and isinstance(content, str) and _is_usable_section(content)):
+            bodies[index - 1] = content.strip()
+    return bodies
+
+
+def generate_section_batch(topic: str, section_titles: List[str], project_type: str,
+                           bypass_cache: bool = False, owner_id: Optional[int] = None) -> List[Optional[str]]:
+    """
+    Generates several section bodies with one LLM call. Returns one entry
+    per title, None where the response had no usable body for it (all of
+    them if the call failed). Raises LLMOverloadedError when shed.
+    """
+    count = len(section_titles)
+    try:
+        result = generate_with_gemini(
+            build_batch_section_prompt(topic, section_titles, project_type),
+            use_cache=True,
+            bypass_cache=bypass_cache,
+            # Only complete batches are cached; a partial one is retried next time
+            cache_if=lambda text: all(parse_batch_sections(text, count)),
+            priority=Priority.BULK,
+            call_site="section_batch",
+        )
+    except LLMOverloadedError:
+        raise
+    except LLMError as e:
+        print(f"Batched generation of {count} sections failed: {e}")
+        return [None] * count
+
+    bodies = parse_batch_sections(result, count)
+    index = near_duplicates.get_index()
+    if index is not None and owner_id is not None:
+        for title, body in zip(section_titles, bodies):
+            if body is not None:
+                index.add(_reuse_scope("section", owner_id, project_type, title), topic, body)
+    return bodies
+
+
+@router.post("/section/stream")
+def stream_section_content(data: dict):
+    """Streams the content of one section as server-sent events."""
+    topic = data.get("topic")
+    section_title = data.get("section_title")
+    project_type = data.get("project_type", "docx")
+    bypass_cache = bool(data.get("bypass_cache", False))
+
+    if not topic or not section_title:
+        raise HTTPException(status_code=400, detail="Missing topic or section_title")
+
+    prompt = build_section_prompt(topic, section_title, project_type)
+    try:
+        chunks = stream_with_gemini(
+            prompt,
+            use_cache=True,
+            bypass_cache=bypass_cache,
+            cache_if=_is_usable_section,
+            priority=Priority.OUTLINE,
+            call_site="section_stream",
+        )
+    except LLMError as e:
+        raise llm_http_error(e, "Section generation")
+    return sse_response(chunks)
+
+
+def _run_concurrently(fn, items: list, width: int) -> list:
+    width = max(1, min(width, len(items)))
+    if width == 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=width, thread_name_prefix="section-gen") as pool:
+        return list(pool.map(fn, items))
+
+
+def generate_sections_content(
+    topic: str,
+    section_titles: List[str],
+    project_type: str,
+    max_workers: Optional[int] = None,
+    bypass_cache: bool = False,
+    batch_size: Optional[int] = None,
+    owner_id: Optional[int] = None,
+) -> List[SectionContent]:
+    """
+    Generates content for several sections concurrently.
+    Sections whose title `owner_id` generated before under a near-duplicate
+    topic reuse that text unless `bypass_cache` is set. The rest are requested
+    `batch_size` (default SECTION_BATCH_SIZE) at a time in single JSON
+    calls; any section a batch leaves missing or malformed falls back to
+    its own call. At most `max_workers` Gemini calls are in flight at
+    once; the returned list is in the same order as `section_titles`.
+    Raises LLMOverloadedError if the scheduler sheds any of the calls.
+    """
+    if not section_titles:
+        return []
+    width = max_workers or SECTION_GENERATION_CONCURRENCY
+    batch_size = SECTION_BATCH_SIZE if batch_size is None else batch_size
+
+    results: List[Optional[SectionContent]] = [
+        None if bypass_cache else _reused_section(topic, title, project_type, owner_id)
+        for title in section_titles
+    ]
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    if batch_size > 1 and len(pending) > 1:
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        batch_bodies = _run_concurrently(
+            lambda batch: generate_section_batch(
+                topic, [section_titles[i] for i in batch], project_type, bypass_cache, owner_id
+            ),
+            batches,
+            width,
+        )
+        for batch, bodies in zip(batches, batch_bodies):
+            for i, body in zip(batch, bodies):
+                if body is not None:
+                    results[i] = SectionContent(body)
+        missing = [i for i in pending if results[i] is None]
+        if missing:
+            print(f"⚠️ Batched generation left {len(missing)} of {len(pending)} sections unusable; "
+                  f"generating them one by one")
+        pending = missing
+
+    fresh = _run_concurrently(
+        lambda i: _fresh_section(topic, section_titles[i], project_type, bypass_cache, owner_id),
+        pending,
+        width,
+    )
+    for i, content in zip(pending, fresh):
+        results[i] = content
+    return results
+
+
+# ==========================
+# 🔄 REFINEMENT ENDPOINT
+# ==========================
+def build_refine_prompt(prompt: str, content: str) -> str:
+    return f"""
         You are an advanced language editor.
 
         User instruction:
@@ -129,8 +459,83 @@ def refine_section(data: dict):
         {content}
         ---CONTENT END---
         """
-        refined_text = generate_with_gemini(refine_prompt) or content
+
+
+def _parse_refine_request(data: dict):
+    section_id = data.get("section_id")
+    prompt = data.get("prompt")
+    content = data.get("content", "")
+
+    if section_id is None or not prompt:
+        raise HTTPException(status_code=400, detail="Missing section_id or prompt")
+
+    if not content:
+        content = "(No existing content – generate fresh content based on the prompt.)"
+    return prompt, content, bool(data.get("use_cache", False))
+
+
+@router.post("/refine")
+def refine_section(data: dict):
+    prompt, content, use_cache = _parse_refine_request(data)
+
+    try:
+        refine_prompt = build_refine_prompt(prompt, content)
+        refined_text = generate_with_gemini(
+            refine_prompt, use_cache=use_cache, priority=Priority.INTERACTIVE, call_site="refine"
+        ) or content
         return {"content": refined_text.strip()}
+    except LLMError as e:
+        print("Refine error:", e)
+        raise llm_http_error(e, "Refine")
     except Exception as e:
         print("Refine error:", e)
         raise HTTPException(status_code=500, detail=f"Refine failed: {e}")
+
+
+@router.post("/refine/stream")
+def refine_section_stream(data: dict):
+    """Streaming variant of /refine: tokens are sent as server-sent events."""
+    prompt, content, use_cache = _parse_refine_request(data)
+    try:
+        chunks = stream_with_gemini(
+            build_refine_prompt(prompt, content), use_cache=use_cache, priority=Priority.INTERACTIVE,
+            call_site="refine_stream",
+        )
+    except LLMError as e:
+        raise llm_http_error(e, "Refine")
+    return sse_response(chunks)
+
+
+# ==========================
+# 📊 CACHE STATS
+# ==========================
+@router.get("/cache/stats")
+def cache_stats():
+    cache = llm_cache.get_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/near-duplicates/stats")
+def near_duplicate_stats():
+    """Outlines and sections served from a near-duplicate topic instead of the LLM."""
+    index = near_duplicates.get_index()
+    if index is None:
+        return {"enabled": False}
+    return {"enabled": True, **index.stats()}
+
+
+@router.get("/singleflight/stats")
+def coalescing_stats():
+    """How many LLM calls were served by joining an identical in-flight request."""
+    return singleflight_stats()
+
+
+@router.get("/scheduler/stats")
+def scheduler_stats():
+    """Queue depth, wait-time percentiles and shed counts per priority class."""
+    scheduler = llm_scheduler.get_scheduler()
+    if scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.stats()}
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from .. import database, models, schemas, auth
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/{job_id}", response_model=schemas.JobResponse)
+def get_job(
+    job_id: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    job = (
+        db.query(models.GenerationJob)
+        .filter(
+            models.GenerationJob.id == job_id,
+            models.GenerationJob.owner_id == current_user.id,
+        )
+        .first()
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    items = sorted(job.items, key=lambda i: i.section.order_index)
+    sections = [
+        schemas.JobSectionStatus(
+            section_id=item.section_id,
+            order_index=item.section.order_index,
+            title=item.section.title,
+            status=item.status,
+            # Partial results: content is exposed as soon as a section finishes
+            content=item.section.content if item.status in ("done", "skipped", "failed") else None,
+            error=item.error,
+        )
+        for item in items
+    ]
+    finished = job.completed + job.failed
+    return schemas.JobResponse(
+        id=job.id,
+        project_id=job.project_id,
+        status=job.status,
+        total=job.total,
+        completed=job.completed,
+        failed=job.failed,
+        progress=finished / job.total if job.total else 1.0,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        sections=sections,
+    )
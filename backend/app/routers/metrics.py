@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from .. import llm_cache, llm_scheduler, llm_service, metrics, near_duplicates
+from ..export_cache import export_cache
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _optional_stats(get):
+    def source():
+        component = get()
+        return component.stats() if component is not None else None
+    return source
+
+
+# Existing stats() counters, read at scrape time
+metrics.register_stats("llm_cache", _optional_stats(llm_cache.get_cache))
+metrics.register_stats("llm_scheduler", _optional_stats(llm_scheduler.get_scheduler))
+metrics.register_stats("llm_singleflight", llm_service.singleflight_stats)
+metrics.register_stats("near_duplicates", _optional_stats(near_duplicates.get_index))
+metrics.register_stats("export_cache", export_cache.stats)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Request, database, LLM and export metrics in the Prometheus text format."""
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,41 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from .. import profiling
+
+router = APIRouter(prefix="/profiling", tags=["Profiling"])
+
+
+def require_profiling_token(x_profile: Optional[str] = Header(None)):
+    if not profiling.PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if x_profile is None or not profiling.is_authorized(x_profile.encode()):
+        raise HTTPException(status_code=403, detail="Missing or wrong X-Profile token")
+
+
+@router.get("/", response_model=List[dict], dependencies=[Depends(require_profiling_token)])
+def list_profiles():
+    """Stored request profiles (on-demand and slow requests), newest first, without their stacks."""
+    return profiling.list_profiles()
+
+
+@router.get("/{profile_id}", dependencies=[Depends(require_profiling_token)])
+def get_profile(
+    profile_id: str,
+    format: Literal["tree", "folded", "json"] = "tree",
+    min_percent: float = Query(0.5, ge=0, le=100),
+):
+    """
+    One stored profile as an indented call tree, as folded stacks (for
+    flamegraph.pl or speedscope) or as the stored JSON.
+    """
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "json":
+        return profile
+    if format == "folded":
+        return PlainTextResponse(profiling.folded(profile))
+    return PlainTextResponse(profiling.call_tree(profile, min_percent))
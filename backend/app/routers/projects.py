@@ -1,69 +1,216 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List
+import base64
+import json
+from datetime import datetime
 
-from .. import database, models, schemas, auth, doc_generator
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Literal, Optional, Tuple, Union
+
+from .. import database, models, schemas, auth, doc_generator, fieldsets, jobs
+from ..llm_service import LLMOverloadedError
 from . import generate as gen_router
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
+# Sparse fieldsets, see app/fieldsets.py
+FIELDS_HELP = "Comma-separated fields to return, e.g. id,title,sections.id,sections.title"
+EXCLUDE_HELP = "Comma-separated fields to leave out, e.g. sections.content,sections.comment"
+
 
-@router.post("/", response_model=schemas.ProjectResponse)
+@router.post(
+    "/",
+    response_model=schemas.ProjectResponse,
+    responses={202: {"model": schemas.JobCreatedResponse}},
+)
 def create_project(
     project: schemas.ProjectCreate,
+    background: bool = False,
+    fields: Optional[str] = Query(None, description=FIELDS_HELP),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_HELP),
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    db_project = models.Project(
-        title=project.title,
-        project_type=project.project_type,
-        owner_id=current_user.id,
-    )
+    """
+    Creates a project and generates its sections.
+    With `?background=true` the project is saved with empty sections and a
+    generation job id is returned immediately (202); poll GET /jobs/{id}.
+    """
+    # Checked before generating, so a typo fails fast
+    include, omit = fieldsets.fieldset(schemas.ProjectResponse, fields, exclude)
+    section_titles = [sec.title for sec in project.sections or []]
+    if background and section_titles:
+        return _create_project_job(project, section_titles, db, current_user)
+
+    # Generate all section bodies up front so the project and its sections
+    # are written in a single commit.
+    try:
+        contents = gen_router.generate_sections_content(
+            project.title,
+            section_titles,
+            project.project_type,
+            bypass_cache=project.bypass_cache,
+            owner_id=current_user.id,
+        )
+    except LLMOverloadedError as e:
+        raise gen_router.llm_http_error(e, "Project generation")
+
+    db_project = _new_project(project, section_titles, [c.text for c in contents], current_user)
     db.add(db_project)
     db.commit()
     db.refresh(db_project)
 
-    if project.sections:
-        for idx, sec in enumerate(project.sections):
-            content_text = gen_router.generate_document_content(
-                project.title,
-                sec.title,
-                project.project_type,
-            )
-            section_row = models.DocumentSection(
-                project_id=db_project.id,
+    db_project.reused_sections = [
+        {"order_index": idx, **c.reuse} for idx, c in enumerate(contents) if c.reuse
+    ]
+    return fieldsets.json_response(schemas.ProjectResponse, db_project, include, omit)
+
+
+def _new_project(project: schemas.ProjectCreate, section_titles: List[str],
+                 contents: List[str], owner: models.User) -> models.Project:
+    db_project = models.Project(
+        title=project.title,
+        project_type=project.project_type,
+        owner_id=owner.id,
+    )
+    for idx, (title, content_text) in enumerate(zip(section_titles, contents)):
+        db_project.sections.append(
+            models.DocumentSection(
                 order_index=idx,
-                title=sec.title,
+                title=title,
                 content=content_text,
             )
-            db.add(section_row)
-        db.commit()
-        db.refresh(db_project)
-
+        )
     return db_project
 
 
-@router.get("/", response_model=List[schemas.ProjectResponse])
+def _create_project_job(project: schemas.ProjectCreate, section_titles: List[str],
+                        db: Session, current_user: models.User) -> JSONResponse:
+    db_project = _new_project(project, section_titles, [""] * len(section_titles), current_user)
+    db.add(db_project)
+    job = jobs.create_job(db, db_project, bypass_cache=project.bypass_cache)
+    db.commit()
+    jobs.submit_job(job.id)
+
+    body = schemas.JobCreatedResponse(job_id=job.id, project_id=db_project.id, status=job.status)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=body.model_dump(),
+        headers={"Location": f"/jobs/{job.id}"},
+    )
+
+
+# ======================================
+# Listing (keyset pagination, newest first)
+# ======================================
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _encode_cursor(project: models.Project) -> str:
+    raw = json.dumps([project.created_at.isoformat(), project.id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, project_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(project_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/", response_model=Union[schemas.ProjectSummaryPage, schemas.ProjectPage])
 def list_projects(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    view: Literal["summary", "full"] = "summary",
+    fields: Optional[str] = Query(None, description=FIELDS_HELP + " (per item)"),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_HELP + " (per item)"),
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    return (
-        db.query(models.Project)
-        .filter(models.Project.owner_id == current_user.id)
-        .all()
+    """
+    Pages through the user's projects, newest first. The default summary
+    view carries a section count instead of section content; `view=full`
+    includes sections, loaded for the whole page in one extra query.
+    `fields` / `exclude` apply to each item.
+    """
+    item_cls = schemas.ProjectSummary if view == "summary" else schemas.ProjectResponse
+    include, omit = fieldsets.fieldset(item_cls, fields, exclude)
+    Project = models.Project
+    newest_first = (Project.created_at.desc(), Project.id.desc())
+
+    # Keys of this page plus one row, which tells us whether there is a next page
+    page = db.query(Project.id).filter(Project.owner_id == current_user.id)
+    if cursor:
+        created_at, project_id = _decode_cursor(cursor)
+        page = page.filter(
+            or_(
+                Project.created_at < created_at,
+                and_(Project.created_at == created_at, Project.id < project_id),
+            )
+        )
+    page = page.order_by(*newest_first).limit(limit + 1).subquery()
+
+    if view == "summary":
+        # Counted for the page's rows only, in the same statement
+        section_count = (
+            select(func.count(models.DocumentSection.id))
+            .where(models.DocumentSection.project_id == Project.id)
+            .correlate(Project)
+            .scalar_subquery()
+        )
+        query = db.query(Project, section_count.label("section_count"))
+    else:
+        query = db.query(Project).options(selectinload(Project.sections))
+    rows = query.join(page, Project.id == page.c.id).order_by(*newest_first).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if view == "summary":
+        projects = [project for project, _ in rows]
+        items = [
+            schemas.ProjectSummary(
+                id=project.id,
+                title=project.title,
+                project_type=project.project_type,
+                created_at=project.created_at,
+                owner_id=project.owner_id,
+                section_count=count,
+            )
+            for project, count in rows
+        ]
+        page_cls = schemas.ProjectSummaryPage
+    else:
+        projects = items = rows
+        for project in projects:
+            project.sections.sort(key=lambda s: s.order_index)
+        page_cls = schemas.ProjectPage
+
+    next_cursor = _encode_cursor(projects[-1]) if has_more else None
+    return fieldsets.json_response(
+        page_cls,
+        page_cls(items=items, next_cursor=next_cursor),
+        include=fieldsets.for_items(include, keep=("next_cursor",)),
+        exclude=fieldsets.for_items(omit),
     )
 
 
 @router.get("/{project_id}", response_model=schemas.ProjectResponse)
 def get_project(
     project_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_HELP),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_HELP),
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
+    include, omit = fieldsets.fieldset(schemas.ProjectResponse, fields, exclude)
     project = (
         db.query(models.Project)
+        .options(selectinload(models.Project.sections))
         .filter(
             models.Project.id == project_id,
             models.Project.owner_id == current_user.id,
@@ -73,12 +220,13 @@ def get_project(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     project.sections.sort(key=lambda s: s.order_index)
-    return project
+    return fieldsets.json_response(schemas.ProjectResponse, project, include, omit)
 
 
 @router.get("/{project_id}/export")
 def export_project(
     project_id: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
@@ -92,9 +240,22 @@ def export_project(
     )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+
+    streamed = doc_generator.should_stream(db, project)
+    etag = doc_generator.stream_etag(db, project) if streamed else doc_generator.project_etag(project)
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers={"ETag": etag})
+
     try:
-        buf, media_type, filename = doc_generator.generate_document_file(project)
+        if streamed:
+            body, media_type, filename = doc_generator.stream_document_file(project)
+        else:
+            body, media_type, filename = doc_generator.generate_document_file(project, etag=etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return StreamingResponse(buf, media_type=media_type, headers=headers)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+    }
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -1,56 +1,239 @@
+import os
+import re
+from typing import List, Optional, Tuple
+
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from datetime import datetime
 
-from .. import database, models, schemas, auth
-from ..llm_service import generate_with_gemini
+from .. import database, models, schemas, auth, revisions
+from ..llm_scheduler import Priority
+from ..llm_service import LLMError, generate_with_gemini, stream_with_gemini
+from ..streaming import sse_response
+from .generate import llm_http_error
 
 router = APIRouter(prefix="/section", tags=["Refine & Feedback"])
 
+# Characters of surrounding text sent with a span refine, on each side
+SPAN_REFINE_CONTEXT_CHARS = int(os.getenv("SPAN_REFINE_CONTEXT_CHARS", "400"))
+
 
 # ===============================
 # 1️⃣  AI Refinement Endpoint
 # ===============================
-@router.post("/{section_id}/refine")
-def refine_section(
-    section_id: int,
-    refine_data: schemas.RefineRequest,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user),
-):
-    # Fetch the section
+def _get_owned_section(db: Session, section_id: int, user: models.User) -> models.DocumentSection:
     section = (
         db.query(models.DocumentSection)
         .join(models.Project)
         .filter(
             models.DocumentSection.id == section_id,
-            models.Project.owner_id == current_user.id,
+            models.Project.owner_id == user.id,
         )
         .first()
     )
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
+    return section
 
-    # Generate refined content using Gemini
-    prompt = (
+
+def _commit_revision(db: Session) -> None:
+    try:
+        db.commit()
+    except (IntegrityError, StaleDataError):
+        # Another change was saved since the section was loaded (a newer
+        # content_version, or the same revision number claimed first)
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Section was changed concurrently; please retry")
+
+
+def _check_version(section: models.DocumentSection, expected_version: Optional[int]) -> None:
+    if expected_version is not None and section.content_version != expected_version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Section has changed (now version {section.content_version}); reload and retry",
+        )
+
+
+def build_section_refine_prompt(instruction: str, content: str) -> str:
+    return (
         f"Refine this section based on the instruction below.\n\n"
         f"---\n"
-        f"Instruction: {refine_data.prompt}\n\n"
-        f"Original Content:\n{section.content}\n\n"
+        f"Instruction: {instruction}\n\n"
+        f"Original Content:\n{content}\n\n"
         f"Return only the improved content with same meaning and flow."
     )
+
+
+@router.post("/{section_id}/refine")
+def refine_section(
+    section_id: int,
+    refine_data: schemas.RefineRequest,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    # Fetch the section
+    section = _get_owned_section(db, section_id, current_user)
+    _check_version(section, refine_data.expected_version)
+
+    # Generate refined content using Gemini
+    prompt = build_section_refine_prompt(refine_data.prompt, section.content)
     try:
-        new_content = generate_with_gemini(prompt)
+        new_content = generate_with_gemini(
+            prompt, use_cache=refine_data.use_cache, priority=Priority.INTERACTIVE, call_site="refine"
+        )
+    except LLMError as e:
+        raise llm_http_error(e, "Gemini refinement")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gemini refinement failed: {str(e)}")
 
-    # Save refined content
-    section.content = new_content
+    # Save refined content (the previous text stays in the revision history)
+    revisions.update_content(db, section, new_content, "refine", current_user.id)
     section.last_refined_at = datetime.utcnow()
-    db.commit()
+    _commit_revision(db)
     db.refresh(section)
 
-    return {"message": "Refined successfully", "content": new_content}
+    return {"message": "Refined successfully", "content": new_content,
+            "content_version": section.content_version}
+
+
+@router.post("/{section_id}/refine/stream")
+def refine_section_stream(
+    section_id: int,
+    refine_data: schemas.RefineRequest,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """
+    Streaming variant of /refine. The refined text is saved only once the
+    stream has completed cleanly; an interrupted stream leaves the section
+    untouched. If the section was changed (or deleted) while the text was
+    being generated, nothing is saved and the stream ends with an `error`
+    event carrying status 409 (or 404).
+    """
+    section = _get_owned_section(db, section_id, current_user)
+    _check_version(section, refine_data.expected_version)
+    # The version the refined text is based on, compared again when saving
+    base_version = section.content_version
+    prompt = build_section_refine_prompt(refine_data.prompt, section.content)
+    user_id = current_user.id
+
+    def persist(new_content: str) -> dict:
+        # The request-scoped session may already be closed once streaming
+        # finishes, so the write uses its own session.
+        session = database.SessionLocal()
+        try:
+            row = session.get(models.DocumentSection, section_id)
+            if row is None:
+                raise HTTPException(status_code=404, detail="Section was deleted while refining")
+            _check_version(row, base_version)
+            revisions.update_content(session, row, new_content, "refine", user_id)
+            row.last_refined_at = datetime.utcnow()
+            _commit_revision(session)
+            version = row.content_version
+        finally:
+            session.close()
+        return {"message": "Refined successfully", "section_id": section_id, "content_version": version}
+
+    try:
+        chunks = stream_with_gemini(
+            prompt, use_cache=refine_data.use_cache, priority=Priority.INTERACTIVE, call_site="refine_stream"
+        )
+    except LLMError as e:
+        raise llm_http_error(e, "Gemini refinement")
+    return sse_response(chunks, on_complete=persist)
+
+
+# ===============================
+# ✂️  Span Refinement Endpoint
+# ===============================
+_PARAGRAPH_RE = re.compile(r"[^\n]*\S[^\n]*")
+
+
+def _span_bounds(content: str, data: schemas.SpanRefineRequest) -> Tuple[int, int]:
+    """Character range [start, end) of the requested span; 400 when out of range."""
+    if data.unit == "paragraph":
+        paragraphs = [m.span() for m in _PARAGRAPH_RE.finditer(content)]
+        if not 0 <= data.start < data.end <= len(paragraphs):
+            raise HTTPException(status_code=400, detail=f"Paragraph range must be within 0..{len(paragraphs)}")
+        return paragraphs[data.start][0], paragraphs[data.end - 1][1]
+    if not 0 <= data.start < data.end <= len(content) or not content[data.start:data.end].strip():
+        raise HTTPException(status_code=400, detail=f"Character range must select text within 0..{len(content)}")
+    return data.start, data.end
+
+
+def _context(content: str, start: int, end: int) -> Tuple[str, str]:
+    """Up to SPAN_REFINE_CONTEXT_CHARS on each side, cut at word boundaries."""
+    before = content[max(0, start - SPAN_REFINE_CONTEXT_CHARS):start]
+    if start > SPAN_REFINE_CONTEXT_CHARS:
+        before = before.split(None, 1)[-1] if " " in before else ""
+    after = content[end:end + SPAN_REFINE_CONTEXT_CHARS]
+    if end + SPAN_REFINE_CONTEXT_CHARS < len(content):
+        after = after.rsplit(None, 1)[0] if " " in after else ""
+    return before, after
+
+
+def build_span_refine_prompt(instruction: str, before: str, passage: str, after: str) -> str:
+    return (
+        f"Rewrite only the PASSAGE below according to the instruction. The text\n"
+        f"around it is context: do not repeat, continue or change it.\n\n"
+        f"---\n"
+        f"Instruction: {instruction}\n\n"
+        f"Context before:\n{before.strip() or '(start of section)'}\n\n"
+        f"PASSAGE:\n{passage.strip()}\n\n"
+        f"Context after:\n{after.strip() or '(end of section)'}\n\n"
+        f"Return only the rewritten passage, keeping its format (paragraphs or bullets)\n"
+        f"so that it flows into the surrounding text."
+    )
+
+
+@router.post("/{section_id}/refine/span", response_model=schemas.SpanRefineResponse)
+def refine_section_span(
+    section_id: int,
+    data: schemas.SpanRefineRequest,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """
+    Refines part of a section: only the selected range and a bounded
+    window of context go to the model, and the result is spliced back.
+    `expected_version` is the content_version the range was taken from;
+    if the section has changed since (before or during the model call)
+    nothing is saved and 409 is returned.
+    """
+    section = _get_owned_section(db, section_id, current_user)
+    _check_version(section, data.expected_version)
+
+    content = section.content or ""
+    start, end = _span_bounds(content, data)
+    before, after = _context(content, start, end)
+    passage = content[start:end]
+    prompt = build_span_refine_prompt(data.prompt, before, passage, after)
+    try:
+        refined = generate_with_gemini(
+            prompt, use_cache=data.use_cache, priority=Priority.INTERACTIVE, call_site="refine_span"
+        )
+    except LLMError as e:
+        raise llm_http_error(e, "Gemini refinement")
+
+    # Keep the whitespace that separated the span from its neighbours
+    leading = passage[:len(passage) - len(passage.lstrip())]
+    trailing = passage[len(passage.rstrip()):]
+    replacement = leading + refined.strip() + trailing
+    new_content = content[:start] + replacement + content[end:]
+
+    revisions.update_content(db, section, new_content, "refine_span", current_user.id)
+    section.last_refined_at = datetime.utcnow()
+    _commit_revision(db)
+
+    return {
+        "message": "Refined successfully",
+        "content": new_content,
+        "content_version": section.content_version,
+        "span_start": start,
+        "span_end": start + len(replacement),
+    }
 
 
 # ===============================
@@ -63,25 +246,67 @@ def section_feedback(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    section = (
-        db.query(models.DocumentSection)
-        .join(models.Project)
-        .filter(
-            models.DocumentSection.id == section_id,
-            models.Project.owner_id == current_user.id,
-        )
-        .first()
-    )
-    if not section:
-        raise HTTPException(status_code=404, detail="Section not found")
+    section = _get_owned_section(db, section_id, current_user)
 
-    # Update like/dislike/comment if provided
+    # Update like/dislike/comment if provided. Written as a bulk UPDATE,
+    # which skips the content_version check: feedback neither depends on
+    # nor changes the content, so a refine or restore committed since the
+    # section was loaded must not fail it.
+    values = {models.DocumentSection.last_refined_at: datetime.utcnow()}
     if feedback.is_liked is not None:
-        section.is_liked = feedback.is_liked
+        values[models.DocumentSection.is_liked] = feedback.is_liked
     if feedback.comment is not None:
-        section.comment = feedback.comment
-    section.last_refined_at = datetime.utcnow()
-
+        values[models.DocumentSection.comment] = feedback.comment
+    db.query(models.DocumentSection).filter(models.DocumentSection.id == section.id).update(
+        values, synchronize_session=False
+    )
     db.commit()
-    db.refresh(section)
     return {"message": "Feedback saved", "section_id": section.id}
+
+
+# ===============================
+# 3️⃣  Revision History Endpoints
+# ===============================
+@router.get("/{section_id}/revisions", response_model=List[schemas.SectionRevisionInfo])
+def list_section_revisions(
+    section_id: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    _get_owned_section(db, section_id, current_user)
+    return [schemas.SectionRevisionInfo(**row._asdict()) for row in revisions.list_revisions(db, section_id)]
+
+
+def _get_revision_content(db: Session, section_id: int, revision: int) -> str:
+    content = revisions.get_revision_content(db, section_id, revision)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return content
+
+
+@router.get("/{section_id}/revisions/{revision}", response_model=schemas.SectionRevisionResponse)
+def get_section_revision(
+    section_id: int,
+    revision: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    _get_owned_section(db, section_id, current_user)
+    content = _get_revision_content(db, section_id, revision)
+    return {"section_id": section_id, "revision": revision, "content": content}
+
+
+@router.post("/{section_id}/revisions/{revision}/restore", response_model=schemas.SectionRevisionResponse)
+def restore_section_revision(
+    section_id: int,
+    revision: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """Makes an earlier revision current again, as a new revision."""
+    section = _get_owned_section(db, section_id, current_user)
+    content = _get_revision_content(db, section_id, revision)
+    row = revisions.update_content(db, section, content, "restore", current_user.id)
+    section.last_refined_at = datetime.utcnow()
+    _commit_revision(db)
+    return {"section_id": section_id, "revision": row.revision, "content": content}
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from .. import database, models, schemas, auth, search
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Ranked results are paged by offset; deep pages cost as much as all before them
+MAX_OFFSET = 1000
+
+
+@router.get("/", response_model=schemas.SearchPage)
+def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_OFFSET),
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """Searches the current user's project titles, section titles and section content."""
+    hits = search.search_sections(db, current_user.id, q, limit + 1, offset)
+    next_offset = offset + limit if len(hits) > limit else None
+    return {"items": hits[:limit], "next_offset": next_offset}
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr
 
 
@@ -53,6 +53,7 @@ class SectionResponse(BaseModel):
     title: str
     order_index: int
     content: str
+    content_version: int  # send back as expected_version for span refines
     is_liked: Optional[bool]
     comment: Optional[str]
 
@@ -70,6 +71,13 @@ class ProjectBase(BaseModel):
 
 class ProjectCreate(ProjectBase):
     sections: Optional[List[SectionCreate]] = None
+    bypass_cache: bool = False  # force fresh generation instead of cached content
+
+
+class SectionReuse(BaseModel):
+    order_index: int
+    similarity: float
+    matched_topic: str
 
 
 class ProjectResponse(ProjectBase):
@@ -77,11 +85,88 @@ class ProjectResponse(ProjectBase):
     created_at: datetime
     owner_id: int
     sections: List[SectionResponse]
+    # Only on creation: sections taken from a project with a near-duplicate
+    # topic instead of being generated (create with bypass_cache to avoid)
+    reused_sections: Optional[List[SectionReuse]] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Listing entry without section content
+class ProjectSummary(ProjectBase):
+    id: int
+    created_at: datetime
+    owner_id: int
+    section_count: int
 
     class Config:
         from_attributes = True
 
 
+class ProjectSummaryPage(BaseModel):
+    items: List[ProjectSummary]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
+
+class ProjectPage(BaseModel):
+    items: List[ProjectResponse]
+    next_cursor: Optional[str] = None
+
+
+class SearchHit(BaseModel):
+    section_id: int
+    section_title: str
+    project_id: int
+    project_title: str
+    project_type: str
+    snippet: str        # HTML: escaped section text, matches wrapped in <mark>…</mark>
+    score: float        # higher is better
+
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_offset: Optional[int] = None  # pass back as ?offset= for the next page
+
+
+class BulkExportRequest(BaseModel):
+    # Explicit ids, or leave empty to select by the filters below
+    project_ids: Optional[List[int]] = None
+    project_type: Optional[str] = None     # "docx" or "pptx"
+    title_contains: Optional[str] = None
+
+
+# =======================
+# Background Job Schemas
+# =======================
+class JobCreatedResponse(BaseModel):
+    job_id: int
+    project_id: int
+    status: str
+
+
+class JobSectionStatus(BaseModel):
+    section_id: int
+    order_index: int
+    title: str
+    status: str  # pending | running | done | skipped | failed
+    content: Optional[str] = None
+    error: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    id: int
+    project_id: int
+    status: str  # queued | running | completed | failed
+    total: int
+    completed: int
+    failed: int
+    progress: float
+    created_at: datetime
+    updated_at: Optional[datetime]
+    sections: List[JobSectionStatus]
+
+
 # =======================
 # Content Generation Schemas
 # =======================
@@ -102,6 +187,28 @@ class GenerateResponse(BaseModel):
 class RefineRequest(BaseModel):
     section_id: int
     prompt: str
+    use_cache: bool = False  # opt in to the prompt→completion cache
+    # content_version the refine is based on; when omitted, the version
+    # read at the start of the request
+    expected_version: Optional[int] = None
+
+
+class SpanRefineRequest(BaseModel):
+    prompt: str
+    expected_version: int  # content_version the range refers to
+    # [start, end) in characters, or in paragraphs (non-empty lines)
+    unit: Literal["char", "paragraph"] = "char"
+    start: int
+    end: int
+    use_cache: bool = False
+
+
+class SpanRefineResponse(BaseModel):
+    message: str
+    content: str
+    content_version: int
+    span_start: int     # character range of the rewritten text in `content`
+    span_end: int
 
 
 class FeedbackRequest(BaseModel):
@@ -124,6 +231,25 @@ class FeedbackResponse(BaseModel):
         from_attributes = True
 
 
+# =======================
+# Section Revision Schemas
+# =======================
+class SectionRevisionInfo(BaseModel):
+    revision: int
+    source: str
+    is_snapshot: bool
+    content_length: int
+    stored_bytes: int
+    author_id: Optional[int] = None
+    created_at: datetime
+
+
+class SectionRevisionResponse(BaseModel):
+    section_id: int
+    revision: int
+    content: str
+
+
 # =======================
 # Export Schema
 # =======================
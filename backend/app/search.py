@@ -0,0 +1,113 @@
+# backend/app/search.py
+
+"""
+Ranked full-text search over a user's project titles, section titles and
+section content. The index is created by migration 4: an FTS5 table on
+SQLite, GIN expression indexes on Postgres. Snippets are HTML: the
+section text is escaped and matched terms are wrapped in <mark>…</mark>,
+so a client can render them as markup.
+"""
+
+import html
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+SNIPPET_TOKENS = 24
+MAX_QUERY_TERMS = 16
+# Shorter prefixes expand to so many terms that one query scores most of the index
+MIN_PREFIX_LENGTH = 3
+
+_TERM_RE = re.compile(r"(\w+)(\*?)", re.UNICODE)
+
+# The database marks matches with these private-use characters; the text
+# is escaped before they become tags (render_snippet)
+_MATCH_START = "\ue000"
+_MATCH_END = "\ue001"
+_MATCH_SPLIT_RE = re.compile(f"([{_MATCH_START}{_MATCH_END}])")
+
+
+def _fts5_query(user_id: int, query: str) -> str:
+    # Quote every term so user input is never parsed as FTS5 syntax; a
+    # trailing * (e.g. "turb*") is kept as a prefix search
+    phrases = []
+    for term, star in _TERM_RE.findall(query)[:MAX_QUERY_TERMS]:
+        prefix = "*" if star and len(term) >= MIN_PREFIX_LENGTH else ""
+        phrases.append(f'"{term}"{prefix}')
+    if not phrases:
+        return ""
+    return f'owner:"u{user_id}" AND ({" ".join(phrases)})'
+
+
+_SQLITE_SEARCH = text(f"""
+    SELECT hit.section_id, hit.section_title, hit.project_id, hit.project_title,
+           p.project_type, hit.snippet, -hit.rank AS score
+    FROM (
+        SELECT rowid AS section_id, section_title, project_id, project_title, rank,
+               snippet(search_index, 3, '{_MATCH_START}', '{_MATCH_END}', '…', {SNIPPET_TOKENS}) AS snippet
+        FROM search_index
+        WHERE search_index MATCH :match
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    ) AS hit
+    JOIN projects p ON p.id = hit.project_id
+    ORDER BY hit.rank
+""")
+
+# The tsvector expressions must match the indexes from migration 4
+_SECTION_VECTOR = (
+    "(setweight(to_tsvector('english', coalesce(s.title, '')), 'B')"
+    " || setweight(to_tsvector('english', coalesce(s.content, '')), 'C'))"
+)
+_PROJECT_VECTOR = "(setweight(to_tsvector('english', coalesce(p.title, '')), 'A'))"
+
+_POSTGRES_SEARCH = text(f"""
+    SELECT s.id AS section_id, s.title AS section_title, p.id AS project_id,
+           p.title AS project_title, p.project_type,
+           ts_headline('english', coalesce(s.content, ''), q,
+                       'StartSel={_MATCH_START}, StopSel={_MATCH_END}, MaxFragments=1, MinWords=8, MaxWords={SNIPPET_TOKENS}') AS snippet,
+           ts_rank({_SECTION_VECTOR}, q) + ts_rank({_PROJECT_VECTOR}, q) AS score
+    FROM document_sections s
+    JOIN projects p ON p.id = s.project_id
+    CROSS JOIN websearch_to_tsquery('english', :query) AS q
+    WHERE p.owner_id = :user_id
+      AND ({_SECTION_VECTOR} @@ q OR {_PROJECT_VECTOR} @@ q)
+    ORDER BY score DESC, s.id
+    LIMIT :limit OFFSET :offset
+""")
+
+
+def render_snippet(raw: str) -> str:
+    """HTML-escapes a marked snippet and turns its match markers into balanced <mark> tags."""
+    parts = []
+    inside = False
+    for part in _MATCH_SPLIT_RE.split(raw or ""):
+        if part == _MATCH_START:
+            if not inside:
+                parts.append("<mark>")
+                inside = True
+        elif part == _MATCH_END:
+            if inside:
+                parts.append("</mark>")
+                inside = False
+        else:
+            parts.append(html.escape(part))
+    if inside:
+        parts.append("</mark>")
+    return "".join(parts)
+
+
+def search_sections(db: Session, user_id: int, query: str, limit: int, offset: int = 0) -> List[dict]:
+    """Best matches first; one hit per section."""
+    if db.get_bind().dialect.name == "sqlite":
+        match = _fts5_query(user_id, query)
+        if not match:
+            return []
+        rows = db.execute(_SQLITE_SEARCH, {"match": match, "limit": limit, "offset": offset})
+    else:
+        if not _TERM_RE.search(query):
+            return []
+        rows = db.execute(_POSTGRES_SEARCH, {"query": query, "user_id": user_id, "limit": limit, "offset": offset})
+    return [{**row._mapping, "snippet": render_snippet(row.snippet)} for row in rows]
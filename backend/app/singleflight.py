@@ -0,0 +1,61 @@
+# backend/app/singleflight.py
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller (leader)
+    runs the function, every caller that arrives while it is in flight
+    waits for the same result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self._leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result=None, error: BaseException = None) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Runs `fn` once per key across concurrent threads."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._in_flight),
+            }
@@ -0,0 +1,54 @@
+# backend/app/streaming.py
+
+import json
+from typing import Callable, Iterable, Iterator, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from .llm_service import LLMError
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Formats one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_events(chunks: Iterable[str],
+                on_complete: Optional[Callable[[str], Optional[dict]]]) -> Iterator[str]:
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield sse_event("token", {"text": chunk})
+        content = "".join(parts).strip()
+        extra = on_complete(content) if on_complete else None
+    except LLMError as e:
+        print(f"❌ Streaming generation error: {e}")
+        yield sse_event("error", {"detail": str(e), "partial": "".join(parts)})
+        return
+    except HTTPException as e:
+        # Raised by on_complete, e.g. 409 when the result can no longer be saved
+        yield sse_event("error", {"detail": e.detail, "status_code": e.status_code, "partial": "".join(parts)})
+        return
+    except Exception as e:
+        print(f"❌ Streaming error: {e}")
+        yield sse_event("error", {"detail": "Streaming failed", "partial": "".join(parts)})
+        return
+    yield sse_event("done", {"content": content, **(extra or {})})
+
+
+def sse_response(chunks: Iterable[str],
+                 on_complete: Optional[Callable[[str], Optional[dict]]] = None) -> StreamingResponse:
+    """
+    Streams LLM chunks to the client as `token` events, then a final `done`
+    event with the full text. `on_complete` runs only after the stream has
+    finished cleanly (e.g. to persist the result); a failure at any point
+    ends the stream with an `error` event instead. An HTTPException from
+    `on_complete` keeps its detail and status code in that event.
+    """
+    return StreamingResponse(
+        _sse_events(chunks, on_complete),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
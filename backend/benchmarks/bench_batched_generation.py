@@ -0,0 +1,90 @@
+# backend/benchmarks/bench_batched_generation.py
+
+"""
+LLM calls and end-to-end latency of project section generation with one
+call per section against batched JSON calls (SECTION_BATCH_SIZE sections
+each), on the stub backend with a fixed per-call latency plus a decode
+time proportional to output length:
+
+  * one 12-section document on its own
+  * 8 documents created at once, sharing 4 LLM slots (LLM_MAX_CONCURRENCY)
+  * batches whose responses drop or mangle some sections, which then
+    fall back to per-section calls
+
+Run from backend/:
+
+    python -m benchmarks.bench_batched_generation
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["LLM_CACHE_ENABLED"] = "0"
+os.environ["NEAR_DUPLICATE_ENABLED"] = "0"
+
+from app import llm_scheduler, llm_service  # noqa: E402
+from app.routers import generate  # noqa: E402
+
+CALL_LATENCY_SECONDS = 0.4
+SECONDS_PER_1K_CHARS = 0.15
+SECTIONS = [f"Section {i}: aspect {i} of the subject" for i in range(1, 13)]
+
+
+class LossyStub(llm_service.StubBackend):
+    """Drops every 4th section from batched responses and truncates every 5th."""
+
+    @staticmethod
+    def render(prompt: str) -> str:
+        text = llm_service.StubBackend.render(prompt)
+        if llm_service.StubBackend.batch_titles(prompt) is None:
+            return text
+        data = json.loads(text)
+        kept = []
+        for entry in data["sections"]:
+            if entry["index"] % 4 == 0:
+                continue
+            if entry["index"] % 5 == 0:
+                entry["content"] = "too short"
+            kept.append(entry)
+        return json.dumps({"sections": kept})
+
+
+def run(label: str, backend: llm_service.StubBackend, decks: int, concurrency: int, batch_size: int) -> None:
+    llm_service.set_backend(backend)
+    llm_scheduler.set_scheduler(llm_scheduler.LLMScheduler(max_concurrency=concurrency))
+
+    def create(deck: int):
+        return generate.generate_sections_content(
+            f"{label} deck {deck} batch {batch_size}", SECTIONS, "docx", batch_size=batch_size
+        )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=decks) as pool:
+        results = list(pool.map(create, range(decks)))
+    elapsed = time.perf_counter() - start
+    usable = sum(1 for deck in results for section in deck if not section.text.startswith("("))
+    mode = "per-section" if batch_size <= 1 else f"batch of {batch_size}"
+    print(f"  {mode:>12}: {backend.calls:3d} LLM calls  {elapsed:5.2f} s  "
+          f"({usable}/{decks * len(SECTIONS)} sections generated)")
+
+
+def stub(cls=llm_service.StubBackend) -> llm_service.StubBackend:
+    return cls(latency=CALL_LATENCY_SECONDS, seconds_per_1k_chars=SECONDS_PER_1K_CHARS, max_retries=0)
+
+
+if __name__ == "__main__":
+    print(f"stub: {CALL_LATENCY_SECONDS}s per call + {SECONDS_PER_1K_CHARS}s per 1k output chars, "
+          f"{generate.SECTION_GENERATION_CONCURRENCY} calls in parallel per project")
+    scenarios = [
+        ("single document, unlimited LLM slots", 1, 0, stub),
+        ("8 documents, 4 LLM slots", 8, 4, stub),
+        ("single document, lossy batches", 1, 0, lambda: stub(LossyStub)),
+    ]
+    for label, decks, concurrency, make in scenarios:
+        print(f"\n{label}")
+        for batch_size in (1, generate.SECTION_BATCH_SIZE):
+            run(label, make(), decks, concurrency, batch_size)
+    llm_service.set_backend(None)
+    llm_scheduler.set_scheduler(None)
@@ -0,0 +1,54 @@
+# backend/benchmarks/bench_bulk_export.py
+
+"""
+Bulk export throughput by number of worker processes. Renders the same
+set of projects through bulk_export.render_project in a spawned process
+pool of each size. Run from backend/:
+
+    python -m benchmarks.bench_bulk_export
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.bulk_export import SectionRecord, render_project
+
+PROJECTS = 24
+SECTIONS = 40
+PARAGRAPH = "The archive keeps every revision of the report for later review. " * 8
+
+
+def make_projects():
+    projects = []
+    for p in range(PROJECTS):
+        sections = [
+            SectionRecord(i + 1, i, f"Section {i + 1}", "\n\n".join(f"{PARAGRAPH} ({p}.{i}.{n})" for n in range(3)))
+            for i in range(SECTIONS)
+        ]
+        projects.append((f"Project {p}", "docx" if p % 2 else "pptx", sections))
+    return projects
+
+
+def run(workers: int, projects) -> float:
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Start every worker (imports, templates) before timing
+        list(pool.map(render_project, *zip(*projects[:workers])))
+        start = time.perf_counter()
+        for _ in pool.map(render_project, *zip(*projects)):
+            pass
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    projects = make_projects()
+    cores = os.cpu_count() or 1
+    sizes = sorted({1, 2, 4, cores})
+    baseline = None
+    print(f"{PROJECTS} projects x {SECTIONS} sections, {cores} core(s)")
+    for workers in sizes:
+        elapsed = run(workers, projects)
+        baseline = baseline or elapsed
+        print(f"  {workers:2d} worker(s): {elapsed:6.2f} s  "
+              f"{PROJECTS / elapsed:6.1f} projects/s  speedup x{baseline / elapsed:.2f}")
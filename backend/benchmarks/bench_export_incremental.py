@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_export_incremental.py
+
+"""
+Re-export latency after editing one section of a 50-section project.
+
+Compares the full python-docx / python-pptx rebuild with the incremental
+exporter (fragment cache + package assembly). Run from backend/:
+
+    python -m benchmarks.bench_export_incremental
+"""
+
+import statistics
+import time
+from types import SimpleNamespace
+
+from app import doc_generator
+from app.export_cache import export_cache
+
+SECTIONS = 50
+ROUNDS = 10
+
+PARAGRAPH = (
+    "Quarterly revenue grew in every region, driven by renewals and a "
+    "steady increase in average contract value. "
+) * 6
+
+
+def make_project(project_type: str) -> SimpleNamespace:
+    sections = [
+        SimpleNamespace(
+            id=i + 1,
+            order_index=i,
+            title=f"Section {i + 1}",
+            content="\n\n".join(f"{PARAGRAPH} ({i}.{p})" for p in range(4)),
+        )
+        for i in range(SECTIONS)
+    ]
+    return SimpleNamespace(title="Benchmark Project", project_type=project_type, sections=sections)
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench(project_type: str) -> None:
+    project = make_project(project_type)
+    full_build = doc_generator._build_docx if project_type == "docx" else doc_generator._build_pptx
+
+    export_cache.clear()
+    doc_generator.generate_document_file(project)  # warm fragments for every section
+
+    full, incremental, unchanged = [], [], []
+    for r in range(ROUNDS):
+        project.sections[SECTIONS // 2].content += f"\n\nEdit {r}."
+        full.append(timed(lambda: full_build(project)))
+        incremental.append(timed(lambda: doc_generator.generate_document_file(project)))
+        unchanged.append(timed(lambda: doc_generator.generate_document_file(project)))
+
+    print(f"{project_type}: {SECTIONS} sections, 1 edited, median of {ROUNDS}")
+    print(f"  full rebuild        {statistics.median(full):8.2f} ms")
+    print(f"  incremental export  {statistics.median(incremental):8.2f} ms")
+    print(f"  unchanged (cached)  {statistics.median(unchanged):8.2f} ms")
+
+
+if __name__ == "__main__":
+    for ptype in ("docx", "pptx"):
+        bench(ptype)
+    print(export_cache.stats())
@@ -0,0 +1,62 @@
+# backend/benchmarks/bench_export_memory.py
+
+"""
+Peak memory of the streaming exporter against the python-docx /
+python-pptx builders as project size grows. tracemalloc only sees Python
+allocations, so the builders' lxml trees are under-counted. Run from
+backend/:
+
+    python -m benchmarks.bench_export_memory
+"""
+
+import tracemalloc
+from types import SimpleNamespace
+
+from app import doc_generator
+from app.export_cache import export_cache
+
+SIZES = (50, 300, 1000)
+PARAGRAPH = "Findings are summarised per region with the supporting figures. " * 8
+
+
+def sections(count: int):
+    for i in range(count):
+        yield SimpleNamespace(
+            id=i + 1,
+            order_index=i,
+            title=f"Section {i + 1}",
+            content="\n\n".join(f"{PARAGRAPH} ({i}.{p})" for p in range(3)),
+        )
+
+
+def peak_kb(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def stream(project_type: str, count: int) -> None:
+    for _ in doc_generator._iter_package(project_type, "Benchmark", sections(count)):
+        pass
+
+
+def build(project_type: str, count: int) -> None:
+    project = SimpleNamespace(title="Benchmark", project_type=project_type, sections=list(sections(count)))
+    builder = doc_generator._build_docx if project_type == "docx" else doc_generator._build_pptx
+    builder(project)
+
+
+if __name__ == "__main__":
+    # Keep the fragment cache out of the measurement
+    export_cache.fragments.max_bytes = 0
+    for ptype in ("docx", "pptx"):
+        # Load templates and library state before measuring
+        build(ptype, 1)
+        stream(ptype, 1)
+        for count in SIZES:
+            print(f"{ptype} {count:5d} sections: "
+                  f"build peak {peak_kb(lambda: build(ptype, count)):7d} KB, "
+                  f"stream peak {peak_kb(lambda: stream(ptype, count)):6d} KB")
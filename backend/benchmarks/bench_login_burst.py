@@ -0,0 +1,97 @@
+# backend/benchmarks/bench_login_burst.py
+
+"""
+Project read latency during a login burst. Concurrent clients keep
+logging in while one client measures GET /projects/{id}, first with no
+logins, then against a sync login route that hashes inside the request
+threadpool (the previous behaviour), then against the current /token,
+which hashes on the dedicated executor. The request threadpool is capped
+at THREADPOOL_SIZE to stand in for a small server. Run from backend/:
+
+    python -m benchmarks.bench_login_burst
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+os.environ.setdefault("LLM_CACHE_PATH", "")
+
+import anyio  # noqa: E402
+import httpx  # noqa: E402
+from fastapi import Depends, Form, HTTPException  # noqa: E402
+
+from app import database, migrations, models, passwords  # noqa: E402
+from app.main import app  # noqa: E402
+
+THREADPOOL_SIZE = 8
+LOGIN_CLIENTS = 16
+PHASE_SECONDS = 5.0
+EMAIL, PASSWORD = "bench@example.com", "correct horse battery staple"
+
+
+@app.post("/bench/legacy-token")
+def legacy_login(username: str = Form(...), password: str = Form(...),
+                 db=Depends(database.get_db)):
+    user = db.query(models.User).filter(models.User.email == username).first()
+    if not user or not passwords.verify_and_update(password, user.hashed_password)[0]:
+        raise HTTPException(status_code=401)
+    return {"ok": True}
+
+
+async def phase(client: httpx.AsyncClient, headers: dict, project_id: int, login_path) -> list:
+    stop = time.perf_counter() + PHASE_SECONDS
+    logins = {"ok": 0, "busy": 0}
+
+    async def login_loop():
+        while time.perf_counter() < stop:
+            r = await client.post(login_path, data={"username": EMAIL, "password": PASSWORD})
+            logins["ok" if r.status_code == 200 else "busy"] += 1
+            if r.status_code == 503:
+                await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+
+    tasks = [asyncio.create_task(login_loop()) for _ in range(LOGIN_CLIENTS)] if login_path else []
+    latencies = []
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        r = await client.get(f"/projects/{project_id}", headers=headers)
+        r.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.02)
+    await asyncio.gather(*tasks)
+    return latencies, logins
+
+
+def report(label: str, latencies: list, logins: dict) -> None:
+    ordered = sorted(latencies)
+    print(f"{label:>22}: n={len(latencies)} read p50 {statistics.median(ordered):7.1f} ms  "
+          f"p99 {ordered[int(len(ordered) * 0.99)]:7.1f} ms  max {ordered[-1]:7.1f} ms  "
+          f"logins ok {logins['ok']:4d} / 503 {logins['busy']:4d}")
+
+
+async def main() -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    migrations.migrate()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.post("/register", json={"email": EMAIL, "password": PASSWORD})
+        token = (await client.post("/token", data={"username": EMAIL, "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        project = await client.post("/projects/", json={"title": "Bench", "project_type": "docx", "sections": []},
+                                    headers=headers)
+        project_id = project.json()["id"]
+
+        print(f"{LOGIN_CLIENTS} login clients, threadpool {THREADPOOL_SIZE}, "
+              f"{passwords.PASSWORD_HASH_WORKERS} hash workers, bcrypt rounds {passwords.BCRYPT_ROUNDS}")
+        report("no logins", *await phase(client, headers, project_id, None))
+        report("hash in threadpool", *await phase(client, headers, project_id, "/bench/legacy-token"))
+        report("dedicated executor", *await phase(client, headers, project_id, "/token"))
+    passwords.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_near_duplicates.py
+
+"""
+Lookup cost of the near-duplicate (MinHash/LSH) index as the number of
+stored topics grows, against a linear Jaccard scan over the same entries,
+and the reuse decision for a few paraphrased and unrelated topics.
+Run from backend/:
+
+    python -m benchmarks.bench_near_duplicates
+"""
+
+import random
+import statistics
+import time
+
+from app import near_duplicates
+from app.near_duplicates import NearDuplicateIndex, jaccard, shingles
+
+SIZES = (1000, 10000, 50000)
+LOOKUPS = 200
+SCOPE = "outline:docx:bench"
+
+SUBJECTS = ("healthcare", "finance", "logistics", "retail", "education", "energy", "agriculture",
+            "insurance", "manufacturing", "tourism", "telecom", "mining", "pharma", "media")
+ANGLES = ("AI", "blockchain", "cloud migration", "cybersecurity", "remote work", "sustainability",
+          "supply chain risk", "data privacy", "automation", "customer analytics", "edge computing")
+QUALIFIERS = ("in", "for", "across", "and")
+REGIONS = ("", "Europe", "India", "Brazil", "small business", "2025", "the public sector", "startups")
+
+PAIRS = [
+    ("AI in Healthcare", "Healthcare AI"),
+    ("AI in Healthcare", "AI in healthcare industry"),
+    ("AI in Healthcare", "Artificial intelligence for hospitals"),
+    ("AI in Healthcare", "AI in Finance"),
+    ("Cloud migration for retail", "Retail cloud migration strategy"),
+    ("Q3 sales report", "Q4 sales report"),
+    ("Marketing strategy 2023", "Marketing strategy 2024"),
+    ("Marketing strategy 2023", "2023 marketing strategy"),
+    ("Renewable energy in India", "Renewable energy in Indonesia"),
+]
+
+
+def topics(count: int, rng: random.Random) -> list:
+    # Shared angles and subjects plus two words from a long tail, so topics
+    # overlap the way real ones do without all being near-duplicates
+    vocabulary = [f"{rng.choice(SUBJECTS)[:3]}{i}x" for i in range(20000)]
+    result = set()
+    while len(result) < count:
+        result.add(f"{rng.choice(ANGLES)} {rng.choice(QUALIFIERS)} {rng.choice(SUBJECTS)} "
+                   f"{rng.choice(REGIONS)} {rng.choice(vocabulary)} {rng.choice(vocabulary)}")
+    return list(result)
+
+
+def mean_us(fn, queries) -> float:
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.mean(samples)
+
+
+if __name__ == "__main__":
+    rng = random.Random(5)
+    print(f"threshold {near_duplicates.NEAR_DUPLICATE_THRESHOLD}, "
+          f"{near_duplicates.BANDS} bands x {near_duplicates.ROWS} rows")
+    for size in SIZES:
+        stored = topics(size, rng)
+        index = NearDuplicateIndex(max_entries=size)
+        for text in stored:
+            index.add(SCOPE, text, text)
+        linear = [(shingles(text), text) for text in stored]
+        # Reworded stored topics: same words, different order and case
+        queries = [" ".join(reversed(t.lower().split())) for t in rng.sample(stored, LOOKUPS)]
+
+        def scan(q):
+            items = shingles(q)
+            return max(((jaccard(items, s), t) for s, t in linear), default=None)
+
+        lsh_us = mean_us(lambda q: index.query(SCOPE, q), queries)
+        scan_us = mean_us(scan, queries[:20])
+        stats = index.stats()
+        print(f"{size:>6} entries: LSH {lsh_us:8.0f} µs/lookup "
+              f"({stats['candidates_per_lookup']:.0f} candidates, hit rate {stats['hit_rate']:.0%})   "
+              f"linear scan {scan_us:8.0f} µs/lookup")
+
+    print()
+    index = NearDuplicateIndex()
+    for stored, query in PAIRS:
+        index.clear()
+        index.add(SCOPE, stored, stored)
+        match = index.query(SCOPE, query)
+        similarity = jaccard(shingles(stored), shingles(query))
+        print(f"{stored!r:>30} vs {query!r:<40} J={similarity:.2f}  -> {'reuse' if match else 'generate'}")
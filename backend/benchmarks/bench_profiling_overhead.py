@@ -0,0 +1,122 @@
+# backend/benchmarks/bench_profiling_overhead.py
+
+"""
+Cost of request profiling:
+
+  * ProfilingMiddleware around a no-op ASGI endpoint for requests that are
+    not profiled (the slow-request timer armed and cancelled, the
+    X-Profile header looked for), per request
+  * one sampler tick (reading and walking every thread's stack) with 40
+    idle threadpool-like threads, as a server has
+  * the slowdown of CPU-bound work in a profiled request while the sampler
+    runs every PROFILING_INTERVAL_MS
+
+Run from backend/:
+
+    python -m benchmarks.bench_profiling_overhead
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app import profiling
+
+REQUESTS = 20_000
+TICKS = 2_000
+IDLE_THREADS = 40
+ROUNDS = 7
+ROUTE = SimpleNamespace(path="/items/{item_id}")
+HEADERS = [(b"host", b"example.com"), (b"user-agent", b"bench"), (b"accept", b"*/*"),
+           (b"authorization", b"Bearer abc.def.ghi"), (b"content-type", b"application/json")]
+
+
+def busy_endpoint_work(n: int = 200_000) -> int:
+    total = 0
+    for i in range(n):
+        total += i * i % 7
+    return total
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE
+    scope["endpoint"] = busy_endpoint_work
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def request_us(app) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/items/1", "headers": HEADERS, "query_string": b"page=2"}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+def best_of(fn, *variants) -> list:
+    # Interleaved rounds, best per variant: this is a noisy shared machine
+    samples = [[] for _ in variants]
+    for _ in range(ROUNDS):
+        for i, variant in enumerate(variants):
+            samples[i].append(fn(variant))
+    return [min(s) for s in samples]
+
+
+def idle_threads(count: int):
+    stop = threading.Event()
+    threads = [threading.Thread(target=stop.wait, daemon=True) for _ in range(count)]
+    for t in threads:
+        t.start()
+    return stop
+
+
+def tick_us(sampler: profiling.Sampler, session: profiling.ProfileSession) -> float:
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        sampler.sample([session])
+    return (time.perf_counter() - start) / TICKS * 1e6
+
+
+def work_ms(profiled: bool) -> float:
+    if not profiled:
+        start = time.perf_counter()
+        busy_endpoint_work()
+        return (time.perf_counter() - start) * 1000
+    session = profiling.ProfileSession({"endpoint": busy_endpoint_work}, "on_demand", time.perf_counter())
+    sampler = profiling.get_sampler()
+    sampler.add(session)
+    start = time.perf_counter()
+    busy_endpoint_work()
+    elapsed = (time.perf_counter() - start) * 1000
+    sampler.remove(session)
+    return elapsed
+
+
+if __name__ == "__main__":
+    profiling.PROFILING_TOKEN = "bench-token"
+    profiling.PROFILING_SLOW_REQUEST_SECONDS = 10.0
+    bare, watched = best_of(lambda app: asyncio.run(request_us(app)), endpoint,
+                            profiling.ProfilingMiddleware(endpoint))
+    print(f"ProfilingMiddleware, request not profiled: {watched - bare:5.2f} µs/request "
+          f"({bare:.2f} -> {watched:.2f})")
+
+    stop = idle_threads(IDLE_THREADS)
+    session = profiling.ProfileSession({"endpoint": busy_endpoint_work}, "on_demand", time.perf_counter())
+    cost = min(tick_us(profiling.Sampler(), session) for _ in range(ROUNDS))
+    interval = profiling.PROFILING_INTERVAL_MS
+    print(f"Sampler tick with {IDLE_THREADS + 1} threads:          {cost:7.1f} µs "
+          f"(every {interval:g} ms: {cost / (interval * 10):.1f}% of one core while profiling)")
+
+    plain, profiled = best_of(work_ms, False, True)
+    print(f"CPU-bound work in a profiled request:       {plain:.1f} ms -> {profiled:.1f} ms "
+          f"({(profiled - plain) / plain * 100:+.1f}%)")
+    stop.set()
+    profiling.shutdown()
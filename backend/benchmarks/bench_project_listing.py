@@ -0,0 +1,90 @@
+# backend/benchmarks/bench_project_listing.py
+
+"""
+SQL statements, latency and payload size of GET /projects/ for a user
+with many projects: the previous unpaginated listing (lazy-loaded
+sections) against one keyset page of the summary and full views. Uses a
+temporary SQLite database. Run from backend/:
+
+    python -m benchmarks.bench_project_listing
+"""
+
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app import database, models, schemas
+from app.routers import projects as projects_router
+
+PROJECTS = 300
+SECTIONS_PER_PROJECT = 8
+PAGE_SIZE = 20
+CONTENT = "Generated section content for the dashboard benchmark. " * 40
+
+
+def seed(Session) -> models.User:
+    with Session() as db:
+        user = models.User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        start = datetime(2025, 1, 1)
+        for p in range(PROJECTS):
+            project = models.Project(title=f"Project {p}", project_type="docx",
+                                     owner_id=user.id, created_at=start + timedelta(minutes=p))
+            for i in range(SECTIONS_PER_PROJECT):
+                project.sections.append(models.DocumentSection(order_index=i, title=f"S{i}", content=CONTENT))
+            db.add(project)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+
+
+def measure(engine, label: str, fn) -> None:
+    fn()  # warm up schema building and the connection pool
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    body = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    event.remove(engine, "before_cursor_execute", count)
+    print(f"{label:>28}: {len(statements):4d} statements  {elapsed:8.1f} ms  {len(body) / 1024:9.1f} KB")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        user = seed(Session)
+        print(f"{PROJECTS} projects x {SECTIONS_PER_PROJECT} sections, page size {PAGE_SIZE}")
+
+        def unpaginated() -> bytes:
+            with Session() as db:
+                rows = db.query(models.Project).filter(models.Project.owner_id == user.id).all()
+                adapter = TypeAdapter(List[schemas.ProjectResponse])
+                return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+        def page(view: str):
+            def run() -> bytes:
+                with Session() as db:
+                    result = projects_router.list_projects(
+                        cursor=None, limit=PAGE_SIZE, view=view, db=db, current_user=user
+                    )
+                    return result.model_dump_json().encode("utf-8")
+            return run
+
+        measure(engine, "before (all, lazy sections)", unpaginated)
+        measure(engine, "summary page", page("summary"))
+        measure(engine, "full page (selectinload)", page("full"))
+        engine.dispose()
@@ -0,0 +1,135 @@
+# backend/benchmarks/bench_responses.py
+
+"""
+Size and serialization cost of a 50-section project response
+(GET /projects/{id}), each section ~3 KB of content plus a comment:
+
+  * serialization: the ORM project to JSON bytes the way older FastAPI
+    does it (model_dump to a dict, jsonable_encoder, json.dumps), with
+    orjson instead of json.dumps when it is installed, and with
+    fieldsets.json_response (pydantic writes the bytes directly)
+  * payload bytes with and without sparse fieldsets, raw and compressed
+    with gzip and (when installed) brotli at the CompressionMiddleware
+    settings, and the time each compression takes
+
+Results are written as JSON for `python -m benchmarks.compare`.
+Run from backend/:
+
+    python -m benchmarks.bench_responses --out responses.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import timeit
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app import compression, fieldsets, models, schemas
+from benchmarks import results as results_file
+
+SECTIONS = 50
+VOCABULARY = (
+    "the a of and to in for with on by from as that this these their its our organisations teams customers "
+    "market growth adoption policy risk cost revenue margin strategy data platform cloud security privacy "
+    "regulation compliance automation workflow process efficiency productivity investment return pilot "
+    "deployment integration legacy system infrastructure analytics insight forecast demand supply chain "
+    "logistics inventory pricing competition partner vendor contract procurement budget quarter annual "
+    "increase decrease significant measurable sustainable scalable resilient critical strategic operational "
+    "however therefore moreover although while because which where when across between within over under "
+    "healthcare finance retail education energy manufacturing insurance tourism government public private "
+    "employees skills training culture leadership governance transparency accountability ethics fairness "
+    "model training inference accuracy latency throughput reliability availability outage incident response"
+).split()
+FIELDSETS = {
+    "full": (None, None),
+    "exclude=sections.content,sections.comment": (None, "sections.content,sections.comment"),
+    "fields=id,title,sections.id,sections.title": ("id,title,sections.id,sections.title", None),
+}
+
+
+def prose(rng: random.Random, words: int) -> str:
+    # Varied enough that compression ratios resemble real generated text
+    text = " ".join(rng.choice(VOCABULARY) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def sample_project() -> models.Project:
+    rng = random.Random(1)
+    project = models.Project(id=1, title="Benchmark project", project_type="docx", owner_id=1,
+                             created_at=datetime(2026, 1, 1, 12, 0))
+    for i in range(SECTIONS):
+        content = "\n\n".join(prose(rng, 90) for _ in range(5))
+        project.sections.append(models.DocumentSection(
+            id=i + 1, title=f"Section {i}: aspect {i} of the subject", content=content, order_index=i,
+            content_version=3, is_liked=i % 3 == 0, comment=prose(rng, 30),
+        ))
+    return project
+
+
+def measure_us(fn, repeat: int) -> dict:
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    runs = [total / loops * 1e6 for total in timer.repeat(repeat=repeat, number=loops)]
+    return results_file.metric(round(statistics.median(runs), 1), "us", best=round(min(runs), 1), loops=loops)
+
+
+def via_dict(project, dumps) -> bytes:
+    # What FastAPI before its pydantic JSON fast path does for a response_model
+    content = jsonable_encoder(schemas.ProjectResponse.model_validate(project).model_dump(mode="json"))
+    return dumps(content)
+
+
+def stdlib_dumps(content) -> bytes:
+    # Starlette's JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", default="responses.json", help="results file (JSON)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run_metadata = results_file.metadata()
+    project = sample_project()
+    results = {}
+
+    cases = {"serialize[dict + json.dumps]": lambda: via_dict(project, stdlib_dumps)}
+    try:
+        import orjson
+        cases["serialize[dict + orjson]"] = lambda: via_dict(project, orjson.dumps)
+    except ImportError:
+        print("orjson is not installed; skipping its case\n")
+    for name, (fields, exclude) in FIELDSETS.items():
+        include, omit = fieldsets.fieldset(schemas.ProjectResponse, fields, exclude)
+        cases[f"serialize[json_response, {name}]"] = (
+            lambda include=include, omit=omit: fieldsets.json_response(schemas.ProjectResponse, project, include, omit)
+        )
+    for name, fn in cases.items():
+        results[name] = measure_us(fn, args.repeat)
+        print(f"{name:<66} {results[name]['value'] / 1000:8.2f} ms")
+
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    if compression.brotli is None:
+        print("\nbrotli is not installed; gzip only")
+    print()
+    for name, (fields, exclude) in FIELDSETS.items():
+        include, omit = fieldsets.fieldset(schemas.ProjectResponse, fields, exclude)
+        body = fieldsets.json_response(schemas.ProjectResponse, project, include, omit).body
+        results[f"bytes[{name}]"] = results_file.metric(len(body), "bytes")
+        line = f"{name:<44} {len(body) / 1024:8.1f} KiB"
+        for encoding in encodings:
+            compressed = compression.compress(body, encoding)
+            results[f"bytes[{name}, {encoding}]"] = results_file.metric(len(compressed), "bytes")
+            results[f"compress[{name}, {encoding}]"] = measure_us(lambda: compression.compress(body, encoding),
+                                                                  args.repeat)
+            line += (f"   {encoding} {len(compressed) / 1024:6.1f} KiB "
+                     f"in {results[f'compress[{name}, {encoding}]']['value'] / 1000:5.2f} ms")
+        print(line)
+
+    config = {"sections": SECTIONS, "repeat": args.repeat, "gzip_level": compression.COMPRESSION_GZIP_LEVEL,
+              "brotli_quality": compression.COMPRESSION_BROTLI_QUALITY}
+    results_file.write(args.out, "responses", run_metadata, config, results)
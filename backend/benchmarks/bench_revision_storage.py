@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_revision_storage.py
+
+"""
+Storage per revision for the section revision store (snapshots every
+REVISION_SNAPSHOT_INTERVAL revisions, compressed deltas between) against
+keeping a full copy of the text for every revision. A synthetic section
+is refined repeatedly; every revision is reconstructed and checked.
+Uses a temporary SQLite database. Run from backend/:
+
+    python -m benchmarks.bench_revision_storage
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+import zlib
+
+from sqlalchemy.orm import sessionmaker
+
+from app import migrations, models, revisions
+from app.database import create_db_engine
+
+REVISIONS = 200
+PARAGRAPHS = 8
+WORDS = ("the platform generates structured reports from an outline and each section "
+         "can be refined with an instruction so that tone length and detail match what "
+         "the reader needs while keeping the original meaning and flow of the document").split()
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.randint(4, 7)))
+
+
+def refine(rng: random.Random, text: str, rewrite_share: float) -> str:
+    paragraphs = text.split("\n\n")
+    if rng.random() < rewrite_share:
+        # The model rewrote the whole section
+        return "\n\n".join(paragraph(rng) for _ in paragraphs)
+    # The model reworded one paragraph and touched up a sentence elsewhere
+    paragraphs[rng.randrange(len(paragraphs))] = paragraph(rng)
+    i = rng.randrange(len(paragraphs))
+    sentences = paragraphs[i].split(". ")
+    sentences[rng.randrange(len(sentences))] = sentence(rng).rstrip(".")
+    paragraphs[i] = ". ".join(sentences)
+    return "\n\n".join(paragraphs)
+
+
+def run(Session, label: str, rewrite_share: float) -> None:
+    rng = random.Random(7)
+    with Session() as db:
+        project = models.Project(title=label, project_type="docx")
+        section = models.DocumentSection(project=project, title="Overview",
+                                         content="\n\n".join(paragraph(rng) for _ in range(PARAGRAPHS)))
+        db.add(project)
+        db.commit()
+
+        history = [section.content]
+        write_ms = []
+        for _ in range(REVISIONS - 1):
+            new = refine(rng, section.content, rewrite_share)
+            start = time.perf_counter()
+            revisions.update_content(db, section, new, "refine")
+            db.commit()
+            write_ms.append((time.perf_counter() - start) * 1000)
+            history.append(new)
+
+        read_ms = []
+        for number, expected in enumerate(history, start=1):
+            start = time.perf_counter()
+            content = revisions.get_revision_content(db, section.id, number)
+            read_ms.append((time.perf_counter() - start) * 1000)
+            assert content == expected, f"revision {number} reconstructed incorrectly"
+
+        rows = revisions.list_revisions(db, section.id)
+        stored = sum(row.stored_bytes for row in rows)
+        snapshots = sum(1 for row in rows if row.is_snapshot)
+
+    full = sum(len(text.encode("utf-8")) for text in history)
+    full_zlib = sum(len(zlib.compress(text.encode("utf-8"))) for text in history)
+    print(f"\n{label}: {len(history)} revisions of ~{full // len(history)} bytes, {snapshots} stored as snapshots")
+    print(f"  full copies            {full / len(history):8.0f} B/revision")
+    print(f"  compressed full copies {full_zlib / len(history):8.0f} B/revision")
+    print(f"  revision store         {stored / len(history):8.0f} B/revision  "
+          f"({full / stored:.1f}x smaller than full copies)")
+    print(f"  write  mean {statistics.mean(write_ms):.2f} ms   "
+          f"read mean {statistics.mean(read_ms):.2f} ms  max {max(read_ms):.2f} ms")
+
+
+if __name__ == "__main__":
+    print(f"REVISION_SNAPSHOT_INTERVAL={revisions.REVISION_SNAPSHOT_INTERVAL}")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'revisions.db')}")
+        migrations.migrate(engine)
+        Session = sessionmaker(bind=engine)
+        run(Session, "paragraph edits", rewrite_share=0.0)
+        run(Session, "20% full rewrites", rewrite_share=0.2)
+        engine.dispose()
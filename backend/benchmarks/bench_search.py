@@ -0,0 +1,108 @@
+# backend/benchmarks/bench_search.py
+
+"""
+Latency of search.search_sections on a seeded SQLite database with 100k
+sections (10 users x 500 projects x 20 sections, Zipf-distributed
+vocabulary), for rare, common, multi-term and prefix queries, plus the
+cost of keeping the index in sync on a section update. Seeding goes
+through the normal tables so the FTS triggers do the indexing.
+Run from backend/:
+
+    python -m benchmarks.bench_search
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app import migrations, models, search
+from app.database import create_db_engine
+
+USERS = 10
+PROJECTS_PER_USER = 500
+SECTIONS_PER_PROJECT = 20
+WORDS_PER_SECTION = 80
+VOCABULARY = 20000
+RUNS = 50
+
+QUERIES = {
+    "rare term": "w15000",
+    "common term": "w3",
+    "two terms": "w12 w40",
+    "prefix": "w123*",
+    "title term": "overview",
+}
+
+
+def seed(engine) -> None:
+    rng = random.Random(17)
+    vocabulary = [f"w{i}" for i in range(VOCABULARY)]
+    weights = [1 / (i + 1) for i in range(VOCABULARY)]
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": u + 1, "email": f"user{u}@example.com", "hashed_password": "x"} for u in range(USERS)
+        ])
+        conn.execute(insert(models.Project), [
+            {"id": u * PROJECTS_PER_USER + p + 1, "title": f"Report {p} on {rng.choice(vocabulary[:500])}",
+             "project_type": "docx", "owner_id": u + 1, "created_at": now}
+            for u in range(USERS) for p in range(PROJECTS_PER_USER)
+        ])
+        for project_id in range(1, USERS * PROJECTS_PER_USER + 1):
+            conn.execute(insert(models.DocumentSection), [
+                {"project_id": project_id, "order_index": i,
+                 "title": rng.choice(["Overview", "Background", "Analysis", "Findings", "Outlook"]),
+                 "content": " ".join(rng.choices(vocabulary, weights, k=WORDS_PER_SECTION))}
+                for i in range(SECTIONS_PER_PROJECT)
+            ])
+
+
+def timed(fn, runs: int = RUNS) -> list:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list, extra: str = "") -> None:
+    ordered = sorted(samples)
+    print(f"{label:>14}: p50 {ordered[len(ordered) // 2]:6.2f} ms  "
+          f"p95 {ordered[int(len(ordered) * 0.95)]:6.2f} ms  mean {statistics.mean(samples):6.2f} ms  {extra}")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+        migrations.migrate(engine)
+        start = time.perf_counter()
+        seed(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            sections = db.query(models.DocumentSection).count()
+            print(f"Seeded {sections} sections in {time.perf_counter() - start:.1f} s\n")
+
+            for label, query in QUERIES.items():
+                hits = search.search_sections(db, 1, query, 21)
+                report(label, timed(lambda: search.search_sections(db, 1, query, 21)), f"({len(hits)} hits on page 1)")
+            report("page 10", timed(lambda: search.search_sections(db, 1, "w3", 21, 180)))
+
+            # Incremental sync: a refine rewrites one section and its index row
+            section = db.get(models.DocumentSection, 1)
+
+            def update():
+                section.content = f"refined w{random.randrange(VOCABULARY)} " + section.content
+                db.commit()
+
+            report("section update", timed(update))
+            assert search.search_sections(db, 1, "refined", 1), "index out of sync after update"
+            count = db.execute(text("SELECT count(*) FROM search_index")).scalar()
+            assert count == sections, "index row count differs from sections"
+        engine.dispose()
@@ -0,0 +1,72 @@
+# backend/benchmarks/bench_span_refine.py
+
+"""
+Tokens and latency of refining one paragraph of a ~400-word section with
+the whole-section refine prompt against the span refine prompt (selected
+paragraph plus SPAN_REFINE_CONTEXT_CHARS of context on each side). The
+stub backend echoes back the text it was asked to rewrite, so output
+length (and the stub's per-character decode time) matches a real model's.
+Run from backend/:
+
+    python -m benchmarks.bench_span_refine
+"""
+
+import random
+import re
+import statistics
+import time
+
+from app import llm_service
+from app.llm_scheduler import estimate_tokens
+from app.routers import refine_feedback
+
+CALL_LATENCY_SECONDS = 0.3
+SECONDS_PER_1K_CHARS = 1.0
+RUNS = 5
+INSTRUCTION = "Make this more concise and formal"
+
+
+class EchoStub(llm_service.StubBackend):
+    @staticmethod
+    def render(prompt: str) -> str:
+        match = re.search(r"PASSAGE:\n(.*?)\n\nContext after:", prompt, re.S) \
+            or re.search(r"Original Content:\n(.*?)\n\nReturn only", prompt, re.S)
+        return match.group(1)
+
+
+def section_text(rng: random.Random) -> str:
+    words = "market growth data adoption policy risk cost platform customer value analysis trend".split()
+    paragraphs = []
+    for _ in range(5):
+        sentences = [" ".join(rng.choice(words) for _ in range(16)).capitalize() + "." for _ in range(5)]
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def measure(backend, prompt: str) -> tuple:
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        output = backend.generate(prompt)
+        samples.append(time.perf_counter() - start)
+    return estimate_tokens(prompt), estimate_tokens(output), statistics.mean(samples)
+
+
+if __name__ == "__main__":
+    content = section_text(random.Random(3))
+    paragraphs = [m.span() for m in re.finditer(r"[^\n]*\S[^\n]*", content)]
+    start, end = paragraphs[2]
+    before, after = refine_feedback._context(content, start, end)
+    backend = EchoStub(latency=CALL_LATENCY_SECONDS, seconds_per_1k_chars=SECONDS_PER_1K_CHARS, max_retries=0)
+
+    print(f"section: {len(content.split())} words in {len(paragraphs)} paragraphs; refining paragraph 3 "
+          f"({len(content[start:end].split())} words), context {refine_feedback.SPAN_REFINE_CONTEXT_CHARS} chars/side")
+    print(f"stub: {CALL_LATENCY_SECONDS}s per call + {SECONDS_PER_1K_CHARS}s per 1k output chars\n")
+    cases = {
+        "whole section": refine_feedback.build_section_refine_prompt(INSTRUCTION, content),
+        "span": refine_feedback.build_span_refine_prompt(INSTRUCTION, before, content[start:end], after),
+    }
+    for label, prompt in cases.items():
+        sent, received, seconds = measure(backend, prompt)
+        print(f"{label:>14}: {sent:5d} tokens sent  {received:5d} tokens received  "
+              f"{sent + received:5d} total  {seconds:5.2f} s")
@@ -0,0 +1,106 @@
+# backend/benchmarks/bench_sqlite_writes.py
+
+"""
+SQLite write throughput under concurrency, before and after the
+connection tuning in app.database (WAL, synchronous=NORMAL, busy_timeout,
+mmap). Writer threads commit section updates and feedback inserts while
+reader threads keep listing sections, as refine/feedback traffic does
+alongside dashboards. Run from backend/:
+
+    python -m benchmarks.bench_sqlite_writes
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import Column, ForeignKey, Integer, String, Text, create_engine, func, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app import database
+
+WRITERS = 8
+READERS = 4
+DURATION_SECONDS = 3.0
+SECTIONS = 200
+
+Base = declarative_base()
+
+
+class Section(Base):
+    __tablename__ = "sections"
+    id = Column(Integer, primary_key=True)
+    content = Column(Text)
+
+
+class Feedback(Base):
+    __tablename__ = "feedback"
+    id = Column(Integer, primary_key=True)
+    section_id = Column(Integer, ForeignKey("sections.id"))
+    comment = Column(String)
+
+
+def run(engine) -> dict:
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all(Section(id=i + 1, content="draft " * 200) for i in range(SECTIONS))
+        db.commit()
+
+    counts = {"writes": 0, "reads": 0, "errors": 0, "max_write_ms": 0.0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + DURATION_SECONDS
+
+    def writer(n: int) -> None:
+        i = 0
+        while time.perf_counter() < stop:
+            i += 1
+            start = time.perf_counter()
+            with Session() as db:
+                try:
+                    section = db.get(Section, (n * 7919 + i) % SECTIONS + 1)
+                    section.content = f"refined {n}.{i} " * 200
+                    db.add(Feedback(section_id=section.id, comment="👍"))
+                    db.commit()
+                    ok = True
+                except Exception:
+                    db.rollback()
+                    ok = False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                counts["writes" if ok else "errors"] += 1
+                counts["max_write_ms"] = max(counts["max_write_ms"], elapsed_ms)
+
+    def reader() -> None:
+        while time.perf_counter() < stop:
+            with Session() as db:
+                db.execute(select(Section.id, func.length(Section.content))).all()
+            with lock:
+                counts["reads"] += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return counts
+
+
+def report(label: str, counts: dict) -> None:
+    print(f"{label:>8}: {counts['writes'] / DURATION_SECONDS:8.1f} writes/s  "
+          f"{counts['reads'] / DURATION_SECONDS:8.1f} reads/s  "
+          f"errors {counts['errors']:4d}  slowest write {counts['max_write_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    print(f"{WRITERS} writers + {READERS} readers for {DURATION_SECONDS:.0f}s")
+    with tempfile.TemporaryDirectory() as tmp:
+        # The previous configuration: default journal mode and pragmas
+        before = create_engine(f"sqlite:///{os.path.join(tmp, 'before.db')}",
+                               connect_args={"check_same_thread": False})
+        report("before", run(before))
+        after = database.create_db_engine(f"sqlite:///{os.path.join(tmp, 'after.db')}")
+        report("after", run(after))
@@ -0,0 +1,130 @@
+# backend/benchmarks/bench_startup.py
+
+"""
+Worker startup cost, each run in a fresh interpreter (so nothing is
+already imported or cached):
+
+  * import of app.main, and which heavy optional modules (python-docx,
+    python-pptx, passlib, google.generativeai) it pulls in
+  * the lifespan startup (migrations on an empty SQLite database)
+  * the first request of each kind after startup: GET /, register (first
+    password hash), create project, and the first DOCX and PPTX exports,
+    with a second export of each kind for comparison
+
+Medians over --runs are written as JSON for `python -m benchmarks.compare`.
+Run from backend/:
+
+    python -m benchmarks.bench_startup --runs 5 --out startup.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ("docx", "pptx", "passlib", "google.generativeai")
+
+
+def child() -> None:
+    started = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    import asyncio
+
+    import httpx
+
+    timings = {"import_s": imported - started}
+
+    async def timed(name, request):
+        start = time.perf_counter()
+        response = await request
+        timings[name] = (time.perf_counter() - start) * 1000
+        response.raise_for_status()
+        return response
+
+    async def main():
+        start = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            timings["lifespan_startup_s"] = time.perf_counter() - start
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+                await timed("first_root_ms", client.get("/"))
+                credentials = {"email": "startup@example.com", "password": "startup-password"}
+                await timed("first_register_ms", client.post("/register", json=credentials))
+                token = (await client.post("/token", data={"username": credentials["email"],
+                                                            "password": credentials["password"]})).json()
+                headers = {"Authorization": f"Bearer {token['access_token']}"}
+                sections = [{"title": f"Section {i}", "order_index": i} for i in range(5)]
+                for name in ("first", "second"):
+                    for project_type in ("docx", "pptx"):
+                        project = await timed(f"{name}_create_{project_type}_ms", client.post(
+                            "/projects/", headers=headers,
+                            json={"title": f"{name} {project_type}", "project_type": project_type,
+                                  "sections": sections},
+                        ))
+                        await timed(f"{name}_export_{project_type}_ms",
+                                    client.get(f"/projects/{project.json()['id']}/export", headers=headers))
+
+    asyncio.run(main())
+    print(json.dumps({"timings": timings, "heavy_modules_after_import": loaded}))
+
+
+def run_child() -> dict:
+    # The child runs in a scratch directory, so nothing it writes relative
+    # to the working directory lands in the source tree
+    workdir = tempfile.mkdtemp(prefix="startup-")
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(
+        os.environ,
+        PYTHONPATH=backend_dir,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        LLM_BACKEND="stub",
+        LLM_CACHE_PATH="",
+        BCRYPT_ROUNDS="4",
+    )
+    try:
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+                             env=env, cwd=workdir, capture_output=True, text=True, check=True)
+        wall = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    report = json.loads(out.stdout.strip().splitlines()[-1])
+    report["timings"]["process_wall_s"] = wall
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", default="startup.json", help="results file (JSON)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        sys.exit(0)
+
+    from benchmarks import results as results_file
+
+    run_metadata = results_file.metadata()
+    reports = [run_child() for _ in range(args.runs)]
+    print(f"heavy modules loaded by `import app.main`: {reports[0]['heavy_modules_after_import'] or 'none'}\n")
+    results = {}
+    for name in reports[0]["timings"]:
+        values = [report["timings"][name] for report in reports]
+        median = statistics.median(values)
+        unit = "s" if name.endswith("_s") else "ms"
+        results[name] = results_file.metric(round(median, 4 if unit == "s" else 2), unit,
+                                            min=round(min(values), 4), max=round(max(values), 4))
+        print(f"{name:<24} median {median:9.3f} {unit:<2}  (min {min(values):.3f}, max {max(values):.3f})")
+    results["heavy_modules_after_import"] = results_file.metric(
+        len(reports[0]["heavy_modules_after_import"]), "modules", names=reports[0]["heavy_modules_after_import"]
+    )
+    results_file.write(args.out, "startup", run_metadata, {"runs": args.runs}, results)
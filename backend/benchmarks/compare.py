@@ -0,0 +1,66 @@
+# backend/benchmarks/compare.py
+
+"""
+Diffs two benchmark results files (from benchmarks.load_test or
+benchmarks.microbench) and flags entries that got worse by more than a
+threshold. Exits with status 1 when --fail-on-regression is given and a
+regression was found. Run from backend/:
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+"""
+
+import argparse
+import sys
+
+from benchmarks import results as results_file
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    """Rows of (name, unit, old, new, change %, verdict) for entries in both files."""
+    rows = []
+    old_results, new_results = baseline["results"], candidate["results"]
+    for name in sorted(set(old_results) | set(new_results)):
+        old, new = old_results.get(name), new_results.get(name)
+        if old is None or new is None:
+            rows.append((name, (old or new)["unit"], old and old["value"], new and new["value"], None,
+                         "only in candidate" if old is None else "only in baseline"))
+            continue
+        if old["value"] == 0:
+            change = 0.0 if new["value"] == 0 else float("inf")
+        else:
+            change = (new["value"] - old["value"]) / abs(old["value"]) * 100
+        worse = change if new["better"] == "lower" else -change
+        verdict = "REGRESSION" if worse > threshold else "improved" if worse < -threshold else ""
+        rows.append((name, new["unit"], old["value"], new["value"], change, verdict))
+    return rows
+
+
+def _format(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.6g}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent change in the worse direction that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    baseline, candidate = results_file.load(args.baseline), results_file.load(args.candidate)
+    if baseline["suite"] != candidate["suite"]:
+        sys.exit(f"Cannot compare a {baseline['suite']!r} run with a {candidate['suite']!r} run")
+    print(f"{baseline['suite']}: {baseline['metadata'].get('commit')} -> {candidate['metadata'].get('commit')}"
+          f"  (threshold {args.threshold:g}%)\n")
+    rows = compare(baseline, candidate, args.threshold)
+    width = max([len(row[0]) for row in rows] + [10])
+    for name, unit, old, new, change, verdict in rows:
+        change_text = f"{change:+7.1f}%" if change is not None else "       -"
+        print(f"{name:<{width}}  {_format(old):>10} -> {_format(new):>10} {unit:<6} {change_text}  {verdict}")
+    regressions = sum(1 for row in rows if row[5] == "REGRESSION")
+    print(f"\n{regressions} regression(s) out of {len(rows)} results")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
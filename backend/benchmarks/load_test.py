@@ -0,0 +1,227 @@
+# backend/benchmarks/load_test.py
+
+"""
+In-process HTTP load test of the full app against a simulated Gemini
+backend (benchmarks.simulated_llm) and a temporary SQLite database.
+
+Each virtual user registers and logs in, then loops until --duration
+runs out, picking operations by weight from --mix:
+
+    outline    POST /generate/outline
+    create     POST /projects/ with --sections sections
+    read       GET  /projects/{id}
+    list       GET  /projects/
+    refine     POST /section/{id}/refine
+    feedback   POST /feedback/ (like + comment)
+    export     GET  /projects/{id}/export
+
+Requests go through httpx's ASGI transport, so routing, validation,
+middleware, the request threadpool and the database are all exercised
+without sockets. Latency percentiles, status codes and throughput are
+written as JSON for `python -m benchmarks.compare`. Run from backend/:
+
+    python -m benchmarks.load_test --users 16 --duration 30 --llm-latency lognormal:1.2:0.5 --out load.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+parser.add_argument("--duration", type=float, default=20, help="seconds of load after login")
+parser.add_argument("--mix", default="outline=1,create=1,read=6,list=2,refine=3,feedback=4,export=2",
+                    help="operation weights")
+parser.add_argument("--sections", type=int, default=8, help="sections per created project")
+parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between a user's operations (s)")
+parser.add_argument("--llm-latency", default="lognormal:0.4:0.5",
+                    help="per-call latency distribution, see benchmarks.simulated_llm")
+parser.add_argument("--llm-seconds-per-1k-chars", type=float, default=0.05, help="simulated decode time")
+parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="fraction of calls failing with a 503")
+parser.add_argument("--bcrypt-rounds", type=int, help="override BCRYPT_ROUNDS for the run")
+parser.add_argument("--seed", type=int, default=1)
+parser.add_argument("--out", default="load_test.json", help="results file (JSON)")
+ARGS = parser.parse_args() if __name__ == "__main__" else parser.parse_args([])
+
+# The app reads its configuration at import time
+WORKDIR = tempfile.mkdtemp(prefix="load-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'load_test.db')}"
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("LLM_CACHE_PATH", "")
+if ARGS.bcrypt_rounds:
+    os.environ["BCRYPT_ROUNDS"] = str(ARGS.bcrypt_rounds)
+
+import httpx  # noqa: E402
+
+from app import llm_service  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks import results as results_file  # noqa: E402
+from benchmarks.simulated_llm import SimulatedGemini  # noqa: E402
+
+OPERATIONS = ("outline", "create", "read", "list", "refine", "feedback", "export")
+SUBJECTS = ("healthcare", "finance", "logistics", "retail", "education", "energy", "insurance", "tourism")
+ANGLES = ("AI", "cloud migration", "cybersecurity", "remote work", "sustainability", "automation")
+REFINE_PROMPTS = ("Make this more concise", "Use a more formal tone", "Add a concrete example")
+
+
+def parse_mix(spec: str) -> dict:
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r} in --mix; expected one of {', '.join(OPERATIONS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies_ms = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    async def timed(self, operation: str, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+        except Exception as e:
+            self.statuses[operation][type(e).__name__] += 1
+            return None
+        self.latencies_ms[operation].append((time.perf_counter() - start) * 1000)
+        self.statuses[operation][str(response.status_code)] += 1
+        return response
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, index: int, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.index = index
+        self.rng = rng
+        self.headers = {}
+        self.projects = {}  # project id -> section ids
+
+    def topic(self) -> str:
+        return f"{self.rng.choice(ANGLES)} in {self.rng.choice(SUBJECTS)} {self.rng.randrange(1000)}"
+
+    async def login(self) -> bool:
+        email, password = f"load{self.index}@example.com", f"password-{self.index}"
+        await self.recorder.timed("register", self.client.post("/register", json={"email": email, "password": password}))
+        response = await self.recorder.timed(
+            "login", self.client.post("/token", data={"username": email, "password": password})
+        )
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def run(self, operation: str) -> None:
+        if operation not in ("outline", "create", "list") and not self.projects:
+            operation = "create"
+        timed, client, rng = self.recorder.timed, self.client, self.rng
+        project_id = rng.choice(list(self.projects)) if self.projects else None
+        section_id = rng.choice(self.projects[project_id]) if project_id and self.projects[project_id] else None
+
+        if operation == "outline":
+            await timed(operation, client.post("/generate/outline", json={
+                "topic": self.topic(), "project_type": rng.choice(("docx", "pptx")),
+            }))
+        elif operation == "create":
+            sections = [{"title": f"Part {i + 1}: {rng.choice(ANGLES)}", "order_index": i}
+                        for i in range(ARGS.sections)]
+            response = await timed(operation, client.post("/projects/", headers=self.headers, json={
+                "title": self.topic(), "project_type": rng.choice(("docx", "pptx")), "sections": sections,
+            }))
+            if response is not None and response.status_code == 200:
+                body = response.json()
+                self.projects[body["id"]] = [s["id"] for s in body["sections"]]
+        elif operation == "read":
+            await timed(operation, client.get(f"/projects/{project_id}", headers=self.headers))
+        elif operation == "list":
+            await timed(operation, client.get("/projects/", headers=self.headers))
+        elif operation == "refine" and section_id:
+            await timed(operation, client.post(f"/section/{section_id}/refine", headers=self.headers, json={
+                "section_id": section_id, "prompt": rng.choice(REFINE_PROMPTS),
+            }))
+        elif operation == "feedback" and section_id:
+            await timed(operation, client.post("/feedback/", headers=self.headers, json={
+                "section_id": section_id, "is_liked": rng.random() < 0.7, "comment": "Looks good",
+            }))
+        elif operation == "export":
+            await timed(operation, client.get(f"/projects/{project_id}/export", headers=self.headers))
+
+
+async def drive(user: VirtualUser, weights: dict, deadline: float) -> None:
+    names, values = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        await user.run(user.rng.choices(names, values)[0])
+        if ARGS.think_time:
+            await asyncio.sleep(user.rng.expovariate(1 / ARGS.think_time))
+
+
+async def main() -> dict:
+    weights = parse_mix(ARGS.mix)
+    backend = SimulatedGemini(
+        latency=ARGS.llm_latency,
+        seconds_per_1k_chars=ARGS.llm_seconds_per_1k_chars,
+        failure_rate=ARGS.llm_failure_rate,
+        seed=ARGS.seed,
+    )
+    llm_service.set_backend(backend)
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=300) as client:
+            users = [VirtualUser(client, recorder, i, random.Random(ARGS.seed * 1000 + i))
+                     for i in range(ARGS.users)]
+            # Logins finish before the clock starts, so the register/login
+            # burst is reported on its own and not mixed into throughput
+            logged_in = await asyncio.gather(*(user.login() for user in users))
+            started = time.perf_counter()
+            await asyncio.gather(*(drive(user, weights, started + ARGS.duration)
+                                   for user, ok in zip(users, logged_in) if ok))
+            elapsed = time.perf_counter() - started
+    llm_service.set_backend(None)
+    return {"recorder": recorder, "elapsed": elapsed, "llm_calls": backend.calls}
+
+
+def summarize(recorder: Recorder, elapsed: float, llm_calls: int) -> dict:
+    results = {}
+    mix_requests = 0
+    for operation in ("register", "login") + OPERATIONS:
+        statuses = recorder.statuses.get(operation)
+        if not statuses:
+            continue
+        total = sum(statuses.values())
+        failed = sum(count for status, count in statuses.items() if not status.startswith("2"))
+        summary = results_file.latency_summary(recorder.latencies_ms[operation])
+        details = {"statuses": dict(statuses), "requests": total}
+        results[f"{operation}.p50_ms"] = results_file.metric(round(summary.get("p50", 0), 2), "ms", **details)
+        results[f"{operation}.p95_ms"] = results_file.metric(round(summary.get("p95", 0), 2), "ms")
+        results[f"{operation}.error_pct"] = results_file.metric(round(failed / total * 100, 2), "%")
+        if operation in OPERATIONS:
+            mix_requests += total
+        print(f"{operation:>9}: {total:6d} requests  p50 {summary.get('p50', 0):8.1f} ms  "
+              f"p95 {summary.get('p95', 0):8.1f} ms  p99 {summary.get('p99', 0):8.1f} ms  "
+              f"statuses {dict(statuses)}")
+    results["throughput"] = results_file.metric(round(mix_requests / elapsed, 2), "req/s", better="higher")
+    results["llm_calls_per_request"] = results_file.metric(round(llm_calls / max(1, mix_requests), 3), "calls")
+    print(f"\n{mix_requests} requests in {elapsed:.1f} s: {mix_requests / elapsed:.1f} req/s, {llm_calls} LLM calls")
+    return results
+
+
+if __name__ == "__main__":
+    run_metadata = results_file.metadata()
+    print(f"{ARGS.users} users for {ARGS.duration:g} s, mix {ARGS.mix}, LLM latency {ARGS.llm_latency} "
+          f"+ {ARGS.llm_seconds_per_1k_chars:g} s per 1k chars\n")
+    try:
+        run = asyncio.run(main())
+        results = summarize(run["recorder"], run["elapsed"], run["llm_calls"])
+        config = {key: value for key, value in vars(ARGS).items() if key != "out"}
+        results_file.write(ARGS.out, "load_test", run_metadata, config, results)
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
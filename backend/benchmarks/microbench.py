@@ -0,0 +1,112 @@
+# backend/benchmarks/microbench.py
+
+"""
+Microbenchmarks of hot functions, timed with timeit (loops per run
+calibrated by Timer.autorange to take at least 0.2 s; median and best of
+--repeat runs):
+
+  * doc_generator._build_docx / _build_pptx for a 20-section project
+  * outline parsing (generate.parse_outline) and batched-section parsing
+    (generate.parse_batch_sections)
+  * auth.get_current_user with the token and user caches disabled (JWT
+    verify + users query every time) and enabled, against a temporary
+    SQLite database
+
+Results are written as JSON for `python -m benchmarks.compare`.
+Run from backend/:
+
+    python -m benchmarks.microbench --out micro.json
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import timeit
+
+from sqlalchemy.orm import sessionmaker
+
+from app import auth, doc_generator, migrations, models
+from app.database import create_db_engine
+from app.llm_service import StubBackend
+from app.routers import generate
+from benchmarks import results as results_file
+
+SECTIONS = 20
+
+
+def measure(fn, repeat: int) -> dict:
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    runs_us = [total / loops * 1e6 for total in timer.repeat(repeat=repeat, number=loops)]
+    best, median = min(runs_us), statistics.median(runs_us)
+    return results_file.metric(round(median, 3), "us", best=round(best, 3), loops=loops, repeat=repeat)
+
+
+def sample_project(project_type: str) -> models.Project:
+    project = models.Project(id=1, title="Benchmark project", project_type=project_type)
+    for i in range(SECTIONS):
+        content = "\n\n".join(
+            f"Paragraph {p} of section {i}: " + "market growth adoption policy risk cost " * 12
+            for p in range(4)
+        )
+        project.sections.append(models.DocumentSection(id=i + 1, title=f"Section {i}", content=content,
+                                                       order_index=i))
+    return project
+
+
+def auth_cases(tmp: str):
+    engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'auth.db')}")
+    migrations.migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        user = models.User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        token = auth.create_access_token({"sub": user.email, "uid": user.id})
+    db = Session()
+
+    def current_user():
+        auth.get_current_user(token=token, db=db)
+        db.expunge_all()  # each request gets a fresh session in the app
+
+    def uncached():
+        auth.clear_auth_caches()
+        current_user()
+
+    return engine, db, {"get_current_user[uncached]": uncached, "get_current_user[cached]": current_user}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", default="microbench.json", help="results file (JSON)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    args = parser.parse_args()
+    run_metadata = results_file.metadata()
+
+    docx, pptx = sample_project("docx"), sample_project("pptx")
+    outline = StubBackend.render("outline prompt")
+    titles = [f"Section {i}: aspect {i} of the subject" for i in range(1, 7)]
+    batch = StubBackend.render(generate.build_batch_section_prompt("Benchmark topic", titles, "docx"))
+    cases = {
+        f"build_docx[{SECTIONS} sections]": lambda: doc_generator._build_docx(docx),
+        f"build_pptx[{SECTIONS} sections]": lambda: doc_generator._build_pptx(pptx),
+        "parse_outline[8 lines]": lambda: generate.parse_outline(outline),
+        "parse_batch_sections[6 sections]": lambda: generate.parse_batch_sections(batch, len(titles)),
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, db, auth_benchmarks = auth_cases(tmp)
+        cases.update(auth_benchmarks)
+        for name, fn in cases.items():
+            if args.filter not in name:
+                continue
+            results[name] = measure(fn, args.repeat)
+            print(f"{name:<36} median {results[name]['value']:10.1f} µs   best {results[name]['best']:10.1f} µs")
+        db.close()
+        engine.dispose()
+
+    config = {"repeat": args.repeat, "sections": SECTIONS}
+    results_file.write(args.out, "microbench", run_metadata, config, results)
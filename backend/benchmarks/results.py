@@ -0,0 +1,95 @@
+# backend/benchmarks/results.py
+
+"""
+Machine-readable benchmark results shared by the load test and the
+microbenchmarks. A results file is JSON:
+
+    {
+      "suite": "microbench",
+      "metadata": {"commit": ..., "python": ..., "started_at": ...},
+      "config": {...},
+      "results": {
+        "build_docx[20 sections]": {"value": 12.3, "unit": "ms", "better": "lower", ...},
+        ...
+      }
+    }
+
+Every entry of "results" has one headline `value` and the direction that
+counts as an improvement, so `python -m benchmarks.compare` can diff two
+runs without knowing what they measured. Extra keys (percentiles, sample
+counts) are kept for reading but not compared.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+def metric(value: float, unit: str, better: str = "lower", **details) -> dict:
+    assert better in ("lower", "higher")
+    return {"value": value, "unit": unit, "better": better, **details}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "min": ordered[0],
+        "p50": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def metadata() -> dict:
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write(path: str, suite: str, run_metadata: dict, config: dict, results: Dict[str, dict]) -> None:
+    document = {"suite": suite, "metadata": run_metadata, "config": config, "results": results}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"\n📝 Wrote {len(results)} results to {path}")
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
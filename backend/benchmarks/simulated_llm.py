@@ -0,0 +1,65 @@
+# backend/benchmarks/simulated_llm.py
+
+"""
+Simulated Gemini backend for load tests: the stub backend's deterministic
+text, with per-call latency drawn from a configurable distribution plus a
+decode time proportional to output length, and optional injected
+retryable failures. Distributions are given as strings:
+
+    fixed:0.8               always 0.8 s
+    uniform:0.5:2.0         uniform between 0.5 and 2.0 s
+    lognormal:1.2:0.5       median 1.2 s, sigma 0.5 (long right tail)
+    exponential:1.0         mean 1.0 s
+"""
+
+import math
+import random
+from typing import NamedTuple
+
+from app import llm_service
+
+
+class LatencyDistribution(NamedTuple):
+    kind: str
+    params: tuple
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, *raw = spec.split(":")
+        arity = {"fixed": 1, "uniform": 2, "lognormal": 2, "exponential": 1}
+        if kind not in arity or len(raw) != arity[kind]:
+            raise ValueError(f"Bad latency distribution {spec!r}; expected one of "
+                             "fixed:S, uniform:LO:HI, lognormal:MEDIAN:SIGMA, exponential:MEAN")
+        params = tuple(float(p) for p in raw)
+        if any(p < 0 for p in params):
+            raise ValueError(f"Latency parameters must not be negative: {spec!r}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(median), sigma) if median else 0.0
+        mean = self.params[0]
+        return rng.expovariate(1 / mean) if mean else 0.0
+
+    def __str__(self) -> str:
+        return ":".join([self.kind, *(f"{p:g}" for p in self.params)])
+
+
+class SimulatedGemini(llm_service.StubBackend):
+    def __init__(self, latency: str = "fixed:0", **kwargs):
+        kwargs.setdefault("max_retries", 1)
+        kwargs.setdefault("backoff_base", 0.05)
+        super().__init__(**kwargs)
+        self.distribution = LatencyDistribution.parse(latency)
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.distribution.sample(self._rng)
+            fail = self._rng.random() < self.failure_rate
+        return delay, fail
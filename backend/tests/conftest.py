@@ -0,0 +1,118 @@
+# backend/tests/conftest.py
+
+"""
+The app reads its configuration from the environment at import time, so
+the test settings are applied here, before any `app` module is imported:
+a scratch SQLite database, the offline stub LLM backend, no LLM cache or
+near-duplicate reuse (tests that need them turn them on) and cheap
+password hashing.
+
+Run from backend/:
+
+    python -m pytest -q
+"""
+
+import itertools
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="ai-doc-tests-")
+
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_SCRATCH_DIR, 'test.db')}",
+    LLM_BACKEND="stub",
+    LLM_CACHE_ENABLED="0",
+    LLM_CACHE_PATH="",
+    NEAR_DUPLICATE_ENABLED="0",
+    BCRYPT_ROUNDS="4",
+    PROFILING_DIR=os.path.join(_SCRATCH_DIR, "profiles"),
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import database, llm_service, models, revisions  # noqa: E402
+from app.main import app  # noqa: E402
+
+_user_ids = itertools.count(1)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_SCRATCH_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def scratch_dir() -> str:
+    return _SCRATCH_DIR
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Entering the client runs the lifespan (migrations included)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def register_user(client):
+    """Registers a new user and returns their Authorization header."""
+    def register() -> dict:
+        credentials = {"email": f"user{next(_user_ids)}@example.com", "password": "test-password"}
+        response = client.post("/register", json=credentials)
+        assert response.status_code == 200, response.text
+        response = client.post("/token", data={"username": credentials["email"],
+                                               "password": credentials["password"]})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return register
+
+
+@pytest.fixture
+def auth_headers(register_user) -> dict:
+    """Authorization header of a freshly registered user."""
+    return register_user()
+
+
+@pytest.fixture
+def create_project(client):
+    """Creates a project through the API (sections are generated by the current backend)."""
+    def create(headers: dict, title: str = "Test project", section_titles=("Introduction",),
+               project_type: str = "docx") -> dict:
+        response = client.post("/projects/", headers=headers, json={
+            "title": title, "project_type": project_type,
+            "sections": [{"title": t, "order_index": i} for i, t in enumerate(section_titles)],
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return create
+
+
+@pytest.fixture
+def set_section_content():
+    """Saves new section content directly, as a concurrent editor would."""
+    def save(section_id: int, content: str) -> None:
+        session = database.SessionLocal()
+        try:
+            section = session.get(models.DocumentSection, section_id)
+            revisions.update_content(session, section, content, "edit")
+            session.commit()
+        finally:
+            session.close()
+
+    return save
+
+
+@pytest.fixture
+def stub_backend():
+    """Installs a fresh StubBackend (or subclass) for the test; pass latency etc. to the returned factory."""
+    def install(backend_class=llm_service.StubBackend, **kwargs) -> llm_service.StubBackend:
+        backend = backend_class(**kwargs)
+        llm_service.set_backend(backend)
+        return backend
+
+    yield install
+    llm_service.set_backend(None)
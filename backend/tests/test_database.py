@@ -0,0 +1,82 @@
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app import database, migrations, models
+
+WRITERS = 8
+READERS = 4
+WRITES_PER_THREAD = 40
+
+
+def test_sqlite_connections_use_wal(tmp_path):
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == database.SQLITE_BUSY_TIMEOUT_MS
+    finally:
+        engine.dispose()
+
+
+def test_concurrent_writes_are_not_locked_out(tmp_path):
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'concurrent.db'}")
+    migrations.migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        user = models.User(email="writer@example.com", hashed_password="x")
+        project = models.Project(title="Concurrent", project_type="docx", owner=user)
+        project.sections = [models.DocumentSection(title=f"S{i}", content="draft", order_index=i)
+                            for i in range(WRITERS)]
+        db.add(project)
+        db.commit()
+        section_ids = [section.id for section in project.sections]
+        user_id = user.id
+
+    errors = []
+    done = threading.Event()
+
+    def writer(n: int) -> None:
+        # Read-then-write transactions, as refine and feedback requests do
+        for i in range(WRITES_PER_THREAD):
+            with Session() as db:
+                try:
+                    section = db.get(models.DocumentSection, section_ids[n])
+                    section.content = f"refined {n}.{i} " * 50
+                    section.content_version += 1
+                    db.add(models.Feedback(section_id=section.id, user_id=user_id, comment=f"{n}.{i}")
+                           if i == 0 else models.Project(title=f"p{n}.{i}", project_type="docx",
+                                                         owner_id=user_id))
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    errors.append(e)
+
+    def reader() -> None:
+        while not done.is_set():
+            with Session() as db:
+                try:
+                    db.execute(text("SELECT id, length(content) FROM document_sections")).all()
+                except Exception as e:
+                    errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(READERS)]
+    writers = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+    try:
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+    finally:
+        done.set()
+        for thread in readers:
+            thread.join()
+
+    try:
+        assert not errors, f"{len(errors)} failed transactions, e.g. {errors[0]!r}"
+        with Session() as db:
+            versions = [db.get(models.DocumentSection, section_id).content_version for section_id in section_ids]
+        assert versions == [1 + WRITES_PER_THREAD] * WRITERS
+    finally:
+        engine.dispose()
@@ -0,0 +1,107 @@
+import json
+import zipfile
+from io import BytesIO
+
+import pytest
+from docx import Document
+from pptx import Presentation
+from sqlalchemy.orm import selectinload
+
+from app import bulk_export, database, doc_generator, models
+
+# Paragraph splitting, XML escaping, empty sections, bullets and non-ASCII text
+CONTENTS = [
+    "First paragraph.\n\nSecond & <b>not markup</b>\n\n\n  Third, padded  ",
+    "",
+    "• bullet one\n• bullet two\nline three",
+    "Tab\tand unicode – “quotes” é ✓",
+]
+
+
+def docx_structure(data: bytes) -> list:
+    return [(paragraph.style.name, paragraph.text) for paragraph in Document(BytesIO(data)).paragraphs]
+
+
+def pptx_structure(data: bytes) -> list:
+    slides = []
+    for slide in Presentation(BytesIO(data)).slides:
+        shapes = [
+            (shape.placeholder_format.idx if shape.is_placeholder else None, shape.name,
+             [paragraph.text for paragraph in shape.text_frame.paragraphs] if shape.has_text_frame else None)
+            for shape in slide.shapes
+        ]
+        slides.append((slide.slide_layout.name, shapes))
+    return slides
+
+
+STRUCTURE = {"docx": docx_structure, "pptx": pptx_structure}
+BUILDERS = {"docx": doc_generator._build_docx, "pptx": doc_generator._build_pptx}
+
+
+@pytest.fixture
+def project(auth_headers, create_project, set_section_content):
+    """Creates a project of the given type with CONTENTS; returns (ORM project, auth headers)."""
+    def create(project_type: str):
+        created = create_project(auth_headers, title="Parity & <check>", project_type=project_type,
+                                 section_titles=[f"Section {i} <&>" for i in range(len(CONTENTS))])
+        for section, content in zip(created["sections"], CONTENTS):
+            set_section_content(section["id"], content)
+        db = database.SessionLocal()
+        try:
+            return (db.query(models.Project).options(selectinload(models.Project.sections))
+                    .filter(models.Project.id == created["id"]).one()), auth_headers
+        finally:
+            db.close()
+
+    return create
+
+
+@pytest.mark.parametrize("project_type", ["docx", "pptx"])
+def test_fragment_writer_matches_python_docx_and_pptx(project, project_type):
+    orm_project, _ = project(project_type)
+    sections = sorted(orm_project.sections, key=lambda s: s.order_index)
+
+    reference = STRUCTURE[project_type](BUILDERS[project_type](orm_project).getvalue())
+    rendered, _, _ = doc_generator.render_document(orm_project.title, project_type, sections)
+
+    assert STRUCTURE[project_type](rendered) == reference
+
+
+@pytest.mark.parametrize("project_type", ["docx", "pptx"])
+def test_streamed_export_matches_python_docx_and_pptx(client, project, project_type, monkeypatch):
+    orm_project, headers = project(project_type)
+    monkeypatch.setattr(doc_generator, "EXPORT_STREAM_MIN_SECTIONS", 0)
+    streamed = []
+    stream_document_file = doc_generator.stream_document_file
+    monkeypatch.setattr(doc_generator, "stream_document_file",
+                        lambda p: streamed.append(p.id) or stream_document_file(p))
+
+    response = client.get(f"/projects/{orm_project.id}/export", headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert streamed == [orm_project.id]
+    reference = STRUCTURE[project_type](BUILDERS[project_type](orm_project).getvalue())
+    assert STRUCTURE[project_type](response.content) == reference
+
+
+def test_bulk_export_manifest_separates_filtered_from_missing(client, auth_headers, register_user, create_project,
+                                                               monkeypatch):
+    monkeypatch.setattr(bulk_export, "EXPORT_BULK_WORKERS", 1)
+    docx = create_project(auth_headers, title="Bulk docx")
+    pptx = create_project(auth_headers, title="Bulk pptx", project_type="pptx")
+    others = create_project(register_user(), title="Someone else's")
+    requested = [docx["id"], pptx["id"], others["id"], 999999]
+
+    response = client.post("/export/bulk", headers=auth_headers,
+                           json={"project_ids": requested, "project_type": "docx"})
+
+    assert response.status_code == 200, response.text
+    with zipfile.ZipFile(BytesIO(response.content)) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+    statuses = {entry["project_id"]: entry for entry in manifest["projects"]}
+    assert statuses[docx["id"]]["status"] == "ok"
+    assert statuses[pptx["id"]]["status"] == "skipped"
+    assert "Filtered out" in statuses[pptx["id"]]["reason"]
+    for pid in (others["id"], 999999):
+        assert statuses[pid] == {"project_id": pid, "status": "failed", "error": "Project not found"}
+    assert (manifest["total"], manifest["succeeded"], manifest["failed"], manifest["skipped"]) == (4, 1, 2, 1)
@@ -0,0 +1,82 @@
+import math
+import time
+
+import pytest
+
+from app import llm_service, near_duplicates
+from app.routers import generate
+
+TITLES = ["Market overview", "Risks: 2025 outlook", "Recommendations"]
+
+
+@pytest.mark.parametrize("project_type", ["docx", "pptx"])
+def test_batch_prompt_has_no_test_scaffolding(project_type):
+    prompt = generate.build_batch_section_prompt("Renewable energy", TITLES, project_type)
+
+    assert "(JSON): [" not in prompt
+    for number, title in enumerate(TITLES, start=1):
+        assert f"{number}. {title}" in prompt
+
+
+def test_stub_answers_batched_prompts_from_their_numbered_titles(stub_backend):
+    backend = stub_backend()
+
+    contents = generate.generate_sections_content("Renewable energy", TITLES, "docx", batch_size=6)
+
+    assert backend.calls == 1
+    assert all(not content.text.startswith("(") for content in contents)
+
+
+class InFlightStub(llm_service.StubBackend):
+    """Records the most backend calls running at once."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _generate_once(self, prompt: str, timeout: float) -> str:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return super()._generate_once(prompt, timeout)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_sections_are_generated_concurrently_up_to_the_width(stub_backend):
+    # One call per section (no batching), each taking a fixed latency; one
+    # more than two full rounds, so an unbounded fan-out would finish in
+    # one latency and a serial loop in len(titles)
+    latency = 0.2
+    width = generate.SECTION_GENERATION_CONCURRENCY
+    backend = stub_backend(InFlightStub, latency=latency)
+    titles = [f"Section {i}" for i in range(2 * width + 1)]
+
+    start = time.perf_counter()
+    contents = generate.generate_sections_content("Concurrency", titles, "docx", batch_size=1)
+    elapsed = time.perf_counter() - start
+
+    assert backend.calls == len(titles)
+    assert all(not content.text.startswith("(") for content in contents)
+    assert backend.peak_in_flight == width
+    rounds = math.ceil(len(titles) / width)
+    assert rounds == 3
+    assert rounds * latency <= elapsed < (rounds + 1) * latency
+
+
+def test_document_content_is_text_and_reuse_is_reported_separately(stub_backend, monkeypatch):
+    stub_backend()
+    monkeypatch.setattr(near_duplicates, "_index", near_duplicates.NearDuplicateIndex())
+    monkeypatch.setattr(near_duplicates, "NEAR_DUPLICATE_ENABLED", True)
+    args = ("Acme acquisition due diligence", "Market overview", "docx")
+
+    text = generate.generate_document_content(*args, owner_id=1)
+    reused = generate.generate_document_content_with_reuse(*args, owner_id=1)
+
+    assert isinstance(text, str)
+    assert reused.text == text
+    assert reused.reuse is not None
+    assert generate.generate_document_content(*args, owner_id=1) == text
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from app import database, jobs, models
+
+
+@pytest.fixture
+def new_job(auth_headers, create_project):
+    """A queued generation job for a new three-section project, not yet submitted."""
+    def create() -> int:
+        project_id = create_project(auth_headers, section_titles=["One", "Two", "Three"])["id"]
+        db = database.SessionLocal()
+        try:
+            job = jobs.create_job(db, db.get(models.Project, project_id))
+            db.commit()
+            return job.id
+        finally:
+            db.close()
+
+    return create
+
+
+def _job(job_id: int) -> models.GenerationJob:
+    db = database.SessionLocal()
+    try:
+        job = db.get(models.GenerationJob, job_id)
+        for item in job.items:
+            item.section  # loaded before the session closes
+        return job
+    finally:
+        db.close()
+
+
+def test_job_runs_once_when_every_worker_resumes_it(new_job, monkeypatch):
+    job_id = new_job()
+    generated = []
+
+    def generate(topic, section_title, *args):
+        generated.append(section_title)
+        time.sleep(0.05)
+        return f"Generated text for {section_title}, long enough to be kept as section content."
+
+    monkeypatch.setattr(jobs, "_generate_section", generate)
+    # Four server workers starting at once, each resuming the same job
+    workers = [threading.Thread(target=jobs.run_job, args=(job_id,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(generated) == ["One", "Three", "Two"]
+    job = _job(job_id)
+    assert job.status == "completed" and job.completed == 3
+    assert job.lease_owner is None
+
+
+def test_claim_is_exclusive_until_the_lease_expires(new_job):
+    job_id = new_job()
+    db = database.SessionLocal()
+    try:
+        assert jobs.claim_job(db, job_id)
+        assert not jobs.claim_job(db, job_id)
+
+        # The worker died: once its lease has run out another worker may take over
+        job = db.get(models.GenerationJob, job_id)
+        job.lease_expires_at = job.lease_expires_at.replace(year=2000)
+        db.commit()
+        assert jobs.claim_job(db, job_id)
+    finally:
+        db.close()
+
+
+def test_crashed_job_is_marked_failed(new_job, monkeypatch):
+    job_id = new_job()
+
+    def crash(db, job_id):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(jobs, "_renew_lease", crash)
+    jobs.run_job(job_id)
+
+    job = _job(job_id)
+    assert job.status == "failed"
+    assert job.lease_owner is None
+    assert all(item.status in ("done", "failed") for item in job.items)
+
+
+def test_section_edited_while_generating_is_skipped(new_job, set_section_content, monkeypatch):
+    job_id = new_job()
+    edited = _job(job_id).items[0]
+    edited_id, edited_title = edited.section_id, edited.section.title
+
+    def generate(topic, section_title, *args):
+        if section_title == edited_title:
+            set_section_content(edited_id, "Written by the user while the job ran.")
+        return f"Generated text for {section_title}, long enough to be kept as section content."
+
+    monkeypatch.setattr(jobs, "_generate_section", generate)
+    jobs.run_job(job_id)
+
+    item = next(item for item in _job(job_id).items if item.section_id == edited_id)
+    assert item.status == "skipped"
+    assert "edited" in item.error
+    db = database.SessionLocal()
+    try:
+        assert db.get(models.DocumentSection, edited_id).content == "Written by the user while the job ran."
+    finally:
+        db.close()
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from app import llm_scheduler, llm_service
+from app.llm_scheduler import LLMScheduler, Priority, SchedulerOverloaded, TokenBucket
+from app.routers import generate
+
+
+@pytest.fixture
+def install_scheduler():
+    """Makes the given scheduler the process-wide one for the test."""
+    def install(scheduler: LLMScheduler) -> LLMScheduler:
+        llm_scheduler.set_scheduler(scheduler)
+        return scheduler
+
+    yield install
+    llm_scheduler.set_scheduler(None)
+
+
+def wait_for_queue_depth(scheduler: LLMScheduler, depth: int) -> None:
+    deadline = time.monotonic() + 2
+    while scheduler.stats()["queue_depth"] != depth:
+        assert time.monotonic() < deadline, f"queue never reached depth {depth}"
+        time.sleep(0.005)
+
+
+def queue_acquire(scheduler: LLMScheduler, priority: Priority, served: list) -> threading.Thread:
+    def run():
+        with scheduler.acquire(priority, "prompt"):
+            served.append(priority)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_interactive_request_is_served_before_an_earlier_bulk_one():
+    scheduler = LLMScheduler(max_concurrency=1)
+    held = scheduler.acquire(Priority.BULK, "prompt")
+    served = []
+
+    bulk = queue_acquire(scheduler, Priority.BULK, served)
+    wait_for_queue_depth(scheduler, 1)
+    interactive = queue_acquire(scheduler, Priority.INTERACTIVE, served)
+    wait_for_queue_depth(scheduler, 2)
+    held.release()
+    bulk.join(2)
+    interactive.join(2)
+
+    assert served == [Priority.INTERACTIVE, Priority.BULK]
+
+
+def test_request_that_cannot_start_before_its_deadline_is_rejected_immediately():
+    scheduler = LLMScheduler(max_concurrency=1)
+    with scheduler.acquire(Priority.BULK, "prompt"):
+        start = time.perf_counter()
+        with pytest.raises(SchedulerOverloaded) as rejected:
+            # The estimated wait is one average call (5 s before any has finished)
+            scheduler.acquire(Priority.INTERACTIVE, "prompt", max_wait=1)
+        assert time.perf_counter() - start < 0.1
+
+    assert rejected.value.retry_after >= 1
+    assert scheduler.stats()["rejected"]["interactive"] == 1
+
+
+def test_request_beyond_the_queue_depth_is_rejected_immediately():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue_depth=1)
+    held = scheduler.acquire(Priority.BULK, "prompt")
+    served = []
+    queued = queue_acquire(scheduler, Priority.BULK, served)
+    wait_for_queue_depth(scheduler, 1)
+
+    start = time.perf_counter()
+    with pytest.raises(SchedulerOverloaded, match="queue is full"):
+        scheduler.acquire(Priority.INTERACTIVE, "prompt")
+    assert time.perf_counter() - start < 0.1
+
+    held.release()
+    queued.join(2)
+    assert served == [Priority.BULK]
+
+
+def test_shed_request_maps_to_429_with_retry_after(install_scheduler, stub_backend):
+    stub_backend()
+    scheduler = install_scheduler(LLMScheduler(max_concurrency=1, max_wait={Priority.INTERACTIVE: 1}))
+
+    with scheduler.acquire(Priority.BULK, "prompt"):
+        with pytest.raises(llm_service.LLMOverloadedError) as shed:
+            llm_service.generate_with_gemini("Refine this", priority=Priority.INTERACTIVE)
+    error = generate.llm_http_error(shed.value, "Refinement")
+
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) == shed.value.retry_after >= 1
+
+
+def test_token_bucket_refuses_once_the_minute_budget_is_spent():
+    bucket = TokenBucket(rate_per_minute=3)
+    now = time.monotonic()
+    for _ in range(3):
+        assert bucket.time_until(1, now) == 0
+        bucket.consume(1, now)
+
+    # One unit refills every 20 s
+    assert bucket.time_until(1, now) == pytest.approx(20)
+    assert bucket.time_until(1, now + 20) == pytest.approx(0)
+
+
+def test_scheduler_rejects_requests_over_the_per_minute_budget():
+    scheduler = LLMScheduler(requests_per_minute=2, max_wait={Priority.BULK: 1})
+    for _ in range(2):
+        scheduler.acquire(Priority.BULK, "prompt").release()
+
+    with pytest.raises(SchedulerOverloaded) as rejected:
+        scheduler.acquire(Priority.BULK, "prompt")
+    assert rejected.value.retry_after == pytest.approx(30, abs=1)
@@ -0,0 +1,147 @@
+# backend/tests/test_migrations.py
+
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app import database, doc_generator, migrations, models, schemas
+from app.routers import comments, projects, refine_feedback
+
+HOT_PATH_INDEXES = {"ix_projects_owner_created", "ix_document_sections_project_order", "uq_feedback_section_user"}
+
+
+def schema(engine) -> dict:
+    inspector = inspect(engine)
+    return {
+        table: (
+            {c["name"] for c in inspector.get_columns(table)},
+            {i["name"] for i in inspector.get_indexes(table)},
+        )
+        for table in models.Base.metadata.tables
+    }
+
+
+@pytest.fixture
+def new_engine(scratch_dir, request):
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(scratch_dir, request.node.name + '.db')}")
+    yield engine
+    engine.dispose()
+
+
+def test_fresh_database_matches_models(new_engine):
+    assert migrations.migrate(new_engine) == len(migrations.MIGRATIONS)
+    assert migrations.migrate(new_engine) == 0
+
+    expected = {
+        table.name: ({c.name for c in table.columns}, {i.name for i in table.indexes})
+        for table in models.Base.metadata.tables.values()
+    }
+    assert schema(new_engine) == expected
+
+
+def test_legacy_create_all_database_is_upgraded(new_engine):
+    # Tables from the old import-time create_all, with no schema_migrations
+    # and a user who left two feedback entries on one section
+    migrations._baseline.create_all(new_engine)
+    with new_engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x')"))
+        conn.execute(text("INSERT INTO projects (id, title, project_type, owner_id) VALUES (1, 'P', 'docx', 1)"))
+        conn.execute(text("INSERT INTO document_sections (id, project_id, order_index, title, content)"
+                          " VALUES (1, 1, 0, 'S', 'text')"))
+        conn.execute(text("INSERT INTO feedback (id, section_id, user_id, comment) VALUES (1, 1, 1, 'old'), (2, 1, 1, 'new')"))
+
+    migrations.migrate(new_engine)
+
+    fresh = database.create_db_engine(f"sqlite:///{new_engine.url.database}.fresh")
+    try:
+        migrations.migrate(fresh)
+        assert schema(new_engine) == schema(fresh)
+    finally:
+        fresh.dispose()
+    with new_engine.connect() as conn:
+        assert conn.execute(text("SELECT id, comment FROM feedback")).all() == [(2, "new")]
+        assert conn.execute(text("SELECT content_version FROM document_sections")).scalar() == 1
+
+
+# ======================================
+# Query plans of the hot paths
+# ======================================
+def seed(Session, users=5, projects_per_user=25, sections_per_project=10) -> None:
+    with Session() as db:
+        start = datetime(2025, 1, 1)
+        for u in range(users):
+            user = models.User(email=f"user{u}@example.com", hashed_password="x")
+            db.add(user)
+            db.flush()
+            for p in range(projects_per_user):
+                project = models.Project(title=f"P{u}.{p}", project_type="docx", owner_id=user.id,
+                                         created_at=start + timedelta(minutes=u * projects_per_user + p))
+                for i in range(sections_per_project):
+                    project.sections.append(models.DocumentSection(order_index=i, title=f"S{i}", content="text"))
+                db.add(project)
+        db.commit()
+
+
+def exercise(Session) -> None:
+    """The route handlers' hot queries, called directly."""
+    with Session() as db:
+        user = db.query(models.User).filter(models.User.email == "user3@example.com").one()
+        page = json.loads(projects.list_projects(cursor=None, limit=10, view="summary", fields=None, exclude=None,
+                                                 db=db, current_user=user).body)
+        projects.list_projects(cursor=page["next_cursor"], limit=10, view="summary", fields=None, exclude=None,
+                               db=db, current_user=user)
+        projects.list_projects(cursor=None, limit=10, view="full", fields=None, exclude=None,
+                               db=db, current_user=user)
+        project_id = page["items"][0]["id"]
+        project = json.loads(projects.get_project(project_id, fields=None, exclude=None, db=db,
+                                                  current_user=user).body)
+        doc_generator.count_sections(db, project_id)
+        list(doc_generator._iter_section_rows(db, project_id))
+        section_id = project["sections"][0]["id"]
+
+        refine_feedback._get_owned_section(db, section_id, user)
+        request = schemas.FeedbackRequest(section_id=section_id, is_liked=True, comment="ok")
+        comments.post_feedback(request, db=db, current_user=user)
+        comments.post_feedback(request, db=db, current_user=user)
+        comments.get_feedback_for_section(section_id, db=db, current_user=user)
+        comments.delete_feedback(section_id, db=db, current_user=user)
+
+
+def test_hot_queries_use_indexes(new_engine):
+    migrations.migrate(new_engine)
+    Session = sessionmaker(bind=new_engine)
+    seed(Session)
+    with new_engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    tables = set(inspect(new_engine).get_table_names())
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if re.match(r"\s*(SELECT|UPDATE|DELETE)", statement, re.I) and not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(new_engine, "before_cursor_execute", capture)
+    try:
+        exercise(Session)
+    finally:
+        event.remove(new_engine, "before_cursor_execute", capture)
+
+    full_scans, used = [], set()
+    with new_engine.connect() as conn:
+        for statement, parameters in captured:
+            for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+                step = row[3]
+                m = re.match(r"SCAN (\w+)(?: AS \w+)?$", step)
+                if m and m.group(1) in tables:
+                    full_scans.append((" ".join(statement.split()), step))
+                used.update(re.findall(r"USING (?:COVERING )?INDEX (\w+)", step))
+
+    assert captured
+    assert full_scans == []
+    assert HOT_PATH_INDEXES <= used
@@ -0,0 +1,101 @@
+import pytest
+
+from app import near_duplicates
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    index = near_duplicates.NearDuplicateIndex()
+    monkeypatch.setattr(near_duplicates, "_index", index)
+    monkeypatch.setattr(near_duplicates, "NEAR_DUPLICATE_ENABLED", True)
+    return index
+
+
+def _outline(client, headers, topic: str) -> dict:
+    response = client.post("/generate/outline", headers=headers, json={"topic": topic, "project_type": "docx"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_outline_reused_for_same_user(client, auth_headers, fresh_index):
+    first = _outline(client, auth_headers, "AI in Healthcare")
+    again = _outline(client, auth_headers, "Healthcare AI")
+
+    assert first["reuse"] is None
+    assert again["reuse"] is not None
+    assert again["outline"] == first["outline"]
+
+
+def test_outline_never_reused_across_users(client, register_user, fresh_index):
+    topic = "Confidential merger plan for Acme"
+    _outline(client, register_user(), topic)
+
+    other_user = _outline(client, register_user(), topic)
+    anonymous = _outline(client, {}, topic)
+
+    assert other_user["reuse"] is None
+    assert anonymous["reuse"] is None
+
+
+def test_sections_never_reused_across_users(register_user, create_project, fresh_index, stub_backend):
+    stub_backend()
+    owner = register_user()
+    create_project(owner, "Acme acquisition due diligence", ["Market overview"])
+
+    assert create_project(owner, "Acme acquisition due diligence", ["Market overview"])["reused_sections"]
+    assert not create_project(register_user(), "Acme acquisition due diligence", ["Market overview"])["reused_sections"]
+
+
+@pytest.mark.parametrize("stored, query", [
+    ("Q3 sales report", "Q4 sales report"),
+    ("Marketing strategy 2023", "Marketing strategy 2024"),
+    ("Marketing strategy 2023", "Marketing strategy"),
+    ("Renewable energy in India", "Renewable energy in Indonesia"),
+    ("AI in Healthcare", "AI in Finance"),
+    ("Cybersecurity for small businesses", "Cybersecurity for large businesses"),
+    ("AI", "AI in Healthcare"),
+])
+def test_topics_differing_in_a_key_token_are_not_reused(stored, query):
+    index = near_duplicates.NearDuplicateIndex()
+    index.add("scope", stored, "value")
+
+    assert index.query("scope", query) is None
+
+
+@pytest.mark.parametrize("stored, query", [
+    ("AI in Healthcare", "Healthcare AI"),
+    ("Marketing strategy 2023", "2023 marketing strategy"),
+    ("Cloud migration for retail", "Retail cloud migration strategy"),
+    ("Data privacy regulations", "Data privacy regulation"),
+])
+def test_reworded_topics_are_reused(stored, query):
+    index = near_duplicates.NearDuplicateIndex()
+    index.add("scope", stored, "value")
+
+    assert index.query("scope", query).value == "value"
+
+
+@pytest.mark.parametrize("stored", ["AI in Healthcare", "Healthcare AI", "AI in healthcare industry"])
+def test_request_examples_are_reused_for_each_other(stored):
+    index = near_duplicates.NearDuplicateIndex()
+    index.add("scope", stored, "value")
+
+    for query in ["AI in Healthcare", "Healthcare AI", "AI in healthcare industry"]:
+        assert index.query("scope", query).value == "value", query
+    assert index.query("scope", "Renewable energy in India") is None
+    index.add("scope", "Renewable energy in India", "india")
+    assert index.query("scope", "Renewable energy in Indonesia") is None
+
+
+def test_outline_with_misconfigured_backend_is_a_gateway_error(client, auth_headers, fresh_index, monkeypatch):
+    from app import llm_service
+
+    def unconfigured():
+        raise llm_service.LLMConfigurationError("GENAI_API_KEY is not set")
+
+    monkeypatch.setattr("app.routers.generate.get_backend", unconfigured)
+
+    response = client.post("/generate/outline", headers=auth_headers, json={"topic": "AI in Healthcare"})
+
+    assert response.status_code == 502
+    assert "GENAI_API_KEY" in response.json()["detail"]
@@ -0,0 +1,42 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from app import database
+
+
+@contextlib.contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(database.engine, "before_cursor_execute", record)
+
+
+@pytest.mark.parametrize("view", ["summary", "full"])
+def test_listing_query_count_does_not_grow_with_projects(client, auth_headers, create_project, view):
+    def list_statements(expected_items: int) -> list:
+        with count_statements() as statements:
+            response = client.get("/projects/", headers=auth_headers, params={"view": view, "limit": 50})
+        assert response.status_code == 200, response.text
+        assert len(response.json()["items"]) == expected_items
+        return statements
+
+    for _ in range(2):
+        create_project(auth_headers, section_titles=["One", "Two", "Three"])
+    list_statements(2)  # warms the auth cache
+    few = list_statements(2)
+
+    for _ in range(10):
+        create_project(auth_headers, section_titles=["One", "Two", "Three"])
+    many = list_statements(12)
+
+    assert len(many) == len(few), many
+    assert len(few) <= (1 if view == "summary" else 2), few
@@ -0,0 +1,108 @@
+import json
+
+from app import database, models
+from app.routers import refine_feedback
+
+
+def _sse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _stream_with(monkeypatch, during_stream):
+    def fake_stream(prompt, **kwargs):
+        yield "Refined "
+        during_stream()
+        yield "text."
+
+    monkeypatch.setattr(refine_feedback, "stream_with_gemini", fake_stream)
+
+
+def test_refine_stream_saves_when_unchanged(client, auth_headers, create_project, monkeypatch):
+    section = create_project(auth_headers)["sections"][0]
+    _stream_with(monkeypatch, lambda: None)
+
+    response = client.post(f"/section/{section['id']}/refine/stream", headers=auth_headers,
+                           json={"section_id": section["id"], "prompt": "shorter"})
+
+    event, data = _sse_events(response.text)[-1]
+    assert event == "done"
+    assert data["content_version"] == section["content_version"] + 1
+
+
+def test_refine_stream_does_not_overwrite_concurrent_edit(client, auth_headers, create_project,
+                                                          set_section_content, monkeypatch):
+    section = create_project(auth_headers)["sections"][0]
+    _stream_with(monkeypatch, lambda: set_section_content(section["id"], "Saved by someone else."))
+
+    response = client.post(f"/section/{section['id']}/refine/stream", headers=auth_headers,
+                           json={"section_id": section["id"], "prompt": "shorter"})
+
+    event, data = _sse_events(response.text)[-1]
+    assert event == "error"
+    assert data["status_code"] == 409
+    session = database.SessionLocal()
+    try:
+        assert session.get(models.DocumentSection, section["id"]).content == "Saved by someone else."
+    finally:
+        session.close()
+
+
+def test_refine_stream_section_deleted_during_stream(client, auth_headers, create_project, monkeypatch):
+    section = create_project(auth_headers)["sections"][0]
+
+    def delete_section():
+        session = database.SessionLocal()
+        try:
+            session.query(models.SectionRevision).filter_by(section_id=section["id"]).delete()
+            session.query(models.DocumentSection).filter_by(id=section["id"]).delete()
+            session.commit()
+        finally:
+            session.close()
+
+    _stream_with(monkeypatch, delete_section)
+
+    response = client.post(f"/section/{section['id']}/refine/stream", headers=auth_headers,
+                           json={"section_id": section["id"], "prompt": "shorter"})
+
+    event, data = _sse_events(response.text)[-1]
+    assert event == "error"
+    assert data["status_code"] == 404
+
+
+def test_refine_stream_rejects_stale_expected_version(client, auth_headers, create_project):
+    section = create_project(auth_headers)["sections"][0]
+
+    response = client.post(f"/section/{section['id']}/refine/stream", headers=auth_headers,
+                           json={"section_id": section["id"], "prompt": "shorter",
+                                 "expected_version": section["content_version"] - 1})
+
+    assert response.status_code == 409
+
+
+def test_feedback_saved_when_content_changed_since_load(client, auth_headers, create_project,
+                                                         set_section_content, monkeypatch):
+    section = create_project(auth_headers)["sections"][0]
+    get_owned_section = refine_feedback._get_owned_section
+
+    def refined_after_load(db, section_id, user):
+        loaded = get_owned_section(db, section_id, user)
+        set_section_content(section_id, "Refined meanwhile.")
+        return loaded
+
+    monkeypatch.setattr(refine_feedback, "_get_owned_section", refined_after_load)
+
+    response = client.post(f"/section/{section['id']}/feedback", headers=auth_headers,
+                           json={"section_id": section["id"], "is_liked": True, "comment": "good"})
+
+    assert response.status_code == 200, response.text
+    session = database.SessionLocal()
+    try:
+        saved = session.get(models.DocumentSection, section["id"])
+        assert (saved.content, saved.is_liked, saved.comment) == ("Refined meanwhile.", True, "good")
+        assert saved.content_version == section["content_version"] + 1
+    finally:
+        session.close()
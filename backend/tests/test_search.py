@@ -0,0 +1,22 @@
+from app import search
+
+
+def test_snippet_escapes_section_text(client, auth_headers, create_project, set_section_content):
+    section = create_project(auth_headers)["sections"][0]
+    set_section_content(section["id"],
+                        'Turbines <img src=x onerror="alert(1)"> & <script>alert(2)</script> generate power.')
+
+    response = client.get("/search/", headers=auth_headers, params={"q": "turbines"})
+
+    assert response.status_code == 200, response.text
+    snippet = response.json()["items"][0]["snippet"]
+    assert "<mark>Turbines</mark>" in snippet
+    assert "<img" not in snippet and "<script>" not in snippet
+    assert "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; &amp; &lt;script&gt;" in snippet
+
+
+def test_render_snippet_balances_markers():
+    start, end = "\ue000", "\ue001"
+
+    assert search.render_snippet(f"a {start}b{end} <c> {start}d") == "a <mark>b</mark> &lt;c&gt; <mark>d</mark>"
+    assert search.render_snippet(f"{end}a{start}{start}b{end}{end}") == "a<mark>b</mark>"
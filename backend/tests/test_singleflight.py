@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import llm_cache, llm_service
+
+CALLERS = 8
+
+
+@pytest.fixture
+def completion_cache(monkeypatch):
+    cache = llm_cache.CompletionCache(path=None)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    llm_cache.set_cache(cache)
+    yield cache
+    llm_cache.set_cache(None)
+
+
+def call_concurrently(prompt: str, **kwargs) -> list:
+    """Starts CALLERS identical calls at once; returns each one's text or exception."""
+    start = threading.Barrier(CALLERS)
+
+    def call(_):
+        start.wait()
+        try:
+            return llm_service.generate_with_gemini(prompt, **kwargs)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        return list(pool.map(call, range(CALLERS)))
+
+
+def test_identical_concurrent_calls_share_one_backend_call(stub_backend, monkeypatch):
+    monkeypatch.setattr(llm_service, "LLM_SINGLEFLIGHT_ENABLED", True)
+    backend = stub_backend(latency=0.3)
+
+    results = call_concurrently("Outline for coalescing")
+
+    assert backend.calls == 1
+    assert len(set(results)) == 1
+    assert isinstance(results[0], str) and results[0]
+
+
+def test_failed_call_reaches_every_waiter_and_is_not_cached(stub_backend, completion_cache, monkeypatch):
+    monkeypatch.setattr(llm_service, "LLM_SINGLEFLIGHT_ENABLED", True)
+    backend = stub_backend(latency=0.3, failure_rate=1.0, max_retries=0)
+
+    results = call_concurrently("Outline for a failing call", use_cache=True)
+
+    assert backend.calls == 1
+    assert all(isinstance(result, llm_service.LLMUnavailableError) for result in results)
+    assert len({id(result) for result in results}) == 1
+    assert completion_cache.stats()["stores"] == 0
+    assert llm_service.singleflight_stats()["in_flight"] == 0
+
+    # Nothing of the failure is kept: the next call goes upstream again
+    backend.failure_rate = 0.0
+    text = llm_service.generate_with_gemini("Outline for a failing call", use_cache=True)
+    assert backend.calls == 2
+    assert completion_cache.stats()["stores"] == 1
+    assert text
@@ -7,15 +7,25 @@ export default function Dashboard() {
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     
     api.get('/projects/')
-       .then(res => setProjects(res.data))
+       .then(res => { setProjects(res.data.items); setNextCursor(res.data.next_cursor); })
        .catch(err => console.error("Load failed", err))
        .finally(() => setLoading(false));
   }, []);
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    api.get('/projects/', { params: { cursor: nextCursor } })
+       .then(res => { setProjects(prev => [...prev, ...res.data.items]); setNextCursor(res.data.next_cursor); })
+       .catch(err => console.error("Load failed", err))
+       .finally(() => setLoadingMore(false));
+  };
+
   const filteredProjects = projects.filter(p => p.title.toLowerCase().includes(searchTerm.toLowerCase()));
 
   return (
@@ -61,6 +71,12 @@ export default function Dashboard() {
                 <Link to="/create" className="text-blue-600 font-bold hover:underline">Create New Project</Link>
             </div>
         )}
+
+        {!loading && nextCursor && (
+            <div className="text-center mt-8">
+                <button onClick={loadMore} disabled={loadingMore} className="px-6 py-2 rounded-xl border border-gray-300 bg-white font-bold text-gray-700 hover:border-blue-300 disabled:opacity-50">{loadingMore ? 'Loading...' : 'Load more'}</button>
+            </div>
+        )}
       </div>
     </div>
   );